@@ -0,0 +1,333 @@
+import sys
+import os
+import json
+import time
+import platform
+import datetime
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import duckdb
+import numpy as np
+import polars
+import typer
+
+from typing import Callable
+from db.utils import (
+    create_duckdb_db,
+    return_duckdb_conn,
+    create_schemas,
+    create_config_tables,
+    create_prices_tables,
+    create_or_append_table_from_df,
+    select_daily_price,
+)
+from db.connection import close_connection_managers
+from modelling.prices import model_daily_prices
+
+app = typer.Typer(help="Benchmark the Price Data API hot path.")
+
+LOOKUP_TABLE_SIZES = [10**3, 10**4, 10**5, 10**6, 10**7]
+PRICES_KEYS_PER_DATE = 24
+
+
+def time_call(func: Callable[[], object], repeat: int, warmup: int = 1) -> dict:
+    """
+    Time repeated calls to a function.
+
+    :param func: the function to time, called with no arguments
+    :param repeat: number of timed calls
+    :param warmup: number of untimed calls made first
+    :return: dict of timings in milliseconds
+    """
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return summarise_timings(timings)
+
+
+def summarise_timings(timings: list[float]) -> dict:
+    """
+    Summarise a list of timings.
+
+    :param timings: timings in milliseconds
+    :return: dict with repeat, min, median, mean, p95 and max
+    """
+    return {
+        "repeat": len(timings),
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+        "mean_ms": statistics.fmean(timings),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "max_ms": max(timings),
+    }
+
+
+def initialise_benchmark_db(db_name: str) -> duckdb.DuckDBPyConnection:
+    """
+    Create a database with the config and prices tables.
+
+    :param db_name: the name of the database to create
+    :return: DuckDB connection to the database
+    """
+    create_duckdb_db(db_name)
+    conn = return_duckdb_conn(db_name)
+    create_schemas(conn)
+    create_config_tables(conn)
+    create_prices_tables(conn)
+    return conn
+
+
+def seed_daily_prices(conn: duckdb.DuckDBPyConnection, rows: int) -> None:
+    """
+    Fill prices.daily_prices with rows of 24 hourly prices.
+    Every date holds one row per country, commodity and granularity.
+
+    :param conn: DuckDB connection to use
+    :param rows: number of rows to insert
+    :return: None
+    """
+    conn.execute(
+        f"""
+        INSERT INTO prices.daily_prices
+        SELECT
+            nextval('prices.daily_prices_id_seq'),
+            TIMESTAMP '1900-01-01' + to_days((i // {PRICES_KEYS_PER_DATE})::INTEGER),
+            ['GB', 'FR', 'NL', 'DE'][i % 4 + 1],
+            ['power', 'natural_gas', 'crude'][(i // 4) % 3 + 1],
+            ['h', 'hh'][(i // 12) % 2 + 1],
+            list_transform(range(24), hour -> 50.0 + hour)
+        FROM range({rows}) AS t(i)
+        """
+    )
+
+
+def benchmark_model_daily_prices(db_name: str, repeat: int) -> list[dict]:
+    """
+    Time model_daily_prices for every granularity.
+
+    :param db_name: the name of the database holding the config tables
+    :param repeat: number of timed calls
+    :return: list of benchmark results
+    """
+    for_date = datetime.datetime(2025, 3, 29)
+    return [
+        {
+            "name": "model_daily_prices",
+            "params": {"granularity": granularity},
+            "stats": time_call(
+                lambda granularity=granularity: model_daily_prices(
+                    for_date, "GB", granularity, "power", db_name
+                ),
+                repeat,
+            ),
+        }
+        for granularity in ("h", "hh")
+    ]
+
+
+def benchmark_historic_lookup(
+    directory: str, table_sizes: list[int], repeat: int
+) -> list[dict]:
+    """
+    Time select_daily_price, the query behind the historic daily price lookup,
+    against seeded prices.daily_prices tables. main.get_historic_daily_price reads
+    the app's DB_NAME, so the query is timed directly on each seeded database.
+    Each lookup targets the last seeded date, so it cannot stop early.
+
+    :param directory: directory to create the seeded databases in
+    :param table_sizes: numbers of rows to seed
+    :param repeat: number of timed calls per table size
+    :return: list of benchmark results
+    """
+    results = []
+    for rows in table_sizes:
+        conn = initialise_benchmark_db(os.path.join(directory, f"lookup_{rows}.db"))
+        seed_daily_prices(conn, rows)
+        last_date = datetime.datetime(1900, 1, 1) + datetime.timedelta(
+            days=(rows - 1) // PRICES_KEYS_PER_DATE
+        )
+        results.append(
+            {
+                "name": "select_daily_price",
+                "params": {"rows": rows},
+                "stats": time_call(
+                    lambda: select_daily_price(conn, last_date, "GB", "h", "power"),
+                    repeat,
+                ),
+            }
+        )
+    return results
+
+
+def benchmark_create_or_append(db_name: str, repeat: int) -> list[dict]:
+    """
+    Time create_or_append_table_from_df for single-row and bulk appends.
+
+    :param db_name: the name of the database to write to
+    :param repeat: number of timed calls per batch size
+    :return: list of benchmark results
+    """
+    conn = return_duckdb_conn(db_name)
+    results = []
+    for batch_rows in (1, 1000):
+        df = polars.DataFrame(
+            {
+                "date": [datetime.datetime(2000, 1, 1)] * batch_rows,
+                "country_code": ["GB"] * batch_rows,
+                "commodity": ["power"] * batch_rows,
+                "granularity": ["h"] * batch_rows,
+                "prices": [[50.0] * 24] * batch_rows,
+            }
+        )
+        create_or_append_table_from_df(df, "create", "prices", "append_bench", conn)
+        results.append(
+            {
+                "name": "create_or_append_table_from_df",
+                "params": {"rows": batch_rows},
+                "stats": time_call(
+                    lambda df=df: create_or_append_table_from_df(
+                        df, "append", "prices", "append_bench", conn
+                    ),
+                    repeat,
+                ),
+            }
+        )
+    return results
+
+
+def benchmark_model_prices_route(directory: str, repeat: int) -> list[dict]:
+    """
+    Time the /model-prices route through FastAPI's TestClient.
+    Cold requests ask for a new date each time, so they model and queue prices.
+    Warm requests repeat one date, so they return stored prices.
+
+    :param directory: working directory for the price_data.db database
+    :param repeat: number of timed requests per case
+    :return: list of benchmark results
+    """
+    working_directory = os.getcwd()
+    os.chdir(directory)
+    try:
+        from fastapi.testclient import TestClient
+        import main
+
+        with TestClient(main.app) as client:
+            cold_timings = []
+            for day in range(repeat):
+                body = {
+                    "for_date": (
+                        datetime.date(2030, 1, 1) + datetime.timedelta(days=day)
+                    ).isoformat(),
+                    "country_code": "GB",
+                    "granularity": "h",
+                    "commodity": "power",
+                }
+                start = time.perf_counter()
+                client.post("/model-prices", json=body).raise_for_status()
+                cold_timings.append((time.perf_counter() - start) * 1000)
+
+            body = {
+                "for_date": "2030-01-01",
+                "country_code": "GB",
+                "granularity": "h",
+                "commodity": "power",
+            }
+            warm_stats = time_call(
+                lambda: client.post("/model-prices", json=body).raise_for_status(),
+                repeat,
+            )
+    finally:
+        os.chdir(working_directory)
+
+    return [
+        {
+            "name": "model_prices_route",
+            "params": {"cache": "cold"},
+            "stats": summarise_timings(cold_timings),
+        },
+        {
+            "name": "model_prices_route",
+            "params": {"cache": "warm"},
+            "stats": warm_stats,
+        },
+    ]
+
+
+@app.command()
+def run(
+    output: str = typer.Option("benchmarks/results.json", help="JSON file to write"),
+    repeat: int = typer.Option(50, help="Timed calls per benchmark"),
+    max_rows: int = typer.Option(
+        10**6, help="Largest seeded daily_prices table for the lookup benchmark"
+    ),
+) -> None:
+    """
+    Run every benchmark and write the results as JSON.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "bench")
+        initialise_benchmark_db(f"{db_path}.db")
+
+        results = []
+        results += benchmark_model_daily_prices(f"{db_path}.db", repeat)
+        results += benchmark_historic_lookup(
+            directory, [rows for rows in LOOKUP_TABLE_SIZES if rows <= max_rows], repeat
+        )
+        results += benchmark_create_or_append(f"{db_path}.db", repeat)
+        results += benchmark_model_prices_route(directory, repeat)
+        close_connection_managers()
+
+    report = {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "duckdb": duckdb.__version__,
+        "numpy": np.__version__,
+        "polars": polars.__version__,
+        "results": results,
+    }
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    for result in results:
+        typer.echo(
+            f"{result['name']:<32} {json.dumps(result['params']):<24} "
+            f"median {result['stats']['median_ms']:.3f} ms"
+        )
+    typer.echo(f"Results written to {output}")
+
+
+@app.command()
+def compare(before: str, after: str) -> None:
+    """
+    Compare the median timings of two benchmark result files.
+    """
+    with open(before) as file:
+        before_results = json.load(file)["results"]
+    with open(after) as file:
+        after_results = json.load(file)["results"]
+
+    before_medians = {
+        (result["name"], json.dumps(result["params"])): result["stats"]["median_ms"]
+        for result in before_results
+    }
+    for result in after_results:
+        key = (result["name"], json.dumps(result["params"]))
+        if key not in before_medians:
+            continue
+        before_median = before_medians[key]
+        after_median = result["stats"]["median_ms"]
+        typer.echo(
+            f"{key[0]:<32} {key[1]:<24} {before_median:.3f} ms -> "
+            f"{after_median:.3f} ms ({before_median / after_median:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,495 @@
+import signal
+import datetime
+import multiprocessing
+import numpy as np
+import pyarrow
+import duckdb
+import typer
+
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import NamedTuple
+from db.tables import CountryCodes, Commodity, Granularity
+from db.connection import close_connection_managers
+from db.utils import (
+    create_duckdb_db,
+    return_duckdb_conn,
+    create_schemas,
+    create_config_tables,
+    create_prices_tables,
+    check_table_exists,
+    delete_duplicate_daily_prices,
+    create_prices_long_table,
+    create_daily_prices_views,
+    archive_daily_prices,
+    migrate_daily_prices_to_long,
+    create_backfill_checkpoints_table,
+    select_stored_daily_price_keys,
+    insert_daily_prices,
+    insert_daily_prices_long,
+    insert_daily_summary,
+    rebuild_daily_summary,
+    check_daily_summary_missing,
+    select_daily_prices_date_span,
+)
+from db.writer import DailyPricesWriter
+from db.writer_server import DailyPricesWriterServer
+from modelling.config import (
+    PRICE_CONFIGS,
+    PriceConfig,
+    get_price_config,
+    price_config_key,
+)
+from modelling.prices import get_dates_in_range, model_prices_for_dates
+from modelling.shapes import get_peak_periods_df
+from modelling.trading_calendar import get_seasons_df
+from utils.settings import get_settings
+
+app = typer.Typer(help="Command line tools for the Price Data API database.")
+
+BACKFILL_CHUNK_DAYS = 31
+BACKFILL_BATCH_ROWS = 10000
+
+
+class BackfillChunk(NamedTuple):
+    """
+    Consecutive days of one country, commodity and granularity to backfill.
+    """
+
+    country_code: str
+    commodity: str
+    granularity: str
+    start_date: datetime.datetime
+    end_date: datetime.datetime
+    missing_dates: list[datetime.datetime]
+
+
+def initialise_backfill_worker(db_name: str, price_config: PriceConfig) -> None:
+    """
+    Prepare a backfill worker process.
+    The price config is handed over from the parent, so workers never open the
+    database, and numpy's global random state is reseeded for each worker.
+
+    :param db_name: name of the database file the price config was loaded from
+    :param price_config: the price config loaded by the parent process
+    :return: None
+    """
+    PRICE_CONFIGS[price_config_key(db_name)] = price_config
+    np.random.seed()
+
+
+def model_backfill_chunk(
+    chunk: BackfillChunk, db_name: str
+) -> tuple[BackfillChunk, list[np.ndarray]]:
+    """
+    Model the prices of every missing day of a chunk in one vectorized pass.
+
+    :param chunk: the chunk to model
+    :param db_name: name of the database file the price config was loaded from
+    :return: the chunk and its modelled prices, in the order of its missing dates
+    """
+    prices = model_prices_for_dates(
+        chunk.missing_dates,
+        chunk.country_code,
+        chunk.granularity,
+        chunk.commodity,
+        db_name,
+    )
+    return chunk, prices
+
+
+def plan_backfill_chunks(
+    conn: duckdb.DuckDBPyConnection,
+    start_date: datetime.datetime,
+    end_date: datetime.datetime,
+    country_codes: list[str],
+    commodities: list[str],
+    granularities: list[str],
+    chunk_days: int,
+    layout: str,
+) -> list[BackfillChunk]:
+    """
+    Split a backfill into chunks and drop the days that do not need modelling.
+    Chunks recorded in prices.backfill_checkpoints are skipped, and days that are
+    already stored are left out of the remaining chunks.
+
+    :param conn: DuckDB connection to use
+    :param start_date: the first date to backfill
+    :param end_date: the last date to backfill
+    :param country_codes: the country codes to backfill
+    :param commodities: the commodities to backfill
+    :param granularities: the granularities to backfill
+    :param chunk_days: the number of days in each chunk
+    :param layout: storage layout to read, "wide" or "long"
+    :return: list of chunks with at least one missing day
+    """
+    for_dates = get_dates_in_range(start_date, end_date)
+    completed = set(
+        conn.execute(
+            """
+            SELECT country_code, commodity, granularity, start_date, end_date
+            FROM prices.backfill_checkpoints
+            """
+        ).fetchall()
+    )
+    stored = set(
+        select_stored_daily_price_keys(
+            conn, for_dates[0], for_dates[-1], layout
+        ).iter_rows()
+    )
+
+    chunks = []
+    for country_code in country_codes:
+        for commodity in commodities:
+            for granularity in granularities:
+                for index in range(0, len(for_dates), chunk_days):
+                    chunk_dates = for_dates[index : index + chunk_days]
+                    key = (
+                        country_code,
+                        commodity,
+                        granularity,
+                        chunk_dates[0],
+                        chunk_dates[-1],
+                    )
+                    if key in completed:
+                        continue
+                    missing_dates = [
+                        for_date
+                        for for_date in chunk_dates
+                        if (for_date, country_code, commodity, granularity)
+                        not in stored
+                    ]
+                    if missing_dates:
+                        chunks.append(BackfillChunk(*key, missing_dates))
+    return chunks
+
+
+def write_backfill_batch(
+    conn: duckdb.DuckDBPyConnection,
+    results: list[tuple[BackfillChunk, list[np.ndarray]]],
+    layout: str,
+) -> int:
+    """
+    Insert the prices of modelled chunks in one bulk insert, summarise them into
+    prices.daily_summary and checkpoint them.
+    The rows, summaries and checkpoints are committed in one transaction, so an interrupted
+    backfill never checkpoints a chunk whose rows were not written.
+
+    :param conn: DuckDB connection to use
+    :param results: the modelled chunks and their prices
+    :param layout: storage layout to write, "wide" or "long"
+    :return: number of rows inserted
+    """
+    backfill_daily_prices = pyarrow.table(
+        {
+            "date": pyarrow.array(
+                [for_date for chunk, _ in results for for_date in chunk.missing_dates],
+                pyarrow.timestamp("us"),
+            ),
+            "country_code": [
+                chunk.country_code for chunk, prices in results for _ in prices
+            ],
+            "commodity": [chunk.commodity for chunk, prices in results for _ in prices],
+            "granularity": [
+                chunk.granularity for chunk, prices in results for _ in prices
+            ],
+            "prices": pyarrow.array(
+                [day_prices for _, prices in results for day_prices in prices],
+                pyarrow.list_(pyarrow.float64()),
+            ),
+        }
+    )
+    completed_at = datetime.datetime.now()
+
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        conn.register("backfill_daily_prices", backfill_daily_prices)
+        if layout == "long":
+            rows = insert_daily_prices_long(conn, "backfill_daily_prices")
+        else:
+            rows = insert_daily_prices(conn, "backfill_daily_prices")
+        insert_daily_summary(
+            conn,
+            "backfill_daily_prices",
+            get_seasons_df(
+                sorted(
+                    {
+                        for_date
+                        for chunk, _ in results
+                        for for_date in chunk.missing_dates
+                    }
+                )
+            ),
+            get_peak_periods_df(),
+            layout,
+        )
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO prices.backfill_checkpoints
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                [
+                    chunk.country_code,
+                    chunk.commodity,
+                    chunk.granularity,
+                    chunk.start_date,
+                    chunk.end_date,
+                    len(chunk.missing_dates),
+                    completed_at,
+                ]
+                for chunk, _ in results
+            ],
+        )
+        conn.execute("COMMIT")
+    except Exception as error:
+        conn.execute("ROLLBACK")
+        typer.echo(f"Error writing backfill batch: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+    finally:
+        conn.unregister("backfill_daily_prices")
+    return rows
+
+
+@app.callback()
+def main() -> None:
+    """
+    Command line tools for the Price Data API database.
+    """
+
+
+@app.command()
+def backfill(
+    start: datetime.datetime = typer.Option(..., help="First date to backfill"),
+    end: datetime.datetime = typer.Option(..., help="Last date to backfill"),
+    countries: list[CountryCodes] = typer.Option(
+        list(CountryCodes), help="Country codes to backfill, repeat for several"
+    ),
+    commodities: list[Commodity] = typer.Option(
+        list(Commodity), help="Commodities to backfill, repeat for several"
+    ),
+    granularities: list[Granularity] = typer.Option(
+        list(Granularity), help="Granularities to backfill, repeat for several"
+    ),
+    db_name: str = typer.Option(
+        default_factory=lambda: get_settings().db_name, help="Database to backfill"
+    ),
+    workers: int = typer.Option(
+        multiprocessing.cpu_count(), help="Number of worker processes"
+    ),
+    chunk_days: int = typer.Option(
+        BACKFILL_CHUNK_DAYS, help="Days modelled together by a worker"
+    ),
+    batch_rows: int = typer.Option(
+        BACKFILL_BATCH_ROWS, help="Modelled rows written per bulk insert"
+    ),
+) -> None:
+    """
+    Model and store every missing daily price between two dates.
+    Chunks of days are modelled by a pool of worker processes, and the parent
+    writes them in batched inserts. Each batch checkpoints its chunks, so running
+    the same command again after an interruption resumes where it stopped.
+    The API must not be running against the same database.
+    """
+    if end < start:
+        typer.echo("end must not be before start. Program will exit.")
+        raise typer.Exit(code=1)
+
+    layout = get_settings().prices_storage_layout
+    create_duckdb_db(db_name)
+    conn = return_duckdb_conn(db_name)
+    create_schemas(conn)
+    create_config_tables(conn)
+    create_prices_tables(conn)
+    if layout == "long":
+        create_prices_long_table(conn)
+    create_backfill_checkpoints_table(conn)
+
+    chunks = plan_backfill_chunks(
+        conn,
+        start,
+        end,
+        [country_code.value for country_code in countries],
+        [commodity.value for commodity in commodities],
+        [granularity.value for granularity in granularities],
+        chunk_days,
+        layout,
+    )
+    total_days = sum(len(chunk.missing_dates) for chunk in chunks)
+    typer.echo(f"Backfilling {total_days} days in {len(chunks)} chunks")
+
+    written = 0
+    completed_chunks = 0
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initialise_backfill_worker,
+        initargs=(db_name, get_price_config(db_name)),
+    ) as executor:
+        pending_chunks = iter(chunks)
+        in_flight = set()
+        batch = []
+        batch_days = 0
+        while True:
+            while len(in_flight) < workers * 2:
+                chunk = next(pending_chunks, None)
+                if chunk is None:
+                    break
+                in_flight.add(executor.submit(model_backfill_chunk, chunk, db_name))
+            if not in_flight:
+                break
+
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk, prices = future.result()
+                batch.append((chunk, prices))
+                batch_days += len(prices)
+
+            if batch_days >= batch_rows or (not in_flight and batch):
+                written += write_backfill_batch(conn, batch, layout)
+                completed_chunks += len(batch)
+                typer.echo(
+                    f"Wrote {written} rows ({completed_chunks}/{len(chunks)} chunks)"
+                )
+                batch = []
+                batch_days = 0
+
+    close_connection_managers()
+    typer.echo(f"Backfill complete - {written} rows written")
+
+
+def summarise_daily_prices(conn: duckdb.DuckDBPyConnection, layout: str) -> int:
+    """
+    Rebuild prices.daily_summary from every stored daily price.
+
+    :param conn: DuckDB connection to use
+    :param layout: storage layout to read, "wide" or "long"
+    :return: number of days summarised
+    """
+    start_date, end_date = select_daily_prices_date_span(conn, layout)
+    for_dates = (
+        get_dates_in_range(start_date, end_date) if start_date is not None else []
+    )
+    return rebuild_daily_summary(
+        conn, get_seasons_df(for_dates), get_peak_periods_df(), layout
+    )
+
+
+@app.command("rebuild-daily-summary")
+def rebuild_daily_summary_table(
+    db_name: str = typer.Option(
+        default_factory=lambda: get_settings().db_name, help="Database to rebuild"
+    ),
+) -> None:
+    """
+    Rebuild prices.daily_summary from every stored daily price.
+    Used to summarise prices stored before the table existed. The API must not be
+    running against the same database.
+    """
+    layout = get_settings().prices_storage_layout
+    create_duckdb_db(db_name)
+    conn = return_duckdb_conn(db_name)
+    create_schemas(conn)
+    create_prices_tables(conn)
+    if layout == "long":
+        create_prices_long_table(conn)
+
+    rows = summarise_daily_prices(conn, layout)
+    close_connection_managers()
+    typer.echo(f"Daily summary rebuilt - {rows} days summarised")
+
+
+@app.command("deduplicate-prices")
+def deduplicate_prices(
+    db_name: str = typer.Option(
+        default_factory=lambda: get_settings().db_name, help="Database to deduplicate"
+    ),
+) -> None:
+    """
+    Delete daily prices that repeat the date, country, granularity and commodity of
+    an earlier row, keeping the first stored row, then build the unique key index.
+    Needed once for databases written before the index existed, which the API
+    refuses to start on. The API must not be running against the same database.
+    """
+    create_duckdb_db(db_name)
+    conn = return_duckdb_conn(db_name)
+    create_schemas(conn)
+    rows = 0
+    if check_table_exists("prices", "daily_prices", conn):
+        rows = delete_duplicate_daily_prices(conn)
+    create_prices_tables(conn)
+    close_connection_managers()
+    typer.echo(f"Deduplication complete - {rows} duplicate rows deleted")
+
+
+@app.command("archive-prices")
+def archive_prices(
+    before: datetime.datetime = typer.Option(
+        ..., help="Daily prices dated before this date are archived"
+    ),
+    db_name: str = typer.Option(
+        default_factory=lambda: get_settings().db_name, help="Database to archive"
+    ),
+) -> None:
+    """
+    Move daily prices dated before a date into Parquet files.
+    The files are written to PRICES_ARCHIVE_DIRECTORY, which is stored in the
+    database, so the API reads the archive from there on every later start.
+    Applies to the wide layout. The API must not be running against the same
+    database.
+    """
+    create_duckdb_db(db_name)
+    conn = return_duckdb_conn(db_name)
+    create_schemas(conn)
+    create_prices_tables(conn)
+    rows = archive_daily_prices(conn, before, get_settings().prices_archive_directory)
+    close_connection_managers()
+    typer.echo(f"Archive complete - {rows} rows archived")
+
+
+@app.command("serve-writer")
+def serve_writer() -> None:
+    """
+    Run the writer process for an API served by several workers.
+    The process owns the database named by DB_NAME and receives modelled prices on
+    the WRITER_SOCKET Unix socket. Workers read snapshots of the database that are
+    written to DB_SNAPSHOT_DIRECTORY at most every DB_SNAPSHOT_INTERVAL seconds.
+    Stop it with Ctrl+C or SIGTERM, after the workers.
+    """
+    settings = get_settings()
+    if not settings.writer_socket:
+        typer.echo("WRITER_SOCKET must be set to serve the writer. Program will exit.")
+        raise typer.Exit(code=1)
+
+    create_duckdb_db(settings.db_name)
+    conn = return_duckdb_conn(settings.db_name)
+    create_schemas(conn)
+    create_config_tables(conn)
+    create_prices_tables(conn)
+    create_daily_prices_views(conn)
+    if settings.prices_storage_layout == "long":
+        rows = migrate_daily_prices_to_long(conn)
+        if rows:
+            typer.echo(f"Migrated {rows} daily price periods to the long layout")
+    if check_daily_summary_missing(conn, settings.prices_storage_layout):
+        rows = summarise_daily_prices(conn, settings.prices_storage_layout)
+        typer.echo(f"Daily summary rebuilt - {rows} days summarised")
+
+    server = DailyPricesWriterServer(
+        DailyPricesWriter(settings.db_name, layout=settings.prices_storage_layout),
+        settings.writer_socket,
+        settings.snapshot_directory,
+        settings.snapshot_interval,
+    )
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    typer.echo(f"Writer listening on {settings.writer_socket}")
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_connection_managers()
+    typer.echo("Writer stopped")
+
+
+if __name__ == "__main__":
+    app()
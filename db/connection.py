@@ -0,0 +1,247 @@
+import os
+import time
+import threading
+import duckdb
+import typer
+
+from utils.metrics import DUCKDB_CONNECTION_OPENS
+
+
+class ConnectionManager:
+    """
+    Own a single DuckDB connection to a database and hand out per-thread cursors.
+    Cursors share the connection's database instance, so opening one costs no file
+    locking or catalog loading, and each thread can query without sharing state.
+    """
+
+    def __init__(self, db_name: str) -> None:
+        """
+        :param db_name: Name of the database to manage connections for
+        """
+        self.db_name = db_name
+        self._conn: duckdb.DuckDBPyConnection | None = None
+        self._cursors: list[duckdb.DuckDBPyConnection] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def connect(self) -> duckdb.DuckDBPyConnection:
+        """
+        Return the managed connection, opening it if it is not open yet.
+
+        :return: duckdb.DuckDBPyConnection
+        """
+        with self._lock:
+            if self._conn is None:
+                try:
+                    self._conn = duckdb.connect(self.db_name)
+                    DUCKDB_CONNECTION_OPENS.inc()
+                except Exception as error:
+                    typer.echo(
+                        f"Error connecting to DuckDB database: {error}. "
+                        f"Program will exit."
+                    )
+                    raise typer.Exit(code=1)
+            return self._conn
+
+    def cursor(self) -> duckdb.DuckDBPyConnection:
+        """
+        Return the cursor owned by the calling thread, creating it on first use.
+
+        :return: duckdb.DuckDBPyConnection
+        """
+        conn = self.connect()
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None or getattr(self._local, "conn", None) is not conn:
+            cursor = conn.cursor()
+            self._local.cursor = cursor
+            self._local.conn = conn
+            with self._lock:
+                self._cursors.append(cursor)
+        return cursor
+
+    def open_cursor(self) -> duckdb.DuckDBPyConnection:
+        """
+        Return a new cursor that is not tied to the calling thread.
+        Used for long-running streamed results, which another query on a shared
+        cursor would invalidate. The caller is responsible for closing it.
+
+        :return: duckdb.DuckDBPyConnection
+        """
+        return self.connect().cursor()
+
+    def close(self) -> None:
+        """
+        Close every cursor handed out and the managed connection.
+
+        :return: None
+        """
+        with self._lock:
+            for cursor in self._cursors:
+                cursor.close()
+            self._cursors.clear()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+SNAPSHOT_POINTER = "CURRENT"
+
+
+def read_current_snapshot(snapshot_directory: str) -> str | None:
+    """
+    Return the path of the latest database snapshot in a directory.
+    The snapshot is named by the pointer file the writer replaces atomically after
+    each snapshot.
+
+    :param snapshot_directory: directory the writer writes snapshots to
+    :return: path of the latest snapshot, or None if none has been written
+    """
+    try:
+        with open(os.path.join(snapshot_directory, SNAPSHOT_POINTER)) as pointer:
+            snapshot_name = pointer.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(snapshot_directory, snapshot_name) if snapshot_name else None
+
+
+class SnapshotConnectionManager(ConnectionManager):
+    """
+    Hand out per-thread read-only connections to the latest snapshot of a database.
+    Used by HTTP workers when a separate writer process owns the database file.
+    The snapshot pointer is re-read at most every refresh_interval seconds, and a
+    thread moves to a newer snapshot the next time it asks for a cursor.
+    Each connection is opened on its own rather than as a cursor of a shared
+    connection, so replacing one never closes a cursor another thread is using.
+    Connections to the same snapshot still share its cached database instance.
+    """
+
+    def __init__(
+        self, db_name: str, snapshot_directory: str, refresh_interval: float = 5.0
+    ) -> None:
+        """
+        :param db_name: Name of the database the snapshots are taken from
+        :param snapshot_directory: Directory the writer writes snapshots to
+        :param refresh_interval: Seconds between checks for a newer snapshot
+        """
+        super().__init__(db_name)
+        self.snapshot_directory = snapshot_directory
+        self.refresh_interval = refresh_interval
+        self._snapshot_path: str | None = None
+        self._checked_at = 0.0
+
+    def get_snapshot_path(self) -> str:
+        """
+        Return the path of the latest snapshot, re-reading the pointer if it is due.
+
+        :return: path of the latest snapshot
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._snapshot_path is None
+                or now - self._checked_at >= self.refresh_interval
+            ):
+                snapshot_path = read_current_snapshot(self.snapshot_directory)
+                if snapshot_path is None:
+                    typer.echo(
+                        f"No database snapshot found in {self.snapshot_directory}. "
+                        f"Start the writer with `python cli.py serve-writer` first."
+                    )
+                    raise typer.Exit(code=1)
+                self._snapshot_path = snapshot_path
+                self._checked_at = now
+            return self._snapshot_path
+
+    def connect(self, snapshot_path: str | None = None) -> duckdb.DuckDBPyConnection:
+        """
+        Open a new read-only connection to a snapshot.
+
+        :param snapshot_path: path of the snapshot, or None for the latest one
+        :return: duckdb.DuckDBPyConnection
+        """
+        try:
+            conn = duckdb.connect(
+                snapshot_path or self.get_snapshot_path(), read_only=True
+            )
+            DUCKDB_CONNECTION_OPENS.inc()
+            return conn
+        except Exception as error:
+            typer.echo(
+                f"Error connecting to DuckDB snapshot: {error}. Program will exit."
+            )
+            raise typer.Exit(code=1)
+
+    def cursor(self) -> duckdb.DuckDBPyConnection:
+        """
+        Return the connection owned by the calling thread, opening it on first use
+        and reopening it when a newer snapshot has been written.
+
+        :return: duckdb.DuckDBPyConnection
+        """
+        snapshot_path = self.get_snapshot_path()
+        cursor = getattr(self._local, "cursor", None)
+        with self._lock:
+            is_open = cursor is not None and cursor in self._cursors
+        if is_open and self._local.snapshot_path == snapshot_path:
+            return cursor
+
+        if is_open:
+            with self._lock:
+                self._cursors.remove(cursor)
+            cursor.close()
+        cursor = self.connect(snapshot_path)
+        self._local.cursor = cursor
+        self._local.snapshot_path = snapshot_path
+        with self._lock:
+            self._cursors.append(cursor)
+        return cursor
+
+    def open_cursor(self) -> duckdb.DuckDBPyConnection:
+        """
+        Return a new read-only connection to the latest snapshot that is not tied to
+        the calling thread. The caller is responsible for closing it.
+
+        :return: duckdb.DuckDBPyConnection
+        """
+        return self.connect()
+
+
+CONNECTION_MANAGERS: dict[str, ConnectionManager] = {}
+_CONNECTION_MANAGERS_LOCK = threading.Lock()
+
+
+def get_connection_manager(db_name: str) -> ConnectionManager:
+    """
+    Return the process-wide connection manager for a database.
+
+    :param db_name: Name of the database to return the connection manager for
+    :return: ConnectionManager
+    """
+    with _CONNECTION_MANAGERS_LOCK:
+        if db_name not in CONNECTION_MANAGERS:
+            CONNECTION_MANAGERS[db_name] = ConnectionManager(db_name)
+        return CONNECTION_MANAGERS[db_name]
+
+
+def register_connection_manager(connection_manager: ConnectionManager) -> None:
+    """
+    Use a connection manager for its database instead of the default one.
+    Must be called before any connection to the database is handed out.
+
+    :param connection_manager: the connection manager to register
+    :return: None
+    """
+    with _CONNECTION_MANAGERS_LOCK:
+        CONNECTION_MANAGERS[connection_manager.db_name] = connection_manager
+
+
+def close_connection_managers() -> None:
+    """
+    Close every connection manager and forget them.
+
+    :return: None
+    """
+    with _CONNECTION_MANAGERS_LOCK:
+        for connection_manager in CONNECTION_MANAGERS.values():
+            connection_manager.close()
+        CONNECTION_MANAGERS.clear()
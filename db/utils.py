@@ -1,15 +1,77 @@
+import os
+import glob
+import time
+import uuid
+import hashlib
+import functools
 import duckdb
 import typer
 import polars
 
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import TYPE_CHECKING, Callable, Iterator
+from db.connection import SNAPSHOT_POINTER, get_connection_manager
+from utils.metrics import DUCKDB_CONNECTION_OPENS
 from db.tables import CountryCodes, Granularity, Commodity, CountryEnergyMix
 
-TABLES: dict = {
-    "country_codes": CountryCodes.return_as_df(),
-    "granularity": Granularity.return_as_df(),
-    "commodity": Commodity.return_as_df(),
-    "country_energy_mix": CountryEnergyMix.return_as_df(),
-}
+if TYPE_CHECKING:
+    import pyarrow
+
+CONFIG_RELOAD_HOOKS: list[Callable[[duckdb.DuckDBPyConnection], None]] = []
+
+CONFIG_VERSION = 1
+CONFIG_CHECKSUM_KEY = "config_checksum"
+ARCHIVE_DIRECTORY_KEY = "prices_archive_directory"
+
+ARCHIVE_PARTITIONS = ["commodity", "country_code", "year"]
+ARCHIVE_FILES = "*/*/*/*.parquet"
+DAILY_PRICES_COLUMNS = "id, date, country_code, commodity, granularity, prices"
+LONG_EXPORT_WINDOW_DAYS = 31
+SNAPSHOT_FILES = "snapshot-*.db"
+SNAPSHOTS_KEPT = 3
+
+
+def register_config_reload_hook(
+    hook: Callable[[duckdb.DuckDBPyConnection], None],
+) -> None:
+    """
+    Register a hook to be called with the connection whenever the config tables are rewritten.
+
+    :param hook: callable taking the DuckDB connection the config was written with
+    :return: None
+    """
+    if hook not in CONFIG_RELOAD_HOOKS:
+        CONFIG_RELOAD_HOOKS.append(hook)
+
+
+@functools.lru_cache(maxsize=None)
+def get_config_tables() -> dict[str, polars.DataFrame]:
+    """
+    Return the config tables to store, keyed by table name.
+    The frames are built on first use rather than when the module is imported.
+
+    :return: dictionary of table name to Polars DataFrame
+    """
+    return {
+        "country_codes": CountryCodes.return_as_df(),
+        "granularity": Granularity.return_as_df(),
+        "commodity": Commodity.return_as_df(),
+        "country_energy_mix": CountryEnergyMix.return_as_df(),
+    }
+
+
+def get_config_checksum() -> str:
+    """
+    Return a checksum of CONFIG_VERSION and the content of every config table.
+
+    :return: hex digest of the config
+    """
+    digest = hashlib.sha256(f"version={CONFIG_VERSION}".encode())
+    for table_name, df in get_config_tables().items():
+        digest.update(table_name.encode())
+        digest.update(df.write_csv().encode())
+    return digest.hexdigest()
 
 
 def create_duckdb_db(db_name: str) -> bool | None:
@@ -21,6 +83,7 @@ def create_duckdb_db(db_name: str) -> bool | None:
     """
     try:
         conn = duckdb.connect(db_name)
+        DUCKDB_CONNECTION_OPENS.inc()
         conn.close()
         return True
     except Exception as error:
@@ -30,17 +93,13 @@ def create_duckdb_db(db_name: str) -> bool | None:
 
 def return_duckdb_conn(db_name: str) -> duckdb.DuckDBPyConnection:
     """
-    Return a DuckDB connection.
+    Return the calling thread's DuckDB cursor from the database's connection manager.
+    The cursor is reused by the thread and closed by close_connection_managers.
 
     :param db_name: Name of the database to connect to
     :return: duckdb.DuckDBPyConnection
     """
-    try:
-        conn = duckdb.connect(db_name)
-        return conn
-    except Exception as error:
-        typer.echo(f"Error connecting to DuckDB database: {error}. Program will exit.")
-        raise typer.Exit(code=1)
+    return get_connection_manager(db_name).cursor()
 
 
 def create_schemas(conn: duckdb.DuckDBPyConnection) -> None:
@@ -67,6 +126,578 @@ def create_schemas(conn: duckdb.DuckDBPyConnection) -> None:
         raise typer.Exit(code=1)
 
 
+def create_prices_tables(conn: duckdb.DuckDBPyConnection) -> None:
+    """
+    Create the prices.daily_prices table and its lookup indexes if they do not exist.
+    A unique index on (date, country_code, granularity, commodity) keys each row.
+    If an existing table holds rows duplicated on that key, the index cannot be
+    built, so the duplicates are counted and the program exits, asking for them to
+    be removed with `python cli.py deduplicate-prices`. Rows are never deleted here.
+    A second index on date serves point lookups, as DuckDB only scans an index
+    when it is filtered on a single column.
+    Row ids are drawn from prices.daily_prices_id_seq, started after the highest id.
+    The daily prices views are created, without an archive, if they do not exist,
+    and so is the prices.daily_summary table.
+
+    :param conn: DuckDB connection to use
+    :return: None
+    """
+    try:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS prices.daily_prices (
+                id BIGINT,
+                date TIMESTAMP,
+                country_code VARCHAR,
+                commodity VARCHAR,
+                granularity VARCHAR,
+                prices DOUBLE[]
+            );
+            """
+        )
+        key_index_exists = conn.execute(
+            """
+            SELECT 1 FROM duckdb_indexes()
+            WHERE schema_name = 'prices' AND index_name = 'daily_prices_key_idx'
+            """
+        ).fetchone()
+        duplicate_rows = 0
+        if not key_index_exists:
+            duplicate_rows = count_duplicate_daily_prices(conn)
+        if not key_index_exists and not duplicate_rows:
+            conn.execute(
+                """
+                CREATE UNIQUE INDEX daily_prices_key_idx
+                ON prices.daily_prices (date, country_code, granularity, commodity);
+                """
+            )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS daily_prices_date_idx
+            ON prices.daily_prices (date);
+            """
+        )
+        next_id = conn.execute(
+            "SELECT coalesce(max(id), 0) + 1 FROM prices.daily_prices"
+        ).fetchone()[0]
+        conn.execute(
+            f"""
+            CREATE SEQUENCE IF NOT EXISTS prices.daily_prices_id_seq
+            START WITH {next_id};
+            """
+        )
+        views_exist = conn.execute(
+            """
+            SELECT 1 FROM duckdb_views()
+            WHERE schema_name = 'prices' AND view_name = 'daily_prices_all'
+            """
+        ).fetchone()
+    except Exception as error:
+        typer.echo(f"Error creating prices tables: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+    if duplicate_rows:
+        typer.echo(
+            f"Error creating prices tables: prices.daily_prices holds {duplicate_rows} "
+            f"duplicate rows. Remove them with `python cli.py deduplicate-prices`. "
+            f"Program will exit."
+        )
+        raise typer.Exit(code=1)
+    if not views_exist:
+        create_daily_prices_views(conn)
+    create_daily_summary_table(conn)
+    return None
+
+
+def count_duplicate_daily_prices(conn: duckdb.DuckDBPyConnection) -> int:
+    """
+    Count the prices.daily_prices rows that repeat the key of an earlier row.
+
+    :param conn: DuckDB connection to use
+    :return: number of duplicate rows
+    """
+    try:
+        return conn.execute(
+            """
+            SELECT count(*) - count(DISTINCT (date, country_code, granularity, commodity))
+            FROM prices.daily_prices
+            """
+        ).fetchone()[0]
+    except Exception as error:
+        typer.echo(
+            f"Error counting duplicate daily prices: {error}. Program will exit."
+        )
+        raise typer.Exit(code=1)
+
+
+def delete_duplicate_daily_prices(conn: duckdb.DuckDBPyConnection) -> int:
+    """
+    Delete the prices.daily_prices rows that repeat the key of an earlier row.
+    The first stored row of each key is kept.
+
+    :param conn: DuckDB connection to use
+    :return: number of rows deleted
+    """
+    try:
+        return conn.execute(
+            """
+            DELETE FROM prices.daily_prices
+            WHERE rowid NOT IN (
+                SELECT min(rowid) FROM prices.daily_prices
+                GROUP BY date, country_code, granularity, commodity
+            );
+            """
+        ).fetchone()[0]
+    except Exception as error:
+        typer.echo(
+            f"Error deleting duplicate daily prices: {error}. Program will exit."
+        )
+        raise typer.Exit(code=1)
+
+
+def create_daily_summary_table(conn: duckdb.DuckDBPyConnection) -> None:
+    """
+    Create the prices.daily_summary table if it does not exist.
+    It holds the number of periods and the min, max, mean, peak mean and off-peak
+    mean price of every stored day, keyed like prices.daily_prices.
+
+    :param conn: DuckDB connection to use
+    :return: None
+    """
+    try:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS prices.daily_summary (
+                date TIMESTAMP,
+                country_code VARCHAR,
+                commodity VARCHAR,
+                granularity VARCHAR,
+                periods INTEGER,
+                min_price DOUBLE,
+                max_price DOUBLE,
+                mean_price DOUBLE,
+                peak_mean DOUBLE,
+                off_peak_mean DOUBLE,
+                PRIMARY KEY (date, country_code, commodity, granularity)
+            )
+            """
+        )
+        return None
+    except Exception as error:
+        typer.echo(f"Error creating daily summary table: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+
+def insert_daily_summary(
+    conn: duckdb.DuckDBPyConnection,
+    source_name: str,
+    seasons: polars.DataFrame,
+    peak_periods: polars.DataFrame,
+    layout: str = "wide",
+) -> int:
+    """
+    Summarise the stored days keyed like the rows of a relation into
+    prices.daily_summary in one bulk insert.
+    The summary is computed from the stored prices, not the relation's, so a day
+    skipped by the prices insert because it was already stored is summarised as
+    stored. Stored days are read in the date span of the relation only.
+    Days already summarised are skipped.
+
+    :param conn: DuckDB connection to use
+    :param source_name: table or registered relation with date, country_code,
+        commodity and granularity columns
+    :param seasons: DataFrame with the date and season of every date in the source
+    :param peak_periods: DataFrame with season, commodity, granularity,
+        periods_in_day, and the 1-based peak_periods and off_peak_periods indexes
+    :param layout: storage layout to read, "wide" or "long"
+    :return: number of rows inserted
+    """
+    try:
+        start_date, end_date = conn.execute(
+            f"SELECT min(date), max(date) FROM {source_name}"
+        ).fetchone()
+        if start_date is None:
+            return 0
+        where, params = _daily_prices_filters(
+            start_date, end_date, None, None, None, layout
+        )
+        return _insert_daily_summary(
+            conn,
+            f"""
+            SELECT stored.*
+            FROM ({_daily_prices_query(where, layout)}) AS stored
+            SEMI JOIN {source_name} AS source
+            USING (date, country_code, commodity, granularity)
+            """,
+            params,
+            seasons,
+            peak_periods,
+        )
+    except Exception as error:
+        typer.echo(f"Error inserting daily summary: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+
+def _insert_daily_summary(
+    conn: duckdb.DuckDBPyConnection,
+    days_query: str,
+    params: dict,
+    seasons: polars.DataFrame,
+    peak_periods: polars.DataFrame,
+) -> int:
+    """
+    Summarise the days selected by a query into prices.daily_summary.
+    Peak and off-peak means pick periods from each prices list by the day's season
+    and number of periods, and are null when peak_periods has no matching row.
+
+    :param conn: DuckDB connection to use
+    :param days_query: query with date, country_code, commodity, granularity and
+        prices columns
+    :param params: the parameters of the query
+    :param seasons: DataFrame with the date and season of every selected date
+    :param peak_periods: DataFrame with season, commodity, granularity,
+        periods_in_day, and the 1-based peak_periods and off_peak_periods indexes
+    :return: number of rows inserted
+    """
+    try:
+        conn.register("summary_seasons", seasons)
+        conn.register("summary_peak_periods", peak_periods)
+        return conn.execute(
+            f"""
+            INSERT INTO prices.daily_summary
+            SELECT
+                days.date,
+                days.country_code,
+                days.commodity,
+                days.granularity,
+                len(days.prices),
+                list_min(days.prices),
+                list_max(days.prices),
+                list_avg(days.prices),
+                list_avg(list_select(days.prices, peak.peak_periods)),
+                list_avg(list_select(days.prices, peak.off_peak_periods))
+            FROM ({days_query}) AS days
+            LEFT JOIN summary_seasons AS seasons ON seasons.date = days.date
+            LEFT JOIN summary_peak_periods AS peak
+                ON peak.season = seasons.season
+                AND peak.commodity = days.commodity
+                AND peak.granularity = days.granularity
+                AND peak.periods_in_day = len(days.prices)
+            ON CONFLICT DO NOTHING
+            """,
+            params,
+        ).fetchone()[0]
+    finally:
+        conn.unregister("summary_seasons")
+        conn.unregister("summary_peak_periods")
+
+
+def rebuild_daily_summary(
+    conn: duckdb.DuckDBPyConnection,
+    seasons: polars.DataFrame,
+    peak_periods: polars.DataFrame,
+    layout: str = "wide",
+) -> int:
+    """
+    Replace prices.daily_summary with a summary of every stored day in one transaction.
+    With the wide layout, archived days are summarised too.
+
+    :param conn: DuckDB connection to use
+    :param seasons: DataFrame with the date and season of every stored date
+    :param peak_periods: DataFrame with season, commodity, granularity,
+        periods_in_day, and the 1-based peak_periods and off_peak_periods indexes
+    :param layout: storage layout to read, "wide" or "long"
+    :return: number of days summarised
+    """
+    try:
+        conn.execute("BEGIN TRANSACTION")
+        conn.execute("DELETE FROM prices.daily_summary")
+        rows = _insert_daily_summary(
+            conn, _daily_prices_query("", layout), {}, seasons, peak_periods
+        )
+        conn.execute("COMMIT")
+        return rows
+    except Exception as error:
+        conn.execute("ROLLBACK")
+        typer.echo(f"Error rebuilding daily summary: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+
+def check_daily_summary_missing(
+    conn: duckdb.DuckDBPyConnection, layout: str = "wide"
+) -> bool:
+    """
+    Check if prices.daily_summary is empty while daily prices are stored, as in a
+    database written before the summary table existed.
+
+    :param conn: DuckDB connection to use
+    :param layout: storage layout to read, "wide" or "long"
+    :return: True if the summary needs to be rebuilt
+    """
+    table = (
+        "prices.daily_prices_long" if layout == "long" else "prices.daily_prices_all"
+    )
+    try:
+        return conn.execute(
+            f"""
+            SELECT NOT EXISTS (SELECT 1 FROM prices.daily_summary)
+                AND EXISTS (SELECT 1 FROM {table})
+            """
+        ).fetchone()[0]
+    except Exception as error:
+        typer.echo(f"Error checking daily summary: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+
+def select_daily_prices_date_span(
+    conn: duckdb.DuckDBPyConnection, layout: str = "wide"
+) -> tuple[datetime | None, datetime | None]:
+    """
+    Return the first and last date of the stored daily prices.
+    With the wide layout, archived days are included.
+
+    :param conn: DuckDB connection to use
+    :param layout: storage layout to read, "wide" or "long"
+    :return: tuple of the first and last date, both None if nothing is stored
+    """
+    table = (
+        "prices.daily_prices_long" if layout == "long" else "prices.daily_prices_all"
+    )
+    try:
+        return conn.execute(f"SELECT min(date), max(date) FROM {table}").fetchone()
+    except Exception as error:
+        typer.echo(f"Error selecting daily prices dates: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+
+def create_daily_prices_views(conn: duckdb.DuckDBPyConnection) -> None:
+    """
+    Create the views that read archived daily prices alongside prices.daily_prices.
+    prices.daily_prices_archive reads the hive-partitioned Parquet files in the
+    archive directory stored by archive_daily_prices, or is empty if nothing has
+    been archived. prices.daily_prices_all is the union of the table and the archive.
+    Both views add a year column, so filters on it skip unneeded partitions.
+    The program exits if the stored archive directory is missing, as the archived
+    rows would otherwise silently disappear from every lookup.
+
+    :param conn: DuckDB connection to use
+    :return: None
+    """
+    archive_directory = select_archive_directory(conn)
+    if archive_directory is not None and not os.path.isdir(archive_directory):
+        typer.echo(
+            f"Error creating daily prices views: the archive directory "
+            f"{archive_directory} is missing. Program will exit."
+        )
+        raise typer.Exit(code=1)
+    archive_path = (
+        os.path.join(archive_directory, ARCHIVE_FILES)
+        if archive_directory is not None
+        else None
+    )
+    if archive_path is not None and glob.glob(archive_path):
+        archive_query = f"""
+            SELECT {DAILY_PRICES_COLUMNS}, year
+            FROM read_parquet(
+                '{archive_path.replace("'", "''")}',
+                hive_partitioning = true,
+                hive_types = {{
+                    'commodity': VARCHAR, 'country_code': VARCHAR, 'year': BIGINT
+                }}
+            )
+        """
+    else:
+        archive_query = f"""
+            SELECT {DAILY_PRICES_COLUMNS}, year(date) AS year
+            FROM prices.daily_prices
+            WHERE false
+        """
+
+    try:
+        conn.execute(
+            f"CREATE OR REPLACE VIEW prices.daily_prices_archive AS {archive_query}"
+        )
+        conn.execute(
+            f"""
+            CREATE OR REPLACE VIEW prices.daily_prices_all AS
+            SELECT {DAILY_PRICES_COLUMNS}, year(date) AS year
+            FROM prices.daily_prices
+            UNION ALL
+            SELECT {DAILY_PRICES_COLUMNS}, year
+            FROM prices.daily_prices_archive
+            """
+        )
+        return None
+    except Exception as error:
+        typer.echo(f"Error creating daily prices views: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+
+def select_archive_directory(conn: duckdb.DuckDBPyConnection) -> str | None:
+    """
+    Return the archive directory stored by archive_daily_prices.
+
+    :param conn: DuckDB connection to use
+    :return: the absolute archive directory, or None if nothing has been archived
+    """
+    try:
+        metadata_exists = conn.execute(
+            """
+            SELECT 1 FROM duckdb_tables()
+            WHERE schema_name = 'config' AND table_name = 'config_metadata'
+            """
+        ).fetchone()
+        if not metadata_exists:
+            return None
+        stored = conn.execute(
+            "SELECT value FROM config.config_metadata WHERE key = $key",
+            {"key": ARCHIVE_DIRECTORY_KEY},
+        ).fetchone()
+        return stored[0] if stored is not None else None
+    except Exception as error:
+        typer.echo(f"Error selecting archive directory: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+
+def archive_daily_prices(
+    conn: duckdb.DuckDBPyConnection,
+    before_date: datetime,
+    archive_directory: str,
+    batch_rows: int = 100000,
+) -> int:
+    """
+    Move every prices.daily_prices row dated before a date into Parquet files.
+    Rows are streamed into a hive-partitioned dataset (commodity/country_code/year)
+    and deleted from the table in the same transaction, then the database is
+    checkpointed and the views are recreated over the archive.
+    The archive directory is stored in config.config_metadata in that transaction,
+    so later starts read the archive from where it was written. A database archives
+    to one directory, so archiving to another one exits the program.
+    Written files are removed again if the rows cannot be deleted.
+
+    :param conn: DuckDB connection to use
+    :param before_date: rows dated before this date are archived
+    :param archive_directory: directory to write the Parquet files to
+    :param batch_rows: the number of rows streamed per record batch
+    :return: number of rows archived
+    """
+    import pyarrow.dataset
+
+    archive_directory = os.path.abspath(archive_directory)
+    stored_directory = select_archive_directory(conn)
+    if stored_directory is not None and stored_directory != archive_directory:
+        typer.echo(
+            f"Error archiving daily prices: they are archived in {stored_directory}, "
+            f"not {archive_directory}. Program will exit."
+        )
+        raise typer.Exit(code=1)
+
+    create_config_metadata_table(conn)
+    basename = uuid.uuid4().hex
+    try:
+        os.makedirs(archive_directory, exist_ok=True)
+        conn.execute("BEGIN TRANSACTION")
+        rows = conn.execute(
+            "SELECT count(*) FROM prices.daily_prices WHERE date < $before_date",
+            {"before_date": before_date},
+        ).fetchone()[0]
+        if rows:
+            reader = conn.execute(
+                f"""
+                SELECT {DAILY_PRICES_COLUMNS}, year(date) AS year
+                FROM prices.daily_prices
+                WHERE date < $before_date
+                """,
+                {"before_date": before_date},
+            ).fetch_record_batch(batch_rows)
+            pyarrow.dataset.write_dataset(
+                reader,
+                archive_directory,
+                format="parquet",
+                partitioning=ARCHIVE_PARTITIONS,
+                partitioning_flavor="hive",
+                basename_template=f"{basename}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+            conn.execute(
+                "DELETE FROM prices.daily_prices WHERE date < $before_date",
+                {"before_date": before_date},
+            )
+        conn.execute(
+            "INSERT OR REPLACE INTO config.config_metadata VALUES ($key, $value, $now)",
+            {
+                "key": ARCHIVE_DIRECTORY_KEY,
+                "value": archive_directory,
+                "now": datetime.now(),
+            },
+        )
+        conn.execute("COMMIT")
+    except Exception as error:
+        try:
+            conn.execute("ROLLBACK")
+        except duckdb.Error:
+            pass
+        for path in glob.glob(
+            os.path.join(archive_directory, "*", "*", "*", f"{basename}-*.parquet")
+        ):
+            os.remove(path)
+        typer.echo(f"Error archiving daily prices: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+    if rows:
+        conn.execute("CHECKPOINT")
+    create_daily_prices_views(conn)
+    return rows
+
+
+def write_database_snapshot(
+    conn: duckdb.DuckDBPyConnection,
+    snapshot_directory: str,
+    snapshots_kept: int = SNAPSHOTS_KEPT,
+) -> str:
+    """
+    Copy the database behind a connection into a new snapshot file.
+    Tables, views and sequences are copied with COPY FROM DATABASE, then the
+    snapshot pointer is replaced atomically so readers never open a partial copy.
+    Only the newest snapshots_kept snapshots are kept. Readers that still have an
+    older snapshot open keep reading it until they move to the new one.
+    Every snapshot is a full copy, so its cost grows with the database and the
+    caller decides how often one is worth writing.
+
+    :param conn: DuckDB connection to the database to snapshot
+    :param snapshot_directory: directory to write the snapshot to
+    :param snapshots_kept: number of snapshots to keep
+    :return: path of the snapshot
+    """
+    os.makedirs(snapshot_directory, exist_ok=True)
+    snapshot_name = f"snapshot-{time.time_ns()}.db"
+    snapshot_path = os.path.join(snapshot_directory, snapshot_name)
+    try:
+        database_name = conn.execute("SELECT current_database()").fetchone()[0]
+        escaped_path = snapshot_path.replace("'", "''")
+        conn.execute(f"ATTACH '{escaped_path}' AS database_snapshot")
+        try:
+            conn.execute(f'COPY FROM DATABASE "{database_name}" TO database_snapshot')
+        finally:
+            conn.execute("DETACH database_snapshot")
+    except Exception as error:
+        if os.path.exists(snapshot_path):
+            os.remove(snapshot_path)
+        typer.echo(f"Error writing database snapshot: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+    pointer_path = os.path.join(snapshot_directory, SNAPSHOT_POINTER)
+    with open(f"{pointer_path}.tmp", "w") as pointer:
+        pointer.write(snapshot_name)
+    os.replace(f"{pointer_path}.tmp", pointer_path)
+
+    for old_path in sorted(glob.glob(os.path.join(snapshot_directory, SNAPSHOT_FILES)))[
+        :-snapshots_kept
+    ]:
+        os.remove(old_path)
+    return snapshot_path
+
+
 def check_table_exists(
     table_schema: str, table_name: str, conn: duckdb.DuckDBPyConnection
 ) -> bool:
@@ -83,7 +714,7 @@ def check_table_exists(
         if conn.sql(
             f"SELECT 1 FROM information_schema.tables "
             f"WHERE table_schema = '{table_schema}' and table_name = '{table_name}'"
-        )
+        ).fetchone()
         else False
     )
 
@@ -130,22 +761,83 @@ def create_or_append_table_from_df(
         raise typer.Exit(code=1)
 
 
-def create_config_tables(conn: duckdb.DuckDBPyConnection) -> None:
+def create_config_metadata_table(conn: duckdb.DuckDBPyConnection) -> None:
     """
-    Create the base config tables in the DuckDB database.
-    Uses the TABLES dictionary to create the tables.
+    Create the config.config_metadata table if it does not exist.
+    It holds one value per key, such as the checksum of the stored config.
 
     :param conn: DuckDB connection to use
     :return: None
     """
     try:
-        for table_name, df in TABLES.items():
-            create_or_append_table_from_df(df, "create", "config", table_name, conn)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS config.config_metadata (
+                key VARCHAR PRIMARY KEY,
+                value VARCHAR,
+                updated_at TIMESTAMP
+            )
+            """
+        )
         return None
     except Exception as error:
+        typer.echo(f"Error creating config metadata table: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+
+def create_config_tables(conn: duckdb.DuckDBPyConnection, force: bool = False) -> bool:
+    """
+    Create the base config tables in the DuckDB database.
+    Uses the get_config_tables dictionary to create the tables.
+    The tables are left untouched when the checksum stored in config.config_metadata
+    matches the config and every table exists, so restarts do not rewrite them.
+    Otherwise the tables and checksum are rewritten in one transaction, and every
+    hook in CONFIG_RELOAD_HOOKS is called once the tables have been rewritten.
+
+    :param conn: DuckDB connection to use
+    :param force: rewrite the tables even if the stored checksum matches
+    :return: True if the tables were rewritten, False if they were up to date
+    """
+    create_config_metadata_table(conn)
+    checksum = get_config_checksum()
+    if not force:
+        stored = conn.execute(
+            "SELECT value FROM config.config_metadata WHERE key = $key",
+            {"key": CONFIG_CHECKSUM_KEY},
+        ).fetchone()
+        if stored is not None and stored[0] == checksum:
+            existing = conn.execute(
+                """
+                SELECT count(*) FROM duckdb_tables()
+                WHERE schema_name = 'config' AND list_contains($tables, table_name)
+                """,
+                {"tables": list(get_config_tables())},
+            ).fetchone()[0]
+            if existing == len(get_config_tables()):
+                return False
+
+    try:
+        conn.execute("BEGIN TRANSACTION")
+        for table_name, df in get_config_tables().items():
+            create_or_append_table_from_df(df, "create", "config", table_name, conn)
+        conn.execute(
+            "INSERT OR REPLACE INTO config.config_metadata VALUES ($key, $value, $now)",
+            {"key": CONFIG_CHECKSUM_KEY, "value": checksum, "now": datetime.now()},
+        )
+        conn.execute("COMMIT")
+    except Exception as error:
+        conn.execute("ROLLBACK")
         typer.echo(f"Error creating config tables: {error}. Program will exit.")
         raise typer.Exit(code=1)
 
+    try:
+        for hook in CONFIG_RELOAD_HOOKS:
+            hook(conn)
+        return True
+    except Exception as error:
+        typer.echo(f"Error reloading config: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
 
 def select_duckdb_table(
     conn: duckdb.DuckDBPyConnection, schema_name: str, table_name: str
@@ -166,3 +858,645 @@ def select_duckdb_table(
     except Exception as error:
         typer.echo(f"Error selecting table: {error}. Program will exit.")
         raise typer.Exit(code=1)
+
+
+def select_daily_price(
+    conn: duckdb.DuckDBPyConnection,
+    for_date: datetime,
+    country_code: str,
+    granularity: str,
+    commodity: str,
+) -> polars.DataFrame:
+    """
+    Select a single daily price entry from prices.daily_prices.
+    The date filter is applied alone in a materialized CTE so DuckDB answers it from
+    daily_prices_date_idx; the remaining filters run over that day's rows only.
+    Archived entries are only read when the table holds no matching entry.
+
+    :param conn: DuckDB connection to use
+    :param for_date: the date to select
+    :param country_code: the country code to select
+    :param granularity: the granularity to select
+    :param commodity: the commodity to select
+    :return: Polars DataFrame
+    """
+    try:
+        df = conn.execute(
+            """
+            WITH day_prices AS MATERIALIZED (
+                SELECT * FROM prices.daily_prices WHERE date = $for_date
+            )
+            SELECT * FROM day_prices
+            WHERE country_code = $country_code
+            AND granularity = $granularity
+            AND commodity = $commodity
+            """,
+            {
+                "for_date": for_date,
+                "country_code": country_code,
+                "granularity": granularity,
+                "commodity": commodity,
+            },
+        ).pl()
+        if df.is_empty():
+            df = conn.execute(
+                f"""
+                SELECT {DAILY_PRICES_COLUMNS} FROM prices.daily_prices_archive
+                WHERE year = year($for_date)
+                AND date = $for_date
+                AND country_code = $country_code
+                AND granularity = $granularity
+                AND commodity = $commodity
+                """,
+                {
+                    "for_date": for_date,
+                    "country_code": country_code,
+                    "granularity": granularity,
+                    "commodity": commodity,
+                },
+            ).pl()
+        return df
+    except Exception as error:
+        typer.echo(f"Error selecting daily price: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+
+def select_daily_prices_range(
+    conn: duckdb.DuckDBPyConnection,
+    start_date: datetime,
+    end_date: datetime,
+    country_code: str,
+    granularity: str,
+    commodity: str,
+) -> polars.DataFrame:
+    """
+    Select every daily price entry between two dates (inclusive) from prices.daily_prices
+    and its archive. Only the archive partitions of the requested years are read.
+
+    :param conn: DuckDB connection to use
+    :param start_date: the first date to select
+    :param end_date: the last date to select
+    :param country_code: the country code to select
+    :param granularity: the granularity to select
+    :param commodity: the commodity to select
+    :return: Polars DataFrame
+    """
+    try:
+        df = conn.execute(
+            f"""
+            SELECT {DAILY_PRICES_COLUMNS} FROM prices.daily_prices_all
+            WHERE year BETWEEN year($start_date) AND year($end_date)
+            AND date BETWEEN $start_date AND $end_date
+            AND country_code = $country_code
+            AND granularity = $granularity
+            AND commodity = $commodity
+            ORDER BY date
+            """,
+            {
+                "start_date": start_date,
+                "end_date": end_date,
+                "country_code": country_code,
+                "granularity": granularity,
+                "commodity": commodity,
+            },
+        ).pl()
+        return df
+    except Exception as error:
+        typer.echo(f"Error selecting daily prices: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+
+def create_prices_long_table(conn: duckdb.DuckDBPyConnection) -> bool:
+    """
+    Create the prices.daily_prices_long table if it does not exist.
+    The table holds one row per delivery period, numbered from 1, and is written in
+    (date, commodity) order so DuckDB zone maps can skip row groups on those columns.
+
+    :param conn: DuckDB connection to use
+    :return: True if the table was created, False if it already existed
+    """
+    try:
+        if check_table_exists("prices", "daily_prices_long", conn):
+            return False
+        conn.execute(
+            """
+            CREATE TABLE prices.daily_prices_long (
+                date TIMESTAMP,
+                period SMALLINT,
+                country_code VARCHAR,
+                commodity VARCHAR,
+                granularity VARCHAR,
+                price DOUBLE
+            );
+            """
+        )
+        return True
+    except Exception as error:
+        typer.echo(f"Error creating long prices table: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+
+def insert_daily_prices(conn: duckdb.DuckDBPyConnection, source_name: str) -> int:
+    """
+    Insert the rows of a relation into prices.daily_prices in one bulk insert.
+    Ids are drawn from prices.daily_prices_id_seq.
+    Rows whose key already exists in the table are skipped.
+
+    :param conn: DuckDB connection to use
+    :param source_name: table or registered relation with date, country_code,
+        commodity, granularity and prices columns
+    :return: number of rows inserted
+    """
+    return conn.execute(
+        f"""
+        INSERT INTO prices.daily_prices
+        SELECT
+            nextval('prices.daily_prices_id_seq'),
+            date,
+            country_code,
+            commodity,
+            granularity,
+            prices
+        FROM {source_name}
+        ON CONFLICT DO NOTHING
+        """
+    ).fetchone()[0]
+
+
+def insert_daily_prices_long(conn: duckdb.DuckDBPyConnection, source_name: str) -> int:
+    """
+    Unnest the prices lists of a relation into prices.daily_prices_long.
+    Rows are sorted by date and commodity before they are written.
+    Days already stored for the same country, commodity and granularity are skipped
+    with an anti join against the stored days in the date span of the relation, so
+    zone maps limit the scan of the long table to the row groups of that span.
+    Inserted days are counted by their first period in that span before and after
+    the insert.
+
+    :param conn: DuckDB connection to use
+    :param source_name: table or registered relation with date, country_code,
+        commodity, granularity and prices columns
+    :return: number of days inserted
+    """
+    start_date, end_date = conn.execute(
+        f"SELECT min(date), max(date) FROM {source_name}"
+    ).fetchone()
+    if start_date is None:
+        return 0
+    params = {"start_date": start_date, "end_date": end_date}
+    count_days_query = """
+        SELECT count(*) FROM prices.daily_prices_long
+        WHERE period = 1 AND date BETWEEN $start_date AND $end_date
+    """
+    days_before = conn.execute(count_days_query, params).fetchone()[0]
+    conn.execute(
+        f"""
+        INSERT INTO prices.daily_prices_long
+        SELECT date, period, country_code, commodity, granularity, price
+        FROM (
+            SELECT
+                date,
+                country_code,
+                commodity,
+                granularity,
+                unnest(prices) AS price,
+                unnest(generate_series(1, len(prices))) AS period
+            FROM {source_name} AS source
+            ANTI JOIN (
+                SELECT DISTINCT date, country_code, commodity, granularity
+                FROM prices.daily_prices_long
+                WHERE date BETWEEN $start_date AND $end_date
+            ) AS stored
+            USING (date, country_code, commodity, granularity)
+        )
+        ORDER BY date, commodity, country_code, granularity, period
+        """,
+        params,
+    )
+    return conn.execute(count_days_query, params).fetchone()[0] - days_before
+
+
+def migrate_daily_prices_to_long(conn: duckdb.DuckDBPyConnection) -> int:
+    """
+    Copy every row of prices.daily_prices into prices.daily_prices_long.
+    The long table is created if it does not exist. Days already in the long table
+    are skipped, so the migration is run on every start with the long layout and
+    picks up rows stored while the API ran with the wide layout.
+
+    :param conn: DuckDB connection to use
+    :return: number of period rows written
+    """
+    try:
+        create_prices_long_table(conn)
+        rows_before = conn.execute(
+            "SELECT count(*) FROM prices.daily_prices_long"
+        ).fetchone()[0]
+        insert_daily_prices_long(conn, "prices.daily_prices")
+        rows_after = conn.execute(
+            "SELECT count(*) FROM prices.daily_prices_long"
+        ).fetchone()[0]
+        return rows_after - rows_before
+    except Exception as error:
+        typer.echo(f"Error migrating daily prices: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+
+def select_daily_prices_long(
+    conn: duckdb.DuckDBPyConnection,
+    start_date: datetime,
+    end_date: datetime,
+    country_code: str,
+    granularity: str,
+    commodity: str,
+) -> polars.DataFrame:
+    """
+    Select every day between two dates (inclusive) from prices.daily_prices_long.
+    The periods of each day are reassembled into a prices list in period order.
+
+    :param conn: DuckDB connection to use
+    :param start_date: the first date to select
+    :param end_date: the last date to select
+    :param country_code: the country code to select
+    :param granularity: the granularity to select
+    :param commodity: the commodity to select
+    :return: Polars DataFrame with the columns of prices.daily_prices, except id
+    """
+    try:
+        df = conn.execute(
+            """
+            SELECT
+                date,
+                country_code,
+                commodity,
+                granularity,
+                list(price ORDER BY period) AS prices
+            FROM prices.daily_prices_long
+            WHERE date BETWEEN $start_date AND $end_date
+            AND commodity = $commodity
+            AND country_code = $country_code
+            AND granularity = $granularity
+            GROUP BY date, country_code, commodity, granularity
+            ORDER BY date
+            """,
+            {
+                "start_date": start_date,
+                "end_date": end_date,
+                "country_code": country_code,
+                "granularity": granularity,
+                "commodity": commodity,
+            },
+        ).pl()
+        return df
+    except Exception as error:
+        typer.echo(f"Error selecting long daily prices: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+
+def _daily_prices_filters(
+    start_date: datetime | None,
+    end_date: datetime | None,
+    country_codes: list[str] | None,
+    commodities: list[str] | None,
+    granularities: list[str] | None,
+    layout: str,
+) -> tuple[str, dict]:
+    """
+    Build the WHERE clause and parameters that filter stored daily prices.
+    With the wide layout, the year column is filtered too so archived partitions
+    outside the date range are skipped.
+
+    :param start_date: the first date to match, or None for no lower bound
+    :param end_date: the last date to match, or None for no upper bound
+    :param country_codes: the country codes to match, or None for every country
+    :param commodities: the commodities to match, or None for every commodity
+    :param granularities: the granularities to match, or None for every granularity
+    :param layout: storage layout to read, "wide" or "long", or "summary" to
+        filter prices.daily_summary
+    :return: the WHERE clause, empty if nothing is filtered, and its parameters
+    """
+    filters = []
+    params = {}
+    if start_date is not None:
+        filters.append("date >= $start_date")
+        params["start_date"] = start_date
+    if end_date is not None:
+        filters.append("date <= $end_date")
+        params["end_date"] = end_date
+    if layout == "wide":
+        if start_date is not None:
+            filters.append("year >= year($start_date)")
+        if end_date is not None:
+            filters.append("year <= year($end_date)")
+    if country_codes:
+        filters.append("list_contains($country_codes, country_code)")
+        params["country_codes"] = list(country_codes)
+    if commodities:
+        filters.append("list_contains($commodities, commodity)")
+        params["commodities"] = list(commodities)
+    if granularities:
+        filters.append("list_contains($granularities, granularity)")
+        params["granularities"] = list(granularities)
+    where = f"WHERE {' AND '.join(filters)}" if filters else ""
+    return where, params
+
+
+def _daily_prices_query(where: str, layout: str) -> str:
+    """
+    Build a query selecting one row per stored day with its prices list.
+    With the long layout, periods are reassembled into a prices list per day.
+
+    :param where: the WHERE clause to filter rows by, from _daily_prices_filters
+    :param layout: storage layout to read, "wide" or "long"
+    :return: query with date, country_code, commodity, granularity and prices columns
+    """
+    if layout == "long":
+        return f"""
+            SELECT
+                date,
+                country_code,
+                commodity,
+                granularity,
+                list(price ORDER BY period) AS prices
+            FROM prices.daily_prices_long
+            {where}
+            GROUP BY date, country_code, commodity, granularity
+        """
+    return f"""
+        SELECT date, country_code, commodity, granularity, prices
+        FROM prices.daily_prices_all
+        {where}
+    """
+
+
+def select_daily_prices_cross_section(
+    conn: duckdb.DuckDBPyConnection,
+    start_date: datetime,
+    end_date: datetime,
+    granularity: str,
+    layout: str = "wide",
+) -> polars.DataFrame:
+    """
+    Select the stored daily prices of every country and commodity between two dates
+    (inclusive) for one granularity, in one query.
+
+    :param conn: DuckDB connection to use
+    :param start_date: the first date to select
+    :param end_date: the last date to select
+    :param granularity: the granularity to select
+    :param layout: storage layout to read, "wide" or "long"
+    :return: polars.DataFrame with date, country_code, commodity, granularity and
+        prices columns
+    """
+    where, params = _daily_prices_filters(
+        start_date, end_date, None, None, [granularity], layout
+    )
+    try:
+        return conn.execute(_daily_prices_query(where, layout), params).pl()
+    except Exception as error:
+        typer.echo(f"Error selecting daily prices: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+
+def stream_daily_prices(
+    conn: duckdb.DuckDBPyConnection,
+    start_date: datetime | None = None,
+    end_date: datetime | None = None,
+    country_codes: list[str] | None = None,
+    commodities: list[str] | None = None,
+    layout: str = "wide",
+    batch_rows: int = 10000,
+) -> "pyarrow.RecordBatchReader":
+    """
+    Return a reader that streams stored daily prices as Arrow record batches.
+    Rows are fetched from DuckDB one batch at a time rather than materialized.
+    With the wide layout, archived rows are included. With the long layout, periods
+    are reassembled into a prices list per day one window of
+    LONG_EXPORT_WINDOW_DAYS days at a time, so only one window is aggregated at once.
+
+    :param conn: DuckDB connection to use, which must not run other queries until
+        the reader is exhausted
+    :param start_date: the first date to export, or None for no lower bound
+    :param end_date: the last date to export, or None for no upper bound
+    :param country_codes: the country codes to export, or None for every country
+    :param commodities: the commodities to export, or None for every commodity
+    :param layout: storage layout to read, "wide" or "long"
+    :param batch_rows: the number of rows in each record batch
+    :return: pyarrow.RecordBatchReader with date, country_code, commodity,
+        granularity and prices columns
+    """
+    where, params = _daily_prices_filters(
+        start_date, end_date, country_codes, commodities, None, layout
+    )
+    try:
+        if layout == "long":
+            return _stream_daily_prices_long(
+                conn, where, params, country_codes, commodities, batch_rows
+            )
+        return conn.execute(
+            _daily_prices_query(where, layout), params
+        ).fetch_record_batch(batch_rows)
+    except Exception as error:
+        typer.echo(f"Error streaming daily prices: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+
+def _stream_daily_prices_long(
+    conn: duckdb.DuckDBPyConnection,
+    where: str,
+    params: dict,
+    country_codes: list[str] | None,
+    commodities: list[str] | None,
+    batch_rows: int,
+) -> "pyarrow.RecordBatchReader":
+    """
+    Stream long layout prices reassembled into a prices list per day.
+    The filtered date span is split into windows of LONG_EXPORT_WINDOW_DAYS days,
+    each grouped by its own query once the previous window has been read.
+
+    :param conn: DuckDB connection to use
+    :param where: the WHERE clause of the export, from _daily_prices_filters
+    :param params: the parameters of the WHERE clause
+    :param country_codes: the country codes to export, or None for every country
+    :param commodities: the commodities to export, or None for every commodity
+    :param batch_rows: the number of rows in each record batch
+    :return: pyarrow.RecordBatchReader with date, country_code, commodity,
+        granularity and prices columns
+    """
+    import pyarrow
+
+    first_date, last_date = conn.execute(
+        f"SELECT min(date), max(date) FROM prices.daily_prices_long {where}", params
+    ).fetchone()
+
+    def window_readers() -> Iterator["pyarrow.RecordBatchReader"]:
+        window_start = first_date
+        while window_start <= last_date:
+            window_end = window_start + timedelta(days=LONG_EXPORT_WINDOW_DAYS)
+            window_where, window_params = _daily_prices_filters(
+                window_start,
+                min(window_end - timedelta(microseconds=1), last_date),
+                country_codes,
+                commodities,
+                None,
+                "long",
+            )
+            yield conn.execute(
+                _daily_prices_query(window_where, "long"), window_params
+            ).fetch_record_batch(batch_rows)
+            window_start = window_end
+
+    readers = window_readers() if first_date is not None else iter(())
+    first_reader = next(readers, None)
+    if first_reader is None:
+        return conn.execute(
+            _daily_prices_query("WHERE false", "long")
+        ).fetch_record_batch(batch_rows)
+    return pyarrow.RecordBatchReader.from_batches(
+        first_reader.schema, chain(first_reader, chain.from_iterable(readers))
+    )
+
+
+def create_backfill_checkpoints_table(conn: duckdb.DuckDBPyConnection) -> None:
+    """
+    Create the prices.backfill_checkpoints table if it does not exist.
+    Each row records a chunk of days of one country, commodity and granularity whose
+    missing prices have been backfilled and committed.
+
+    :param conn: DuckDB connection to use
+    :return: None
+    """
+    try:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS prices.backfill_checkpoints (
+                country_code VARCHAR,
+                commodity VARCHAR,
+                granularity VARCHAR,
+                start_date TIMESTAMP,
+                end_date TIMESTAMP,
+                rows INTEGER,
+                completed_at TIMESTAMP,
+                PRIMARY KEY (country_code, commodity, granularity, start_date, end_date)
+            );
+            """
+        )
+        return None
+    except Exception as error:
+        typer.echo(
+            f"Error creating backfill checkpoints table: {error}. Program will exit."
+        )
+        raise typer.Exit(code=1)
+
+
+def select_stored_daily_price_keys(
+    conn: duckdb.DuckDBPyConnection,
+    start_date: datetime,
+    end_date: datetime,
+    layout: str = "wide",
+) -> polars.DataFrame:
+    """
+    Select the key of every stored daily price entry between two dates (inclusive).
+    With the wide layout, archived entries are included.
+
+    :param conn: DuckDB connection to use
+    :param start_date: the first date to select
+    :param end_date: the last date to select
+    :param layout: storage layout to read, "wide" or "long"
+    :return: Polars DataFrame with date, country_code, commodity and granularity columns
+    """
+    if layout == "long":
+        query = """
+            SELECT DISTINCT date, country_code, commodity, granularity
+            FROM prices.daily_prices_long
+            WHERE date BETWEEN $start_date AND $end_date
+        """
+    else:
+        query = """
+            SELECT date, country_code, commodity, granularity
+            FROM prices.daily_prices_all
+            WHERE year BETWEEN year($start_date) AND year($end_date)
+            AND date BETWEEN $start_date AND $end_date
+        """
+    try:
+        return conn.execute(
+            query,
+            {"start_date": start_date, "end_date": end_date},
+        ).pl()
+    except Exception as error:
+        typer.echo(f"Error selecting stored daily prices: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+
+
+def select_daily_price_aggregates(
+    conn: duckdb.DuckDBPyConnection,
+    start_date: datetime,
+    end_date: datetime,
+    frequency: str,
+    seasons: polars.DataFrame,
+    peak_periods: polars.DataFrame,
+    country_codes: list[str] | None = None,
+    commodities: list[str] | None = None,
+    granularities: list[str] | None = None,
+) -> polars.DataFrame:
+    """
+    Return base, peak and off-peak average prices of stored days from
+    prices.daily_summary, so no prices lists are read.
+    Days are grouped by country code, commodity, granularity and the day, week
+    (starting Monday) or month they fall in. Each average is taken over every
+    delivery period of the group, so each day's mean is weighted by its number of
+    periods, and its peak and off-peak means by the number of peak and off-peak
+    periods picked from peak_periods by its season and number of periods.
+    Days without a matching row are left out.
+
+    :param conn: DuckDB connection to use
+    :param start_date: the first date to aggregate
+    :param end_date: the last date to aggregate
+    :param frequency: the date part to group days by, "day", "week" or "month"
+    :param seasons: DataFrame with the date and season of every day in the range
+    :param peak_periods: DataFrame with season, commodity, granularity,
+        periods_in_day, and the 1-based peak_periods and off_peak_periods indexes
+    :param country_codes: the country codes to aggregate, or None for every country
+    :param commodities: the commodities to aggregate, or None for every commodity
+    :param granularities: the granularities to aggregate, or None for both
+    :return: polars.DataFrame with period_start, country_code, commodity,
+        granularity, days, base, peak and off_peak columns
+    """
+    where, params = _daily_prices_filters(
+        start_date, end_date, country_codes, commodities, granularities, "summary"
+    )
+    try:
+        conn.register("aggregate_seasons", seasons)
+        conn.register("aggregate_peak_periods", peak_periods)
+        return conn.execute(
+            f"""
+            WITH days AS (SELECT * FROM prices.daily_summary {where})
+            SELECT
+                CAST(date_trunc($frequency, days.date) AS TIMESTAMP) AS period_start,
+                days.country_code,
+                days.commodity,
+                days.granularity,
+                count(*) AS days,
+                sum(days.mean_price * days.periods) / sum(days.periods) AS base,
+                sum(days.peak_mean * len(peak.peak_periods))
+                    / sum(len(peak.peak_periods)) AS peak,
+                sum(days.off_peak_mean * len(peak.off_peak_periods))
+                    / sum(len(peak.off_peak_periods)) AS off_peak
+            FROM days
+            JOIN aggregate_seasons AS seasons ON seasons.date = days.date
+            JOIN aggregate_peak_periods AS peak
+                ON peak.season = seasons.season
+                AND peak.commodity = days.commodity
+                AND peak.granularity = days.granularity
+                AND peak.periods_in_day = days.periods
+            GROUP BY ALL
+            ORDER BY
+                days.country_code, days.commodity, days.granularity, period_start
+            """,
+            {**params, "frequency": frequency},
+        ).pl()
+    except Exception as error:
+        typer.echo(f"Error aggregating daily prices: {error}. Program will exit.")
+        raise typer.Exit(code=1)
+    finally:
+        conn.unregister("aggregate_seasons")
+        conn.unregister("aggregate_peak_periods")
@@ -0,0 +1,220 @@
+import threading
+import typer
+import polars
+
+from enum import Enum
+from datetime import datetime
+from db.utils import (
+    return_duckdb_conn,
+    insert_daily_prices,
+    insert_daily_prices_long,
+    insert_daily_summary,
+)
+from modelling.shapes import get_peak_periods_df
+from modelling.trading_calendar import get_seasons_df
+from utils.metrics import MODEL_PRICES_STAGE_SECONDS, DAILY_PRICES_ROWS_WRITTEN
+
+DAILY_PRICES_KEY = ("date", "country_code", "granularity", "commodity")
+
+
+def _key_value(value):
+    """
+    Return the plain value of an Enum member, or the value unchanged.
+
+    :param value: value to normalise
+    :return: the normalised value
+    """
+    return value.value if isinstance(value, Enum) else value
+
+
+class DailyPricesWriter:
+    """
+    Write-behind buffer for prices.daily_prices.
+    Queued rows are flushed by a background thread in one bulk Arrow append, either
+    once max_batch_size rows are pending or every flush_interval seconds.
+    Pending rows stay readable through get_pending until they are committed.
+    With the long layout, rows are written to prices.daily_prices_long instead.
+    """
+
+    def __init__(
+        self,
+        db_name: str,
+        max_batch_size: int = 500,
+        flush_interval: float = 1.0,
+        layout: str = "wide",
+    ) -> None:
+        """
+        :param db_name: Name of the database to write to
+        :param max_batch_size: Number of pending rows that triggers a flush
+        :param flush_interval: Seconds between time-triggered flushes
+        :param layout: Storage layout to write, "wide" or "long"
+        """
+        self.db_name = db_name
+        self.layout = layout
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self._pending: dict[tuple, dict] = {}
+        self._flushing: dict[tuple, dict] = {}
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """
+        Start the background flush thread.
+
+        :return: None
+        """
+        if self._thread is not None:
+            return None
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="daily-prices-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background flush thread and flush every pending row.
+
+        :return: None
+        """
+        self._stopped.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def put(self, df: polars.DataFrame) -> list[list[float]]:
+        """
+        Queue daily price rows to be written.
+        Rows need the date, country_code, commodity, granularity and prices columns.
+        A row whose key is already pending or being flushed is dropped, as the table
+        keeps the first row of a key, so concurrent requests that modelled the same
+        day all respond with the prices that will be stored.
+
+        :param df: DataFrame of daily price rows
+        :return: the prices queued for the key of every row, in row order
+        """
+        queued_prices = []
+        with self._condition:
+            for row in df.iter_rows(named=True):
+                row = {column: _key_value(value) for column, value in row.items()}
+                key = tuple(row[column] for column in DAILY_PRICES_KEY)
+                queued_row = self._flushing.get(key) or self._pending.setdefault(
+                    key, row
+                )
+                queued_prices.append(queued_row["prices"])
+            if len(self._pending) >= self.max_batch_size:
+                self._condition.notify_all()
+        return queued_prices
+
+    def get_pending(
+        self, for_date: datetime, country_code: str, granularity: str, commodity: str
+    ) -> list[float] | None:
+        """
+        Return the prices of a row that is queued but not yet committed.
+
+        :param for_date: the date of the row
+        :param country_code: the country code of the row
+        :param granularity: the granularity of the row
+        :param commodity: the commodity of the row
+        :return: the pending prices, or None if no row is pending
+        """
+        key = tuple(
+            _key_value(value)
+            for value in (for_date, country_code, granularity, commodity)
+        )
+        with self._condition:
+            row = self._pending.get(key) or self._flushing.get(key)
+        return row["prices"] if row is not None else None
+
+    def flush(self) -> int:
+        """
+        Write every pending row to prices.daily_prices in one bulk insert.
+        Ids are drawn from prices.daily_prices_id_seq.
+        Rows whose key already exists in the table are skipped.
+        With the long layout, rows are unnested into prices.daily_prices_long.
+        Each row is summarised into prices.daily_summary in the same transaction.
+        The write is timed as the persistence stage and the rows inserted counted.
+        If the write fails, the rows are queued again for the next flush.
+
+        :return: number of rows flushed, or 0 if the write failed
+        """
+        with self._flush_lock:
+            with self._condition:
+                self._flushing, self._pending = self._pending, {}
+            if not self._flushing:
+                return 0
+
+            flushed = len(self._flushing)
+            try:
+                with MODEL_PRICES_STAGE_SECONDS.time(stage="persistence"):
+                    rows_written = self._write(list(self._flushing.values()))
+                DAILY_PRICES_ROWS_WRITTEN.inc(rows_written)
+            except Exception as error:
+                typer.echo(
+                    f"Error flushing {flushed} daily prices: {error}. "
+                    f"They stay pending and are retried on the next flush."
+                )
+                with self._condition:
+                    self._pending = {**self._pending, **self._flushing}
+                flushed = 0
+            finally:
+                with self._condition:
+                    self._flushing = {}
+            return flushed
+
+    def _write(self, rows: list[dict]) -> int:
+        """
+        Insert rows into the table of the writer's layout in one bulk insert.
+        Their prices.daily_summary rows are inserted in the same transaction.
+
+        :param rows: the daily price rows to insert
+        :return: number of daily price rows inserted
+        """
+        pending_daily_prices = polars.DataFrame(rows).to_arrow()
+        seasons = get_seasons_df(sorted({row["date"] for row in rows}))
+        conn = return_duckdb_conn(self.db_name)
+        conn.register("pending_daily_prices", pending_daily_prices)
+        try:
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                if self.layout == "long":
+                    rows_written = insert_daily_prices_long(
+                        conn, "pending_daily_prices"
+                    )
+                else:
+                    rows_written = insert_daily_prices(conn, "pending_daily_prices")
+                insert_daily_summary(
+                    conn,
+                    "pending_daily_prices",
+                    seasons,
+                    get_peak_periods_df(),
+                    self.layout,
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return rows_written
+        finally:
+            conn.unregister("pending_daily_prices")
+
+    def _run(self) -> None:
+        """
+        Flush pending rows until the writer is stopped.
+
+        :return: None
+        """
+        while not self._stopped.is_set():
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._stopped.is_set()
+                    or len(self._pending) >= self.max_batch_size,
+                    timeout=self.flush_interval,
+                )
+            self.flush()
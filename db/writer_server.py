@@ -0,0 +1,297 @@
+import io
+import os
+import time
+import threading
+import polars
+import typer
+
+from multiprocessing.connection import Client, Connection, Listener
+from datetime import datetime
+from db.writer import DailyPricesWriter
+from db.utils import return_duckdb_conn, write_database_snapshot
+
+WRITER_ACK = b"ok"
+WRITER_NACK = b"error"
+SNAPSHOT_BUSY_FRACTION = 0.1
+
+
+def encode_daily_prices_rows(df: polars.DataFrame) -> bytes:
+    """
+    Encode daily price rows as an Arrow IPC stream to send to the writer process.
+
+    :param df: DataFrame of daily price rows
+    :return: the encoded rows
+    """
+    buffer = io.BytesIO()
+    df.write_ipc_stream(buffer)
+    return buffer.getvalue()
+
+
+def decode_daily_prices_rows(payload: bytes) -> polars.DataFrame:
+    """
+    Decode daily price rows encoded by encode_daily_prices_rows.
+
+    :param payload: the encoded rows
+    :return: DataFrame of daily price rows
+    """
+    return polars.read_ipc_stream(io.BytesIO(payload))
+
+
+class DailyPricesWriterServer:
+    """
+    Writer process for deployments with several HTTP workers.
+    Workers send the rows they model over a Unix socket, and the server queues
+    them in a DailyPricesWriter, the only connection that writes to the database.
+    One thread flushes the writer every flush_interval seconds and, when rows were
+    flushed, copies the database into a new snapshot at most every
+    snapshot_interval seconds for the workers to read.
+    Each snapshot copies the whole database, so the wait between snapshots also
+    grows with the time the last one took, keeping snapshots to at most
+    SNAPSHOT_BUSY_FRACTION of the writer's time as the database grows.
+    """
+
+    def __init__(
+        self,
+        writer: DailyPricesWriter,
+        socket_path: str,
+        snapshot_directory: str,
+        snapshot_interval: float = 5.0,
+    ) -> None:
+        """
+        :param writer: the writer to queue received rows in, not started
+        :param socket_path: path of the Unix socket to listen on
+        :param snapshot_directory: directory to write snapshots to
+        :param snapshot_interval: minimum seconds between snapshots
+        """
+        self.writer = writer
+        self.socket_path = socket_path
+        self.snapshot_directory = snapshot_directory
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_wait = snapshot_interval
+        self.ready = threading.Event()
+        self._stopped = threading.Event()
+        self._flush_thread: threading.Thread | None = None
+
+    def serve(self) -> None:
+        """
+        Write a first snapshot, then accept workers until the server is stopped.
+        Pending rows are flushed and snapshotted before returning.
+
+        :return: None
+        """
+        self._write_snapshot()
+        listener = self._listen()
+        self._flush_thread = threading.Thread(
+            target=self._run, name="daily-prices-writer-server", daemon=True
+        )
+        self._flush_thread.start()
+        self.ready.set()
+        try:
+            while not self._stopped.is_set():
+                connection = listener.accept()
+                threading.Thread(
+                    target=self._handle, args=(connection,), daemon=True
+                ).start()
+        finally:
+            self._stopped.set()
+            listener.close()
+            self._flush_thread.join()
+            if self.writer.flush():
+                self._write_snapshot()
+
+    def stop(self) -> None:
+        """
+        Stop a server running in another thread.
+
+        :return: None
+        """
+        self._stopped.set()
+        try:
+            Client(self.socket_path, family="AF_UNIX").close()
+        except OSError:
+            pass
+
+    def _listen(self) -> Listener:
+        """
+        Listen on the socket, replacing one left behind by a previous run.
+        The socket is only accessible to the user running the writer.
+
+        :return: the listener
+        """
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        umask = os.umask(0o177)
+        try:
+            return Listener(self.socket_path, family="AF_UNIX")
+        finally:
+            os.umask(umask)
+
+    def _handle(self, connection: Connection) -> None:
+        """
+        Queue the rows sent by one worker until it disconnects.
+        Each message is acknowledged once its rows are queued. Rows that cannot be
+        queued, or would never be flushed because the flush thread has stopped,
+        are refused instead.
+
+        :param connection: the worker's connection
+        :return: None
+        """
+        with connection:
+            while True:
+                try:
+                    payload = connection.recv_bytes()
+                except (EOFError, OSError):
+                    return None
+                if self._flush_thread is None or not self._flush_thread.is_alive():
+                    typer.echo("Refusing daily prices: the flush thread has stopped.")
+                    connection.send_bytes(WRITER_NACK)
+                    continue
+                try:
+                    self.writer.put(decode_daily_prices_rows(payload))
+                except Exception as error:
+                    typer.echo(f"Error queueing daily prices from a worker: {error}.")
+                    connection.send_bytes(WRITER_NACK)
+                    continue
+                connection.send_bytes(WRITER_ACK)
+
+    def _write_snapshot(self) -> None:
+        """
+        Write a snapshot of the database and set the wait before the next one from
+        how long it took.
+
+        :return: None
+        """
+        started_at = time.monotonic()
+        write_database_snapshot(
+            return_duckdb_conn(self.writer.db_name), self.snapshot_directory
+        )
+        self.snapshot_wait = max(
+            self.snapshot_interval,
+            (time.monotonic() - started_at) / SNAPSHOT_BUSY_FRACTION,
+        )
+
+    def _run(self) -> None:
+        """
+        Flush the writer and write snapshots until the server is stopped.
+        An error is logged and the flush or snapshot retried on the next tick, so one
+        failure never stops the loop.
+
+        :return: None
+        """
+        snapshot_due = False
+        snapshot_at = time.monotonic()
+        while not self._stopped.wait(self.writer.flush_interval):
+            try:
+                if self.writer.flush():
+                    snapshot_due = True
+                if (
+                    snapshot_due
+                    and time.monotonic() - snapshot_at >= self.snapshot_wait
+                ):
+                    self._write_snapshot()
+                    snapshot_due = False
+                    snapshot_at = time.monotonic()
+            except Exception as error:
+                typer.echo(
+                    f"Error flushing or snapshotting daily prices: {error}. "
+                    f"Retrying on the next flush."
+                )
+
+
+class RemoteDailyPricesWriter:
+    """
+    Send daily price rows to the writer process instead of writing them.
+    Used by HTTP workers that read from snapshots. Rows become readable once the
+    writer has flushed them and written the next snapshot, and until then they are
+    modelled again by seeded generation, so get_pending never finds a row.
+    """
+
+    def __init__(self, socket_path: str) -> None:
+        """
+        :param socket_path: path of the writer's Unix socket
+        """
+        self.socket_path = socket_path
+        self._connection: Connection | None = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Connect to the writer process.
+
+        :return: None
+        """
+        with self._lock:
+            self._connect()
+
+    def stop(self) -> None:
+        """
+        Disconnect from the writer process.
+
+        :return: None
+        """
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def put(self, df: polars.DataFrame) -> list[list[float]]:
+        """
+        Send daily price rows to the writer process and wait until they are queued.
+        The connection is reopened once if the writer has restarted.
+        Workers draw seeded prices, so a row the writer drops for an earlier one with
+        the same key holds the same prices, and the rows' own prices are returned.
+
+        :param df: DataFrame of daily price rows
+        :return: the prices of every row, in row order
+        """
+        payload = encode_daily_prices_rows(df)
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._connection is None:
+                        self._connect()
+                    self._connection.send_bytes(payload)
+                    if self._connection.recv_bytes() != WRITER_ACK:
+                        typer.echo(
+                            f"The writer refused {df.height} daily prices. "
+                            f"They are modelled again when next requested."
+                        )
+                    break
+                except (EOFError, OSError, typer.Exit) as error:
+                    if self._connection is not None:
+                        self._connection.close()
+                        self._connection = None
+                    if attempt:
+                        typer.echo(
+                            f"Error sending {df.height} daily prices to the writer: {error}."
+                        )
+        return df["prices"].to_list()
+
+    def get_pending(
+        self, for_date: datetime, country_code: str, granularity: str, commodity: str
+    ) -> list[float] | None:
+        """
+        Return None, as rows sent to the writer process are not readable here.
+
+        :param for_date: the date of the row
+        :param country_code: the country code of the row
+        :param granularity: the granularity of the row
+        :param commodity: the commodity of the row
+        :return: None
+        """
+        return None
+
+    def _connect(self) -> None:
+        """
+        Open the connection to the writer process.
+
+        :return: None
+        """
+        try:
+            self._connection = Client(self.socket_path, family="AF_UNIX")
+        except OSError as error:
+            typer.echo(
+                f"Error connecting to the writer at {self.socket_path}: {error}. "
+                f"Start it with `python cli.py serve-writer`."
+            )
+            raise typer.Exit(code=1)
@@ -1,37 +1,170 @@
+import io
+import asyncio
 import polars
 
-from utils.logger import get_logger
-from fastapi import FastAPI, HTTPException
-from models.requests import GeneratePricesRequest
-from models.responses import GeneratePricesResponse
-from modelling.prices import model_daily_prices, build_daily_prices_df
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Annotated, Callable, Iterator, TypeVar
+
+from utils.logger import get_logger, sample_payload_log
+from utils.singleflight import SingleFlight
+from utils.settings import get_settings
+from utils.profiling import (
+    ProfilingMiddleware,
+    profile_in_thread,
+    tag_request_profile,
+)
+from utils.serialization import (
+    PRICES_MEDIA_TYPES,
+    negotiate_media_type,
+    render_daily_prices,
+    render_price_scenarios,
+    json_response,
+)
+from utils.metrics import (
+    REGISTRY,
+    PROMETHEUS_MEDIA_TYPE,
+    MODEL_PRICES_STAGE_SECONDS,
+    DAILY_PRICE_LOOKUPS,
+    RESPONSE_CACHE_LOOKUPS,
+)
+from utils.response_cache import ResponseCache
+from fastapi import FastAPI, HTTPException, Query, Header, Response
+from fastapi.responses import StreamingResponse
+from models.requests import (
+    GeneratePricesRequest,
+    GeneratePricesRangeRequest,
+    GeneratePriceScenariosRequest,
+    GenerateCrossSectionRequest,
+    ExportPricesRequest,
+    ExportFormat,
+    AggregatePricesRequest,
+    AggregateFrequency,
+)
+from models.responses import (
+    GeneratePricesResponse,
+    GeneratePricesRangeResponse,
+    GeneratePriceScenariosResponse,
+    GenerateCrossSectionResponse,
+    DailyPriceScenarios,
+    AggregatePricesResponse,
+    PriceAggregate,
+)
+from modelling.trading_calendar import get_trading_calendar, get_seasons_df
+from modelling.shapes import get_peak_periods_df
+from modelling.prices import (
+    model_daily_prices,
+    model_prices_for_dates,
+    model_cross_section_prices,
+    model_price_scenarios,
+    get_dates_in_range,
+    build_daily_prices_df,
+    build_daily_prices_range_df,
+)
 from datetime import datetime
+from db.tables import CountryCodes, Commodity
+from db.connection import (
+    SnapshotConnectionManager,
+    close_connection_managers,
+    get_connection_manager,
+    register_connection_manager,
+)
+from db.writer import DailyPricesWriter
+from db.writer_server import RemoteDailyPricesWriter
 from db.utils import (
     create_duckdb_db,
     return_duckdb_conn,
     create_schemas,
     create_config_tables,
-    select_duckdb_table,
-    create_or_append_table_from_df,
+    create_prices_tables,
+    create_daily_prices_views,
+    migrate_daily_prices_to_long,
+    check_daily_summary_missing,
+    select_daily_prices_date_span,
+    rebuild_daily_summary,
+    select_daily_price,
+    select_daily_prices_range,
+    select_daily_prices_long,
+    select_daily_prices_cross_section,
+    stream_daily_prices,
+    select_daily_price_aggregates,
 )
 
+if TYPE_CHECKING:
+    import pyarrow
+
+T = TypeVar("T")
+DB_NAME = get_settings().db_name
+DB_EXECUTOR_WORKERS = 8
+EXPORT_BATCH_ROWS = 10000
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.ARROW: "application/vnd.apache.arrow.stream",
+}
+AGGREGATE_DATE_PARTS = {
+    AggregateFrequency.DAILY: "day",
+    AggregateFrequency.WEEKLY: "week",
+    AggregateFrequency.MONTHLY: "month",
+}
+
 
-def initialise_database(fast_api_app, db_name="price_data.db") -> None:  # noqa: F841
+def initialise_database(fast_api_app, db_name=DB_NAME) -> None:  # noqa: F841
     """
     Initialise the database and set the FastAPI title.
+    Config tables are only rewritten when their stored checksum is out of date.
+    Points the daily prices views at the archive directory stored in the database.
+    With the long storage layout, migrates rows of prices.daily_prices missing from
+    the long table on every start. The daily summary is rebuilt if it is empty while
+    prices are stored. Builds the trading calendar and starts the daily prices writer.
+    When WRITER_SOCKET is set, the writer process owns the database, so the worker
+    only reads its snapshots and sends modelled prices to the writer.
+    The writer is flushed on shutdown before connections opened through
+    return_duckdb_conn are closed, and enqueued log records are written.
 
     :param db_name: the name of the database to initialise.
     :param fast_api_app: The FastAPI instance
     :return: None
     """
     try:
-        create_duckdb_db(db_name)
-        conn = return_duckdb_conn(db_name)
-        create_schemas(conn)
-        create_config_tables(conn)
+        settings = get_settings()
+        if settings.writer_socket:
+            register_connection_manager(
+                SnapshotConnectionManager(
+                    db_name, settings.snapshot_directory, settings.snapshot_interval
+                )
+            )
+            return_duckdb_conn(db_name)
+        else:
+            create_duckdb_db(db_name)
+            conn = return_duckdb_conn(db_name)
+            create_schemas(conn)
+            if create_config_tables(conn):
+                logger.info("Config tables written")
+            create_prices_tables(conn)
+            create_daily_prices_views(conn)
+            if settings.prices_storage_layout == "long":
+                rows = migrate_daily_prices_to_long(conn)
+                if rows:
+                    logger.info(
+                        f"Migrated {rows} daily price periods to the long layout"
+                    )
+            if check_daily_summary_missing(conn, settings.prices_storage_layout):
+                start_date, end_date = select_daily_prices_date_span(
+                    conn, settings.prices_storage_layout
+                )
+                rows = rebuild_daily_summary(
+                    conn,
+                    get_seasons_df(get_dates_in_range(start_date, end_date)),
+                    get_peak_periods_df(),
+                    settings.prices_storage_layout,
+                )
+                logger.info(f"Daily summary rebuilt - {rows} days summarised")
+        get_trading_calendar("Europe/London")
+        daily_prices_writer.start()
         logger.info(f"Database initialised - {db_name}")
         yield
-        conn.close()
+        daily_prices_writer.stop()
+        close_connection_managers()
+        logger.complete()
     except Exception as error:
         logger.error(f"Error initialising database - {error}")
         raise HTTPException(status_code=500, detail=str(error))
@@ -49,45 +182,83 @@ def get_historic_daily_price(
     :param commodity: the commodity to check for
     :return: bool
     """
-    conn = return_duckdb_conn("price_data.db")
-    df = select_duckdb_table(conn, "prices", "daily_prices")
-    df = df.filter(
-        date=for_date,
-        country_code=country_code,
-        granularity=granularity,
-        commodity=commodity,
-    )
+    conn = return_duckdb_conn(DB_NAME)
+    if get_settings().prices_storage_layout == "long":
+        df = select_daily_prices_long(
+            conn, for_date, for_date, country_code, granularity, commodity
+        )
+    else:
+        df = select_daily_price(conn, for_date, country_code, granularity, commodity)
     return df if not df.is_empty() else polars.DataFrame()
 
 
-logger = get_logger("daily-prices")
-app = FastAPI(title="Price Data API", lifespan=initialise_database)
+def get_historic_daily_prices_range(
+    start_date: datetime,
+    end_date: datetime,
+    country_code: str,
+    granularity: str,
+    commodity: str,
+) -> polars.DataFrame:
+    """
+    Return every stored daily price entry between two dates (inclusive) in one lookup.
 
+    :param start_date: the first date to check for
+    :param end_date: the last date to check for
+    :param country_code: the country code to check for
+    :param granularity: the granularity to check for
+    :param commodity: the commodity to check for
+    :return: polars.DataFrame
+    """
+    conn = return_duckdb_conn(DB_NAME)
+    if get_settings().prices_storage_layout == "long":
+        df = select_daily_prices_long(
+            conn, start_date, end_date, country_code, granularity, commodity
+        )
+    else:
+        df = select_daily_prices_range(
+            conn, start_date, end_date, country_code, granularity, commodity
+        )
+    return df
 
-@app.post("/model-prices")
-@logger.catch
-def model_prices(request: GeneratePricesRequest) -> GeneratePricesResponse:
+
+def get_or_model_daily_price(
+    request: GeneratePricesRequest,
+) -> tuple[GeneratePricesResponse, bool]:
     """
-    Return hourly prices for the specified date and country code.
+    Return the stored prices for a request, or model and queue them if none exist.
     Maps the country_code param to COUNTRY_CODE_PRICES dictionary to return a base price.
     Uses the base price as a starting point to generate hourly prices for the specified date.
     Uses the seasonality factor and peak hours to adjust the prices accordingly.
+    The prices are final when they were read from the database, or drawn by seeded
+    generation, which always models the same prices. Pending or freshly modelled
+    prices may still lose to a row stored first.
 
     :param request: request containing the date, country code, granularity, and commodity
-    :return: response containing the date, country code, granularity, commodity, and prices
+    :return: response containing the date, country code, granularity, commodity, and
+        prices, and whether the prices are final
     """
-    logger.info(f"request: {request}")
-
-    historic_price = get_historic_daily_price(
-        request.for_date,
-        request.country_code,
-        request.granularity,
-        request.commodity,
-    )
+    stored = False
+    with MODEL_PRICES_STAGE_SECONDS.time(stage="historic_lookup"):
+        prices = daily_prices_writer.get_pending(
+            request.for_date,
+            request.country_code,
+            request.granularity,
+            request.commodity,
+        )
+        if prices is None:
+            historic_price = get_historic_daily_price(
+                request.for_date,
+                request.country_code,
+                request.granularity,
+                request.commodity,
+            )
+            if not historic_price.is_empty():
+                prices = historic_price.select("prices").to_series().to_list()[0]
+                stored = True
 
-    if not historic_price.is_empty():
+    if prices is not None:
         logger.info("historic_prices exist: returning historic prices")
-        prices = historic_price.select("prices").to_series().to_list()[0]
+        DAILY_PRICE_LOOKUPS.inc(result="hit")
         response = GeneratePricesResponse(
             commodity=request.commodity,
             date=request.for_date,
@@ -97,13 +268,15 @@ def model_prices(request: GeneratePricesRequest) -> GeneratePricesResponse:
         )
     else:
         logger.info("historic_price does not exist - modelling price")
-        prices = model_daily_prices(
-            request.for_date,
-            request.country_code,
-            request.granularity,
-            request.commodity,
-            "price_data",
-        )
+        DAILY_PRICE_LOOKUPS.inc(result="miss")
+        with MODEL_PRICES_STAGE_SECONDS.time(stage="model_daily_prices"):
+            prices = model_daily_prices(
+                request.for_date,
+                request.country_code,
+                request.granularity,
+                request.commodity,
+                DB_NAME,
+            )
         response = GeneratePricesResponse(
             commodity=request.commodity,
             date=request.for_date,
@@ -111,12 +284,580 @@ def model_prices(request: GeneratePricesRequest) -> GeneratePricesResponse:
             granularity=request.granularity,
             prices=prices.tolist(),
         )
-        daily_price = build_daily_prices_df(response)
-        logger.info("saving daily prices to database")
-        conn = return_duckdb_conn("price_data.db")
-        create_or_append_table_from_df(
-            daily_price, "append", "prices", "daily_prices", conn
+        if get_settings().persist_modelled_prices:
+            logger.info("queueing daily prices to be saved to database")
+            response.prices = daily_prices_writer.put(build_daily_prices_df(response))[
+                0
+            ]
+
+    return response, stored or get_settings().price_generation == "seeded"
+
+
+def get_or_model_daily_prices_range(
+    request: GeneratePricesRangeRequest,
+) -> GeneratePricesRangeResponse:
+    """
+    Return prices for every day between the start and end date of the request.
+    Looks up every stored day in one query and models the missing days in a single
+    vectorized pass, queueing them to be saved to the database together.
+
+    :param request: request containing the date range, country code, granularity, and commodity
+    :return: response containing the daily prices for every day in the range
+    """
+    for_dates = get_dates_in_range(request.start_date, request.end_date)
+    historic_prices = get_historic_daily_prices_range(
+        for_dates[0],
+        for_dates[-1],
+        request.country_code,
+        request.granularity,
+        request.commodity,
+    )
+    prices_by_date = (
+        dict(
+            zip(historic_prices["date"].to_list(), historic_prices["prices"].to_list())
+        )
+        if not historic_prices.is_empty()
+        else {}
+    )
+    for for_date in for_dates:
+        pending_prices = daily_prices_writer.get_pending(
+            for_date, request.country_code, request.granularity, request.commodity
+        )
+        if pending_prices is not None:
+            prices_by_date[for_date] = pending_prices
+    missing_dates = [
+        for_date for for_date in for_dates if for_date not in prices_by_date
+    ]
+    logger.info(
+        f"{len(prices_by_date)} historic days exist - modelling {len(missing_dates)} days"
+    )
+    DAILY_PRICE_LOOKUPS.inc(len(prices_by_date), result="hit")
+    DAILY_PRICE_LOOKUPS.inc(len(missing_dates), result="miss")
+
+    modelled_prices = model_prices_for_dates(
+        missing_dates,
+        request.country_code,
+        request.granularity,
+        request.commodity,
+        DB_NAME,
+    )
+    modelled_responses = [
+        GeneratePricesResponse(
+            commodity=request.commodity,
+            date=for_date,
+            country_code=request.country_code,
+            granularity=request.granularity,
+            prices=prices.tolist(),
+        )
+        for for_date, prices in zip(missing_dates, modelled_prices)
+    ]
+    if modelled_responses and get_settings().persist_modelled_prices:
+        logger.info("queueing daily prices to be saved to database")
+        queued_prices = daily_prices_writer.put(
+            build_daily_prices_range_df(modelled_responses)
         )
+        for modelled_response, prices in zip(modelled_responses, queued_prices):
+            modelled_response.prices = prices
+    for modelled_response in modelled_responses:
+        prices_by_date[modelled_response.date] = modelled_response.prices
+
+    response = GeneratePricesRangeResponse(
+        commodity=request.commodity,
+        start_date=request.start_date,
+        end_date=request.end_date,
+        country_code=request.country_code,
+        granularity=request.granularity,
+        daily_prices=[
+            GeneratePricesResponse(
+                commodity=request.commodity,
+                date=for_date,
+                country_code=request.country_code,
+                granularity=request.granularity,
+                prices=prices_by_date[for_date],
+            )
+            for for_date in for_dates
+        ],
+    )
+
+    return response
+
+
+def get_or_model_cross_section(
+    request: GenerateCrossSectionRequest,
+) -> GenerateCrossSectionResponse:
+    """
+    Return prices of every country and commodity for every day of the request.
+    Looks up every stored combination in one query and models the missing ones
+    in a single vectorized pass over the days that have any, queueing them to be
+    saved to the database together.
+
+    :param request: request containing the date range and granularity
+    :return: response containing the daily prices of every day, country and
+        commodity, ordered by date, country code and commodity
+    """
+    for_dates = get_dates_in_range(request.start_date, request.end_date)
+    granularity = request.granularity.value
+    with MODEL_PRICES_STAGE_SECONDS.time(stage="historic_lookup"):
+        historic_prices = select_daily_prices_cross_section(
+            return_duckdb_conn(DB_NAME),
+            for_dates[0],
+            for_dates[-1],
+            granularity,
+            get_settings().prices_storage_layout,
+        )
+    prices_by_key = {
+        (row["date"], row["country_code"], row["commodity"]): row["prices"]
+        for row in historic_prices.iter_rows(named=True)
+    }
+    keys = [
+        (for_date, country_code.value, commodity.value)
+        for for_date in for_dates
+        for country_code in CountryCodes
+        for commodity in Commodity
+    ]
+    for key in keys:
+        if key not in prices_by_key:
+            pending_prices = daily_prices_writer.get_pending(
+                key[0], key[1], granularity, key[2]
+            )
+            if pending_prices is not None:
+                prices_by_key[key] = pending_prices
+    missing_keys = [key for key in keys if key not in prices_by_key]
+    logger.info(
+        f"{len(keys) - len(missing_keys)} historic entries exist - "
+        f"modelling {len(missing_keys)} entries"
+    )
+    DAILY_PRICE_LOOKUPS.inc(len(keys) - len(missing_keys), result="hit")
+    DAILY_PRICE_LOOKUPS.inc(len(missing_keys), result="miss")
+
+    modelled_responses = []
+    if missing_keys:
+        missing_dates = sorted({key[0] for key in missing_keys})
+        with MODEL_PRICES_STAGE_SECONDS.time(stage="model_daily_prices"):
+            country_codes, commodities, prices, periods_in_dates = (
+                model_cross_section_prices(missing_dates, granularity, DB_NAME)
+            )
+        date_index = {for_date: index for index, for_date in enumerate(missing_dates)}
+        country_index = {code: index for index, code in enumerate(country_codes)}
+        commodity_index = {
+            commodity: index for index, commodity in enumerate(commodities)
+        }
+        for for_date, country_code, commodity in missing_keys:
+            day = date_index[for_date]
+            day_prices = prices[
+                country_index[country_code],
+                commodity_index[commodity],
+                day,
+                : periods_in_dates[day],
+            ].tolist()
+            prices_by_key[(for_date, country_code, commodity)] = day_prices
+            modelled_responses.append(
+                GeneratePricesResponse(
+                    commodity=commodity,
+                    date=for_date,
+                    country_code=country_code,
+                    granularity=granularity,
+                    prices=day_prices,
+                )
+            )
+
+    if modelled_responses and get_settings().persist_modelled_prices:
+        logger.info("queueing daily prices to be saved to database")
+        queued_prices = daily_prices_writer.put(
+            build_daily_prices_range_df(modelled_responses)
+        )
+        for key, prices in zip(missing_keys, queued_prices):
+            prices_by_key[key] = prices
+
+    return GenerateCrossSectionResponse(
+        start_date=request.start_date,
+        end_date=request.end_date,
+        granularity=request.granularity,
+        daily_prices=[
+            GeneratePricesResponse(
+                commodity=commodity,
+                date=for_date,
+                country_code=country_code,
+                granularity=granularity,
+                prices=prices_by_key[(for_date, country_code, commodity)],
+            )
+            for for_date, country_code, commodity in keys
+        ],
+    )
+
+
+def simulate_price_scenarios(
+    request: GeneratePriceScenariosRequest,
+) -> GeneratePriceScenariosResponse:
+    """
+    Simulate price paths for every day between the start and end date of the request.
+    Scenarios are not saved to the database.
+
+    :param request: request containing the date range, country code, granularity,
+        commodity and number of paths
+    :return: response containing the P5/P50/P95 prices, and optionally the paths, per day
+    """
+    for_dates = get_dates_in_range(request.start_date, request.end_date)
+    scenarios, percentiles = model_price_scenarios(
+        for_dates,
+        request.country_code,
+        request.granularity,
+        request.commodity,
+        DB_NAME,
+        request.paths,
+    )
+    return GeneratePriceScenariosResponse(
+        commodity=request.commodity,
+        start_date=request.start_date,
+        end_date=request.end_date,
+        country_code=request.country_code,
+        granularity=request.granularity,
+        paths=request.paths,
+        daily_scenarios=[
+            DailyPriceScenarios(
+                date=for_date,
+                p5=day_percentiles[0].tolist(),
+                p50=day_percentiles[1].tolist(),
+                p95=day_percentiles[2].tolist(),
+                paths=day_scenarios.tolist() if request.include_paths else None,
+            )
+            for for_date, day_scenarios, day_percentiles in zip(
+                for_dates, scenarios, percentiles
+            )
+        ],
+    )
+
+
+def encode_daily_prices_export(
+    reader: "pyarrow.RecordBatchReader", export_format: ExportFormat
+) -> Iterator[bytes]:
+    """
+    Encode a stream of daily price record batches one batch at a time.
+    NDJSON writes one JSON object per stored day with ISO 8601 dates.
+    Arrow writes an Arrow IPC stream, whose schema message comes first.
+
+    :param reader: reader of daily price record batches
+    :param export_format: the format to encode the batches in
+    :return: iterator of encoded chunks
+    """
+    if export_format == ExportFormat.ARROW:
+        import pyarrow.ipc
 
-    logger.info(f"response: {response}")
-    return response.model_dump()
+        sink = io.BytesIO()
+        with pyarrow.ipc.new_stream(sink, reader.schema) as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+                yield sink.getvalue()
+                sink.seek(0)
+                sink.truncate()
+        yield sink.getvalue()
+    else:
+        for batch in reader:
+            yield (
+                polars.from_arrow(batch)
+                .with_columns(polars.col("date").dt.strftime("%Y-%m-%dT%H:%M:%S"))
+                .write_ndjson()
+                .encode()
+            )
+
+
+def export_daily_prices(request: ExportPricesRequest) -> Iterator[bytes]:
+    """
+    Stream every stored daily price entry matching the export filters.
+    The export runs on its own cursor, closed once the stream ends or is abandoned,
+    so only one record batch is held in memory at a time.
+
+    :param request: request containing the date range, country codes, commodities
+        and export format
+    :return: iterator of encoded chunks
+    """
+    cursor = get_connection_manager(DB_NAME).open_cursor()
+    try:
+        reader = stream_daily_prices(
+            cursor,
+            request.start_date,
+            request.end_date,
+            [country_code.value for country_code in request.country_codes or []],
+            [commodity.value for commodity in request.commodities or []],
+            get_settings().prices_storage_layout,
+            EXPORT_BATCH_ROWS,
+        )
+        yield from encode_daily_prices_export(reader, request.format)
+    finally:
+        cursor.close()
+
+
+def aggregate_daily_prices(request: AggregatePricesRequest) -> AggregatePricesResponse:
+    """
+    Return base, peak and off-peak averages of stored prices for a date range.
+    Seasons come from the trading calendar and peak periods from get_peak_periods_df,
+    the definitions used to model prices, and the averages are computed in DuckDB
+    from prices.daily_summary.
+
+    :param request: request containing the date range, frequency and filters
+    :return: response containing one aggregate per period, country, commodity and
+        granularity with stored prices
+    """
+    for_dates = get_dates_in_range(request.start_date, request.end_date)
+    df = select_daily_price_aggregates(
+        return_duckdb_conn(DB_NAME),
+        for_dates[0],
+        for_dates[-1],
+        AGGREGATE_DATE_PARTS[request.frequency],
+        get_seasons_df(for_dates),
+        get_peak_periods_df(),
+        [country_code.value for country_code in request.country_codes or []],
+        [commodity.value for commodity in request.commodities or []],
+        [granularity.value for granularity in request.granularities or []],
+    )
+    return AggregatePricesResponse(
+        start_date=request.start_date,
+        end_date=request.end_date,
+        frequency=request.frequency,
+        aggregates=[PriceAggregate(**row) for row in df.iter_rows(named=True)],
+    )
+
+
+logger = get_logger("daily-prices")
+daily_prices_writer = (
+    RemoteDailyPricesWriter(get_settings().writer_socket)
+    if get_settings().writer_socket
+    else DailyPricesWriter(DB_NAME, layout=get_settings().prices_storage_layout)
+)
+db_executor = ThreadPoolExecutor(
+    max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="duckdb"
+)
+model_prices_flight = SingleFlight()
+model_prices_cache = ResponseCache(
+    get_settings().response_cache_size, get_settings().response_cache_ttl
+)
+app = FastAPI(title="Price Data API", lifespan=initialise_database)
+app.add_middleware(
+    ProfilingMiddleware,
+    directory=get_settings().log_directory,
+    sample_rate=get_settings().profile_sample_rate,
+    header_enabled=get_settings().profile_header_enabled,
+)
+
+
+async def run_in_db_executor(func: Callable[..., T], *args) -> T:
+    """
+    Run a blocking function on the bounded DuckDB executor.
+    When the request is profiled, the function is profiled in the executor thread.
+
+    :param func: the function to run
+    :param args: positional arguments to call the function with
+    :return: the result of the function
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        db_executor, profile_in_thread(func), *args
+    )
+
+
+@app.post("/model-prices", response_model=GeneratePricesResponse)
+@logger.catch
+async def model_prices(
+    request: GeneratePricesRequest,
+    accept: Annotated[str | None, Header()] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """
+    Return hourly prices for the specified date and country code.
+    Lookup and modelling run on the DuckDB executor. Concurrent identical requests
+    share one lookup, so a missing day is only modelled and saved once.
+    The response is JSON, Arrow IPC or packed float64 prices, following Accept.
+    Encoded responses with final prices are cached per request and media type, as
+    the prices of a day never change once stored. Responses carry an ETag, and as
+    this is a POST, a request whose If-None-Match matches it is answered with 412
+    Precondition Failed.
+
+    :param request: request containing the date, country code, granularity, and commodity
+    :param accept: the Accept header of the request
+    :param if_none_match: the If-None-Match header of the request
+    :return: response containing the date, country code, granularity, commodity, and prices
+    """
+    log_payload = sample_payload_log()
+    if log_payload:
+        logger.info(f"request: {request}")
+
+    key = (
+        request.for_date,
+        request.country_code,
+        request.granularity,
+        request.commodity,
+    )
+    tag_request_profile(key)
+    media_type = negotiate_media_type(accept, PRICES_MEDIA_TYPES)
+    cached = model_prices_cache.get((*key, media_type))
+    if cached is not None:
+        RESPONSE_CACHE_LOOKUPS.inc(result="hit")
+        return model_prices_cache.respond(cached, if_none_match, "POST")
+
+    RESPONSE_CACHE_LOOKUPS.inc(result="miss")
+    response, final = await model_prices_flight.do(
+        key, lambda: run_in_db_executor(get_or_model_daily_price, request)
+    )
+
+    if log_payload:
+        logger.info(f"response: {response}")
+    with MODEL_PRICES_STAGE_SECONDS.time(stage="serialization"):
+        rendered = render_daily_prices(response, media_type)
+        cached = (
+            model_prices_cache.put((*key, media_type), rendered)
+            if final
+            else model_prices_cache.encode(rendered)
+        )
+    return model_prices_cache.respond(cached, if_none_match, "POST")
+
+
+@app.post("/model-prices/range", response_model=GeneratePricesRangeResponse)
+@logger.catch
+async def model_prices_range(
+    request: GeneratePricesRangeRequest,
+    accept: Annotated[str | None, Header()] = None,
+) -> Response:
+    """
+    Return prices for every day between the start and end date of the request.
+    Runs on the DuckDB executor, sharing one lookup between concurrent identical requests.
+    The response is JSON, Arrow IPC or packed float64 prices, following Accept.
+
+    :param request: request containing the date range, country code, granularity, and commodity
+    :param accept: the Accept header of the request
+    :return: response containing the daily prices for every day in the range
+    """
+    log_payload = sample_payload_log()
+    if log_payload:
+        logger.info(f"request: {request}")
+
+    key = (
+        request.start_date,
+        request.end_date,
+        request.country_code,
+        request.granularity,
+        request.commodity,
+    )
+    tag_request_profile(key)
+    response = await model_prices_flight.do(
+        key, lambda: run_in_db_executor(get_or_model_daily_prices_range, request)
+    )
+
+    if log_payload:
+        logger.info(f"response: {response}")
+    return render_daily_prices(response, accept)
+
+
+@app.post("/model-prices/cross-section", response_model=GenerateCrossSectionResponse)
+@logger.catch
+async def model_prices_cross_section(
+    request: GenerateCrossSectionRequest,
+    accept: Annotated[str | None, Header()] = None,
+) -> Response:
+    """
+    Return prices of every country and commodity for a date or date range.
+    Runs on the DuckDB executor, sharing one lookup between concurrent identical requests.
+    The response is JSON, Arrow IPC or packed float64 prices, following Accept.
+
+    :param request: request containing the date range and granularity
+    :param accept: the Accept header of the request
+    :return: response containing the daily prices of every country and commodity
+    """
+    log_payload = sample_payload_log()
+    if log_payload:
+        logger.info(f"request: {request}")
+
+    key = ("cross_section", request.start_date, request.end_date, request.granularity)
+    tag_request_profile(key)
+    response = await model_prices_flight.do(
+        key, lambda: run_in_db_executor(get_or_model_cross_section, request)
+    )
+
+    if log_payload:
+        logger.info(f"response: {response}")
+    return render_daily_prices(response, accept)
+
+
+@app.post("/model-prices/scenarios", response_model=GeneratePriceScenariosResponse)
+@logger.catch
+async def model_prices_scenarios(
+    request: GeneratePriceScenariosRequest,
+    accept: Annotated[str | None, Header()] = None,
+) -> Response:
+    """
+    Return Monte Carlo price scenarios for every day between the start and end date.
+    Every path is simulated in one vectorized draw on the DuckDB executor.
+    The response is JSON or Arrow IPC, following Accept.
+
+    :param request: request containing the date range, country code, granularity,
+        commodity and number of paths
+    :param accept: the Accept header of the request
+    :return: response containing the P5/P50/P95 prices, and optionally the paths, per day
+    """
+    log_payload = sample_payload_log()
+    if log_payload:
+        logger.info(f"request: {request}")
+
+    response = await run_in_db_executor(simulate_price_scenarios, request)
+
+    if log_payload:
+        logger.info(
+            f"response: {len(response.daily_scenarios)} days of {response.paths} scenarios"
+        )
+    return render_price_scenarios(response, accept)
+
+
+@app.get("/prices/export")
+@logger.catch
+async def export_prices(
+    request: Annotated[ExportPricesRequest, Query()],
+) -> StreamingResponse:
+    """
+    Stream stored daily prices for a date range, countries and commodities.
+    Rows are read and encoded in record batches, so memory stays flat however many
+    years are exported. Modelled prices still waiting in the writer are not included.
+
+    :param request: query containing the date range, country codes, commodities
+        and export format
+    :return: NDJSON or Arrow IPC stream of daily price entries
+    """
+    log_payload = sample_payload_log()
+    if log_payload:
+        logger.info(f"request: {request}")
+    return StreamingResponse(
+        export_daily_prices(request), media_type=EXPORT_MEDIA_TYPES[request.format]
+    )
+
+
+@app.get("/prices/aggregate", response_model=AggregatePricesResponse)
+@logger.catch
+async def aggregate_prices(
+    request: Annotated[AggregatePricesRequest, Query()],
+) -> Response:
+    """
+    Return daily, weekly or monthly base, peak and off-peak averages of stored prices.
+    Only the averages leave the database, rather than every prices list.
+    Modelled prices still waiting in the writer are not included.
+
+    :param request: query containing the date range, frequency, country codes,
+        commodities and granularities
+    :return: response containing the averages per period
+    """
+    log_payload = sample_payload_log()
+    if log_payload:
+        logger.info(f"request: {request}")
+    response = await run_in_db_executor(aggregate_daily_prices, request)
+    if log_payload:
+        logger.info(f"response: {response}")
+    return json_response(response)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """
+    Return the metrics of this process in the Prometheus text format.
+    Covers the per-stage latency of model_prices, historic hits and modelled misses,
+    response cache hits and misses, rows written by the writer and DuckDB
+    connections opened.
+
+    :return: Prometheus text response
+    """
+    return Response(REGISTRY.render(), media_type=PROMETHEUS_MEDIA_TYPE)
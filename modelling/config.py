@@ -0,0 +1,170 @@
+import os
+import threading
+import duckdb
+import numpy as np
+
+from db.tables import CountryCodes, Commodity
+from db.utils import (
+    return_duckdb_conn,
+    select_duckdb_table,
+    register_config_reload_hook,
+)
+
+ENERGY_MIX_COST_MAPPING: dict = {
+    "wind": 0.4,
+    "solar": 0.4,
+    "hydro": 0.4,
+    "biofuel": 0.4,
+    "nuclear": 0.2,
+    "natural_gas": 0.1,
+}
+
+
+def model_base_prices_from_energy_mix(
+    base_prices: np.ndarray, energy_mix: np.ndarray
+) -> np.ndarray:
+    """
+    Model the base price of every country from its energy mix.
+    Reduce each base price by the cost-weighted share of each generation source.
+
+    :param base_prices: base price per country, shape (countries,)
+    :param energy_mix: generation source shares per country, shape
+        (countries, sources), columns ordered as ENERGY_MIX_COST_MAPPING
+    :return: the modelled base price per country
+    """
+    energy_mix_costs = np.array(list(ENERGY_MIX_COST_MAPPING.values()))
+    return base_prices - energy_mix @ energy_mix_costs
+
+
+class PriceConfig:
+    """
+    Effective base prices for every country and commodity, loaded from the config tables.
+    Power prices are already reduced by the country's energy mix.
+    """
+
+    def __init__(
+        self, country_codes: list[str], commodities: list[str], base_prices: np.ndarray
+    ) -> None:
+        """
+        :param country_codes: country codes, in row order of base_prices
+        :param commodities: commodities, in column order of base_prices
+        :param base_prices: effective base price per (country, commodity)
+        """
+        self.country_index = {code: index for index, code in enumerate(country_codes)}
+        self.commodity_index = {
+            commodity: index for index, commodity in enumerate(commodities)
+        }
+        self.base_prices = base_prices
+
+    def get_base_price(self, country_code: str, commodity: str) -> float:
+        """
+        Return the effective base price for a country and commodity.
+
+        :param country_code: the country code to return the base price for
+        :param commodity: the commodity to return the base price for
+        :return: the effective base price
+        """
+        return float(
+            self.base_prices[
+                self.country_index[CountryCodes(country_code).value],
+                self.commodity_index[Commodity(commodity).value],
+            ]
+        )
+
+
+def load_price_config(conn: duckdb.DuckDBPyConnection) -> PriceConfig:
+    """
+    Build a PriceConfig from the config.country_codes, config.country_energy_mix
+    and config.commodity tables.
+
+    :param conn: DuckDB connection to read the config tables with
+    :return: PriceConfig
+    """
+    country_codes = select_duckdb_table(conn, "config", "country_codes")
+    energy_mix = select_duckdb_table(conn, "config", "country_energy_mix")
+    commodities = select_duckdb_table(conn, "config", "commodity")[
+        "commodity"
+    ].to_list()
+    df = country_codes.join(energy_mix, on="country_code", how="left")
+
+    base_prices = df["country_base_price"].to_numpy().astype(float)
+    power_base_prices = model_base_prices_from_energy_mix(
+        base_prices, df.select(list(ENERGY_MIX_COST_MAPPING)).to_numpy()
+    )
+    commodity_base_prices = np.repeat(
+        base_prices[:, np.newaxis], len(commodities), axis=1
+    )
+    commodity_base_prices[:, commodities.index("power")] = power_base_prices
+
+    return PriceConfig(df["country_code"].to_list(), commodities, commodity_base_prices)
+
+
+PRICE_CONFIGS: dict[str, PriceConfig] = {}
+_PRICE_CONFIGS_LOCK = threading.Lock()
+
+
+def price_config_key(db_name: str) -> str:
+    """
+    Return the key a database's PriceConfig is cached under: the absolute path of
+    its file, as DuckDB reports it for a connection.
+
+    :param db_name: name of the database file to read config from
+    :return: the cache key
+    """
+    return os.path.abspath(db_name)
+
+
+def get_price_config(db_name: str) -> PriceConfig:
+    """
+    Return the cached PriceConfig for a database, loading it on first use.
+
+    :param db_name: name of the database file to read config from
+    :return: PriceConfig
+    """
+    key = price_config_key(db_name)
+    price_config = PRICE_CONFIGS.get(key)
+    if price_config is None:
+        with _PRICE_CONFIGS_LOCK:
+            price_config = PRICE_CONFIGS.get(key)
+            if price_config is None:
+                price_config = load_price_config(return_duckdb_conn(db_name))
+                PRICE_CONFIGS[key] = price_config
+    return price_config
+
+
+def reload_price_config(conn: duckdb.DuckDBPyConnection) -> None:
+    """
+    Reload the cached PriceConfig of the database behind a connection.
+    Registered as a config reload hook, so it runs whenever create_config_tables
+    rewrites the config tables. The config is cached under the path of the
+    connection's database file, the key get_price_config reads.
+
+    :param conn: DuckDB connection the config tables were written with
+    :return: None
+    """
+    key = conn.execute(
+        """
+        SELECT coalesce(path, database_name) FROM duckdb_databases()
+        WHERE database_name = current_database()
+        """
+    ).fetchone()[0]
+    with _PRICE_CONFIGS_LOCK:
+        PRICE_CONFIGS[key] = load_price_config(conn)
+
+
+def invalidate_price_config(db_name: str | None = None) -> None:
+    """
+    Drop the cached PriceConfig of a database, or of every database if none is given.
+    The next call to get_price_config reloads it.
+
+    :param db_name: name of the database file to invalidate
+    :return: None
+    """
+    with _PRICE_CONFIGS_LOCK:
+        if db_name is None:
+            PRICE_CONFIGS.clear()
+        else:
+            PRICE_CONFIGS.pop(price_config_key(db_name), None)
+
+
+register_config_reload_hook(reload_price_config)
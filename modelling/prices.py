@@ -1,75 +1,97 @@
+import hashlib
 import numpy as np
 import polars
 import datetime
 
 from numpy import ndarray
-from db.utils import return_duckdb_conn, select_duckdb_table
+from db.tables import CountryCodes, Commodity, Granularity
+from utils.settings import get_settings
+from utils.metrics import MODEL_PRICES_STAGE_SECONDS
+from modelling.config import get_price_config
 from models.responses import GeneratePricesResponse
-from modelling.seasonality import (
-    get_hours_in_day,
-    get_season,
-    model_seasonality,
-    model_peak_hours,
-    model_off_peak_hours,
-)
+from modelling.trading_calendar import get_trading_calendar
+from modelling.seasonality import model_seasonality
+from modelling.shapes import get_periods_per_hour, get_shape, get_shape_matrix
 
+MODEL_VERSION = 1
+SCENARIO_PERCENTILES = (5, 50, 95)
 
-def get_base_price(country_code: str, db_name: str) -> int:
-    """
-    Select the base prices from config.country_codes table.
-    Filter the base prices based on the country_code param.
-
-    :return: dict
-    """
-    conn = return_duckdb_conn(f"{db_name}.db")
-    df = select_duckdb_table(conn, "config", "country_codes")
-    base_price = (
-        df.filter(polars.col("country_code") == country_code)
-        .select("country_base_price")
-        .to_series()
-        .to_list()[0]
-    )
-    return base_price
 
-
-def get_country_energy_mix(country_code: str, db_name: str) -> dict:
+def get_seeded_generator(
+    for_date: datetime.datetime,
+    country_code: str,
+    commodity: str,
+    granularity: str,
+    model_version: int = MODEL_VERSION,
+) -> np.random.Generator:
     """
-    Select the country energy mix from config.country_energy_mix table.
-    Filter the country energy mix based on the country_code param.
+    Return a counter-based Philox generator for one day of prices.
+    The key is derived from the country code, commodity, granularity and model version,
+    and the counter starts at the date's ordinal, so every worker draws the same stream.
 
-    :param country_code: country code to filter the df on
-    :param db_name: name of the database to connect to
-    :return: energy mix for given country code
+    :param for_date: the date the stream is for
+    :param country_code: the country code the stream is for
+    :param commodity: the commodity the stream is for
+    :param granularity: the granularity the stream is for
+    :param model_version: the version of the price model
+    :return: numpy Generator
     """
-    conn = return_duckdb_conn(f"{db_name}.db")
-    df = select_duckdb_table(conn, "config", "country_energy_mix")
-    df = df.filter(polars.col("country_code") == country_code)
-    df = df.select("wind", "solar", "nuclear", "hydro", "biofuel", "natural_gas")
-    return df.to_dict()
+    key = hashlib.blake2b(
+        f"{CountryCodes(country_code).value}|{Commodity(commodity).value}|"
+        f"{Granularity(granularity).value}|{model_version}".encode(),
+        digest_size=16,
+    ).digest()
+    bit_generator = np.random.Philox(
+        key=np.frombuffer(key, dtype=np.uint64),
+        counter=for_date.toordinal() << 64,
+    )
+    return np.random.Generator(bit_generator)
 
 
-def model_base_price_from_energy_mix(base_price: int, energy_mix: dict) -> float:
+def draw_price_noise(
+    for_dates: list[datetime.datetime],
+    country_code: str,
+    commodity: str,
+    granularity: str,
+    periods: int,
+    seeded: bool | None = None,
+    paths: int | None = None,
+) -> np.ndarray:
     """
-    Model the base price from the energy mix.
-    Reduce the base price based on the energy mix.
+    Draw standard normal noise for a (days x periods) matrix of prices, or for a
+    (paths x days x periods) tensor when paths is given.
+    In seeded mode each day is drawn from the day's get_seeded_generator stream,
+    otherwise everything comes from one draw of numpy's global random state.
 
-    :param base_price: The base price for the country
-    :param energy_mix: The energy mix for the country
-    :return: The base price
+    :param for_dates: the dates to draw noise for, one row each
+    :param country_code: the country code to draw noise for
+    :param commodity: the commodity to draw noise for
+    :param granularity: the granularity to draw noise for
+    :param periods: the number of periods in each row
+    :param seeded: whether to draw seeded noise, defaults to the price_generation setting
+    :param paths: the number of simulated paths, or None for a single path
+    :return: float array of shape (days, periods) or (paths, days, periods)
     """
-    energy_mix_cost_mapping = {
-        "wind": 0.4,
-        "solar": 0.4,
-        "hydro": 0.4,
-        "biofuel": 0.4,
-        "nuclear": 0.2,
-        "natural_gas": 0.1,
-    }
-
-    for source, discount in energy_mix.items():
-        base_price -= energy_mix_cost_mapping[source] * discount[0]
+    if seeded is None:
+        seeded = get_settings().price_generation == "seeded"
+    day_size = periods if paths is None else (paths, periods)
+    if not seeded:
+        size = (
+            (len(for_dates), periods)
+            if paths is None
+            else (paths, len(for_dates), periods)
+        )
+        return np.random.standard_normal(size=size)
 
-    return base_price
+    return np.stack(
+        [
+            get_seeded_generator(
+                for_date, country_code, commodity, granularity
+            ).standard_normal(day_size)
+            for for_date in for_dates
+        ],
+        axis=0 if paths is None else 1,
+    )
 
 
 def model_daily_prices(
@@ -78,51 +100,292 @@ def model_daily_prices(
     granularity: str,
     commodity: str,
     db_name: str,
+    seeded: bool | None = None,
 ) -> np.ndarray[float]:
     """
     Return hourly prices for the specified date and country code.
-    Maps the country_code param to COUNTRY_CODE_PRICES dictionary to return a base price.
+    Looks up the effective base price for the country and commodity in the cached config.
     Uses the base price as a starting point to generate hourly prices for the specified date.
-    Uses the seasonality factor and peak hours to adjust the prices accordingly.
+    Uses the seasonality factor and the cached peak/off-peak shape of the day
+    to adjust the prices accordingly.
 
     :param for_date: the date to return hourly prices for
     :param country_code: the country code of the country to return hourly prices for
     :param granularity: the granularity of the prices to be returned
     :param commodity: the commodity to return prices for
+    :param db_name: name of the database file the cached config was loaded from
+    :param seeded: whether to draw seeded prices, defaults to the price_generation setting
     :return: None
     """
-    energy_mix = get_country_energy_mix(country_code, db_name)
-    season = get_season(for_date)
+    with MODEL_PRICES_STAGE_SECONDS.time(stage="config_fetch"):
+        base_price = get_price_config(db_name).get_base_price(country_code, commodity)
+    trading_calendar = get_trading_calendar("Europe/London")
+    season = trading_calendar.get_season(for_date)
     seasonality_factor = model_seasonality(season, commodity)
-    peak_hours = model_peak_hours(season, commodity)
-    off_peak_hours = model_off_peak_hours(season, commodity)
-    hours_in_for_date = get_hours_in_day(for_date, "Europe/London")
+    periods_in_for_date = trading_calendar.get_hours_in_day(
+        for_date
+    ) * get_periods_per_hour(granularity)
+    shape = get_shape(season, commodity, granularity, periods_in_for_date)
+    noise = draw_price_noise(
+        [for_date], country_code, commodity, granularity, periods_in_for_date, seeded
+    )[0]
+
+    if granularity == "h":
+        prices: ndarray = base_price - seasonality_factor + 5 * noise
+        prices = np.round(prices + shape, 2)
+        return prices
+
+    if granularity == "hh":
+        prices: ndarray = base_price + 5 * noise
+        prices = np.round(prices + shape, 2)
+        return prices
+
+
+def get_dates_in_range(
+    start_date: datetime.datetime, end_date: datetime.datetime
+) -> list[datetime.datetime]:
+    """
+    Return a list of midnight datetimes for every day between two dates (inclusive).
+
+    :param start_date: the first date in the range
+    :param end_date: the last date in the range
+    :return: list of datetimes, one per day
+    """
+    first_day = datetime.datetime(start_date.year, start_date.month, start_date.day)
+    days = (end_date.date() - start_date.date()).days + 1
+    return [first_day + datetime.timedelta(days=day) for day in range(days)]
 
-    if commodity == "power":
-        base_price = get_base_price(country_code, db_name)
-        base_price = model_base_price_from_energy_mix(base_price, energy_mix)
+
+def model_price_means(
+    for_dates: list[datetime.datetime],
+    country_code: str,
+    granularity: str,
+    commodity: str,
+    db_name: str,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return the expected price of every period of every date, before noise is added.
+    Combines the cached base price, the seasonality factor and the peak/off-peak shape.
+
+    :param for_dates: the dates to model prices for
+    :param country_code: the country code of the country to model prices for
+    :param granularity: the granularity of the prices to be returned
+    :param commodity: the commodity to model prices for
+    :param db_name: name of the database file the cached config was loaded from
+    :return: tuple of the (days x max periods) means and the periods of every date
+    """
+    with MODEL_PRICES_STAGE_SECONDS.time(stage="config_fetch"):
+        base_price = get_price_config(db_name).get_base_price(country_code, commodity)
+    seasons, hours_in_dates, _ = get_trading_calendar("Europe/London").lookup(for_dates)
+    periods_in_dates = hours_in_dates * get_periods_per_hour(granularity)
+
+    if granularity == "h":
+        loc = base_price - np.array(
+            [model_seasonality(season, commodity) for season in seasons]
+        )
     else:
-        base_price = get_base_price(country_code, db_name)
+        loc = np.full(len(for_dates), base_price, dtype=float)
+
+    means = loc[:, np.newaxis] + get_shape_matrix(
+        seasons, commodity, granularity, periods_in_dates
+    )
+    return means, periods_in_dates
+
+
+def model_prices_for_dates(
+    for_dates: list[datetime.datetime],
+    country_code: str,
+    granularity: str,
+    commodity: str,
+    db_name: str,
+    seeded: bool | None = None,
+) -> list[np.ndarray]:
+    """
+    Return prices for every date in for_dates, modelled in a single vectorized pass.
+    One random draw fills a (days x periods) matrix, or one seeded stream per day.
+    Rows are trimmed to the number of delivery periods of their day.
+
+    :param for_dates: the dates to model prices for
+    :param country_code: the country code of the country to model prices for
+    :param granularity: the granularity of the prices to be returned
+    :param commodity: the commodity to model prices for
+    :param db_name: name of the database file the cached config was loaded from
+    :param seeded: whether to draw seeded prices, defaults to the price_generation setting
+    :return: list of price arrays, in the same order as for_dates
+    """
+    if not for_dates:
+        return []
+
+    means, periods_in_dates = model_price_means(
+        for_dates, country_code, granularity, commodity, db_name
+    )
+    noise = draw_price_noise(
+        for_dates, country_code, commodity, granularity, means.shape[1], seeded
+    )
+    prices: ndarray = np.round(means + 5 * noise, 2)
 
+    return [prices[row, :periods] for row, periods in enumerate(periods_in_dates)]
+
+
+def model_cross_section_prices(
+    for_dates: list[datetime.datetime],
+    granularity: str,
+    db_name: str,
+    seeded: bool | None = None,
+) -> tuple[list[str], list[str], np.ndarray, np.ndarray]:
+    """
+    Return prices of every country and commodity for every date in one vectorized pass.
+    The effective base prices of the cached config are broadcast against the
+    seasonality factor and shape of every commodity into a
+    (countries x commodities x days x periods) tensor of means, which one draw fills
+    with noise, or one seeded stream per country, commodity and day.
+    Each (country, commodity) slice matches model_prices_for_dates.
+
+    :param for_dates: the dates to model prices for
+    :param granularity: the granularity of the prices to be returned
+    :param db_name: name of the database file the cached config was loaded from
+    :param seeded: whether to draw seeded prices, defaults to the price_generation setting
+    :return: tuple of the country codes and commodities, in axis order, the prices
+        tensor, and the periods of every date
+    """
+    with MODEL_PRICES_STAGE_SECONDS.time(stage="config_fetch"):
+        price_config = get_price_config(db_name)
+    country_codes = list(price_config.country_index)
+    commodities = list(price_config.commodity_index)
+    seasons, hours_in_dates, _ = get_trading_calendar("Europe/London").lookup(for_dates)
+    periods_in_dates = hours_in_dates * get_periods_per_hour(granularity)
+
+    shapes = np.stack(
+        [
+            get_shape_matrix(seasons, commodity, granularity, periods_in_dates)
+            for commodity in commodities
+        ]
+    )
     if granularity == "h":
-        prices: ndarray = np.random.normal(
-            loc=base_price - seasonality_factor,
-            scale=5,
-            size=hours_in_for_date,
+        seasonality = np.array(
+            [
+                [model_seasonality(season, commodity) for season in seasons]
+                for commodity in commodities
+            ]
         )
-        prices[peak_hours] += 10
-        prices[off_peak_hours] -= 10
-        prices = np.round(prices, 2)
-        return prices
+    else:
+        seasonality = np.zeros((len(commodities), len(for_dates)))
+    means = (
+        price_config.base_prices[:, :, np.newaxis, np.newaxis]
+        - seasonality[np.newaxis, :, :, np.newaxis]
+        + shapes[np.newaxis]
+    )
 
-    if granularity == "hh":
-        prices: ndarray = np.random.normal(
-            loc=base_price, scale=5, size=(hours_in_for_date * 2)
+    if seeded is None:
+        seeded = get_settings().price_generation == "seeded"
+    if seeded:
+        noise = np.stack(
+            [
+                np.stack(
+                    [
+                        draw_price_noise(
+                            for_dates,
+                            country_code,
+                            commodity,
+                            granularity,
+                            means.shape[-1],
+                            seeded,
+                        )
+                        for commodity in commodities
+                    ]
+                )
+                for country_code in country_codes
+            ]
         )
-        prices[peak_hours] += 10
-        prices[off_peak_hours] -= 10
-        prices = np.round(prices, 2)
-        return prices
+    else:
+        noise = np.random.standard_normal(size=means.shape)
+    prices: ndarray = np.round(means + 5 * noise, 2)
+
+    return country_codes, commodities, prices, periods_in_dates
+
+
+def model_prices_range(
+    start_date: datetime.datetime,
+    end_date: datetime.datetime,
+    country_code: str,
+    granularity: str,
+    commodity: str,
+    db_name: str,
+    seeded: bool | None = None,
+) -> list[np.ndarray]:
+    """
+    Return prices for every day between start_date and end_date (inclusive).
+
+    :param start_date: the first date to model prices for
+    :param end_date: the last date to model prices for
+    :param country_code: the country code of the country to model prices for
+    :param granularity: the granularity of the prices to be returned
+    :param commodity: the commodity to model prices for
+    :param db_name: name of the database file the cached config was loaded from
+    :param seeded: whether to draw seeded prices, defaults to the price_generation setting
+    :return: list of price arrays, one per day
+    """
+    return model_prices_for_dates(
+        get_dates_in_range(start_date, end_date),
+        country_code,
+        granularity,
+        commodity,
+        db_name,
+        seeded,
+    )
+
+
+def model_price_scenarios(
+    for_dates: list[datetime.datetime],
+    country_code: str,
+    granularity: str,
+    commodity: str,
+    db_name: str,
+    paths: int,
+    percentiles: tuple = SCENARIO_PERCENTILES,
+    seeded: bool | None = None,
+) -> tuple[list[np.ndarray], list[np.ndarray]]:
+    """
+    Simulate price paths for every date in for_dates and their per-period percentiles.
+    One draw fills a (paths x days x periods) tensor around the modelled means, and
+    one reduction over the paths axis computes every percentile.
+
+    :param for_dates: the dates to simulate prices for
+    :param country_code: the country code of the country to simulate prices for
+    :param granularity: the granularity of the prices to be returned
+    :param commodity: the commodity to simulate prices for
+    :param db_name: name of the database file the cached config was loaded from
+    :param paths: the number of paths to simulate
+    :param percentiles: the percentiles to compute, between 0 and 100
+    :param seeded: whether to draw seeded prices, defaults to the price_generation setting
+    :return: tuple of, per date, a (paths x periods) array of simulated prices and
+        a (percentiles x periods) array of percentiles
+    """
+    if not for_dates:
+        return [], []
+
+    means, periods_in_dates = model_price_means(
+        for_dates, country_code, granularity, commodity, db_name
+    )
+    noise = draw_price_noise(
+        for_dates,
+        country_code,
+        commodity,
+        granularity,
+        means.shape[1],
+        seeded,
+        paths,
+    )
+    scenarios: ndarray = np.round(means[np.newaxis] + 5 * noise, 2)
+    scenario_percentiles = np.round(np.percentile(scenarios, percentiles, axis=0), 2)
+
+    return (
+        [scenarios[:, row, :periods] for row, periods in enumerate(periods_in_dates)],
+        [
+            scenario_percentiles[:, row, :periods]
+            for row, periods in enumerate(periods_in_dates)
+        ],
+    )
 
 
 def build_daily_prices_df(prices_response: GeneratePricesResponse) -> polars.DataFrame:
@@ -142,3 +405,24 @@ def build_daily_prices_df(prices_response: GeneratePricesResponse) -> polars.Dat
         }
     )
     return df
+
+
+def build_daily_prices_range_df(
+    prices_responses: list[GeneratePricesResponse],
+) -> polars.DataFrame:
+    """
+    Build a polars dataframe with one row per GeneratePricesResponse object.
+
+    :param prices_responses: the GeneratePricesResponse objects to build the dataframe from
+    :return: polars.DataFrame
+    """
+    df = polars.DataFrame(
+        {
+            "date": [response.date for response in prices_responses],
+            "country_code": [response.country_code for response in prices_responses],
+            "commodity": [response.commodity for response in prices_responses],
+            "granularity": [response.granularity for response in prices_responses],
+            "prices": [response.prices for response in prices_responses],
+        }
+    )
+    return df
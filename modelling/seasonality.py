@@ -2,6 +2,29 @@ import pytz
 
 from datetime import datetime, timedelta
 
+PEAK_HOURS: dict = {
+    "spring": {
+        "power": [8, 9, 10, 11, 12, 13, 14, 15, 16, 17],
+        "natural_gas": [6, 7, 8, 9, 10, 11, 12, 13, 14, 15],
+        "crude": [7, 8, 9, 10, 11, 12, 13, 14, 15, 16],
+    },
+    "summer": {
+        "power": [9, 10, 11, 12, 13, 14, 15, 16, 17, 18],
+        "natural_gas": [7, 8, 9, 10, 11, 12, 13, 14, 15, 16],
+        "crude": [8, 9, 10, 11, 12, 13, 14, 15, 16, 17],
+    },
+    "autumn": {
+        "power": [8, 9, 10, 11, 12, 13, 14, 15, 16, 17],
+        "natural_gas": [6, 7, 8, 9, 10, 11, 12, 13, 14, 15],
+        "crude": [7, 8, 9, 10, 11, 12, 13, 14, 15, 16],
+    },
+    "winter": {
+        "power": [7, 8, 9, 10, 11, 12, 13, 14, 15, 16],
+        "natural_gas": [6, 7, 8, 9, 10, 11, 12, 13, 14, 15],
+        "crude": [7, 8, 9, 10, 11, 12, 13, 14, 15, 16],
+    },
+}
+
 
 def get_hours_in_day(date: datetime, timezone_str: str = "UTC") -> int:
     """
@@ -34,21 +57,19 @@ def get_hours_in_day(date: datetime, timezone_str: str = "UTC") -> int:
 def get_season(date: datetime) -> str:
     """
     Determine the season for a given date.
+    Winter runs from 21 December to 19 March, across the turn of the year.
 
     :param date: The date to determine the season for
     :return: The season as a string ('spring', 'summer', 'autumn', 'winter')
     """
-    year = date.year
-    seasons = {
-        "spring": (datetime(year, 3, 20), datetime(year, 6, 20)),
-        "summer": (datetime(year, 6, 21), datetime(year, 9, 22)),
-        "autumn": (datetime(year, 9, 23), datetime(year, 12, 20)),
-        "winter": (datetime(year, 12, 21), datetime(year + 1, 3, 19)),
-    }
-
-    for season, (start, end) in seasons.items():
-        if start <= date <= end:
-            return season
+    month_day = (date.month, date.day)
+    if (3, 20) <= month_day <= (6, 20):
+        return "spring"
+    if (6, 21) <= month_day <= (9, 22):
+        return "summer"
+    if (9, 23) <= month_day <= (12, 20):
+        return "autumn"
+    return "winter"
 
 
 def model_seasonality(season: str, commodity: str) -> float:
@@ -92,30 +113,7 @@ def model_peak_hours(season: str, commodity: str) -> list[int]:
 
     :return: A list of peak hours
     """
-    peak_hours = {
-        "spring": {
-            "power": [8, 9, 10, 11, 12, 13, 14, 15, 16, 17],
-            "natural_gas": [6, 7, 8, 9, 10, 11, 12, 13, 14, 15],
-            "crude": [7, 8, 9, 10, 11, 12, 13, 14, 15, 16],
-        },
-        "summer": {
-            "power": [9, 10, 11, 12, 13, 14, 15, 16, 17, 18],
-            "natural_gas": [7, 8, 9, 10, 11, 12, 13, 14, 15, 16],
-            "crude": [8, 9, 10, 11, 12, 13, 14, 15, 16, 17],
-        },
-        "autumn": {
-            "power": [8, 9, 10, 11, 12, 13, 14, 15, 16, 17],
-            "natural_gas": [6, 7, 8, 9, 10, 11, 12, 13, 14, 15],
-            "crude": [7, 8, 9, 10, 11, 12, 13, 14, 15, 16],
-        },
-        "winter": {
-            "power": [7, 8, 9, 10, 11, 12, 13, 14, 15, 16],
-            "natural_gas": [6, 7, 8, 9, 10, 11, 12, 13, 14, 15],
-            "crude": [7, 8, 9, 10, 11, 12, 13, 14, 15, 16],
-        },
-    }
-
-    return peak_hours[season][commodity]
+    return PEAK_HOURS[season][commodity]
 
 
 def model_off_peak_hours(season: str, commodity: str) -> list[int]:
@@ -126,7 +124,7 @@ def model_off_peak_hours(season: str, commodity: str) -> list[int]:
     :param commodity: The commodity to model off-peak hours for
     :return: A list of off-peak hours
     """
-    peak_hours = model_peak_hours(season, commodity)
+    peak_hours = set(model_peak_hours(season, commodity))
     hours_in_day = 24
     off_peak_hours = [hour for hour in range(hours_in_day) if hour not in peak_hours]
     return off_peak_hours
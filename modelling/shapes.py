@@ -0,0 +1,151 @@
+import functools
+import polars
+import numpy as np
+
+from db.tables import Granularity
+from modelling.seasonality import PEAK_HOURS, model_peak_hours
+
+PEAK_ADJUSTMENT = 10
+DST_TRANSITION_HOUR = 1
+HOURS_IN_DAYS = (23, 24, 25)
+
+
+def get_periods_per_hour(granularity: str) -> int:
+    """
+    Return the number of delivery periods in an hour for a granularity.
+
+    :param granularity: the granularity of the delivery periods
+    :return: 2 for half-hourly granularity, otherwise 1
+    """
+    return 2 if granularity == "hh" else 1
+
+
+@functools.lru_cache(maxsize=None)
+def get_period_hours(granularity: str, periods_in_day: int) -> np.ndarray:
+    """
+    Return the local clock hour of every delivery period in a day.
+    On a 23 hour day the DST transition hour is skipped, and on a 25 hour day it is
+    repeated, as Europe/London clocks change at 01:00 local time.
+
+    :param granularity: the granularity of the delivery periods
+    :param periods_in_day: the number of delivery periods in the day
+    :return: read-only array of clock hours, one per delivery period
+    """
+    hours_in_day = periods_in_day // get_periods_per_hour(granularity)
+    clock_hours = np.arange(24)
+    if hours_in_day == 23:
+        clock_hours = np.delete(clock_hours, DST_TRANSITION_HOUR)
+    elif hours_in_day == 25:
+        clock_hours = np.insert(clock_hours, DST_TRANSITION_HOUR, DST_TRANSITION_HOUR)
+
+    period_hours = np.repeat(clock_hours, get_periods_per_hour(granularity))
+    period_hours.setflags(write=False)
+    return period_hours
+
+
+@functools.lru_cache(maxsize=None)
+def get_peak_mask(
+    season: str, commodity: str, granularity: str, periods_in_day: int
+) -> np.ndarray:
+    """
+    Return a boolean mask of the delivery periods that fall in peak hours.
+
+    :param season: the season of the day
+    :param commodity: the commodity to return the mask for
+    :param granularity: the granularity of the delivery periods
+    :param periods_in_day: the number of delivery periods in the day
+    :return: read-only boolean array, True for peak periods
+    """
+    peak_mask = np.isin(
+        get_period_hours(granularity, periods_in_day),
+        model_peak_hours(season, commodity),
+    )
+    peak_mask.setflags(write=False)
+    return peak_mask
+
+
+@functools.lru_cache(maxsize=None)
+def get_peak_periods_df() -> polars.DataFrame:
+    """
+    Return the peak and off-peak delivery periods of every possible day, so stored
+    prices can be split into peak and off-peak periods inside DuckDB.
+    One row per season, commodity, granularity and number of periods in a 23, 24
+    or 25 hour day, built from get_peak_mask.
+
+    :return: polars.DataFrame with season, commodity, granularity, periods_in_day,
+        peak_periods and off_peak_periods columns, holding 1-based period indexes
+    """
+    rows = []
+    for season, commodities in PEAK_HOURS.items():
+        for commodity in commodities:
+            for granularity in Granularity:
+                for hours_in_day in HOURS_IN_DAYS:
+                    periods_in_day = hours_in_day * get_periods_per_hour(
+                        granularity.value
+                    )
+                    peak_mask = get_peak_mask(
+                        season, commodity, granularity.value, periods_in_day
+                    )
+                    rows.append(
+                        {
+                            "season": season,
+                            "commodity": commodity,
+                            "granularity": granularity.value,
+                            "periods_in_day": periods_in_day,
+                            "peak_periods": (np.flatnonzero(peak_mask) + 1).tolist(),
+                            "off_peak_periods": (
+                                np.flatnonzero(~peak_mask) + 1
+                            ).tolist(),
+                        }
+                    )
+    return polars.DataFrame(rows)
+
+
+@functools.lru_cache(maxsize=None)
+def get_shape(
+    season: str, commodity: str, granularity: str, periods_in_day: int
+) -> np.ndarray:
+    """
+    Return the additive peak/off-peak shape of a day.
+    Peak periods are raised and off-peak periods lowered by PEAK_ADJUSTMENT.
+
+    :param season: the season of the day
+    :param commodity: the commodity to return the shape for
+    :param granularity: the granularity of the delivery periods
+    :param periods_in_day: the number of delivery periods in the day
+    :return: read-only float array, one adjustment per delivery period
+    """
+    shape = np.where(
+        get_peak_mask(season, commodity, granularity, periods_in_day),
+        float(PEAK_ADJUSTMENT),
+        -float(PEAK_ADJUSTMENT),
+    )
+    shape.setflags(write=False)
+    return shape
+
+
+def get_shape_matrix(
+    seasons: np.ndarray,
+    commodity: str,
+    granularity: str,
+    periods_in_dates: np.ndarray,
+) -> np.ndarray:
+    """
+    Return the shapes of many days as one (days x periods) matrix.
+    Rows are filled once per distinct (season, periods) pair and padded with zeros
+    beyond the number of periods of their day.
+
+    :param seasons: the season of every day
+    :param commodity: the commodity to return the shapes for
+    :param granularity: the granularity of the delivery periods
+    :param periods_in_dates: the number of delivery periods of every day
+    :return: float array of shape (days, max periods)
+    """
+    shape_matrix = np.zeros((len(seasons), int(np.max(periods_in_dates))))
+    for season in np.unique(seasons):
+        for periods_in_day in np.unique(periods_in_dates[seasons == season]):
+            rows = (seasons == season) & (periods_in_dates == periods_in_day)
+            shape_matrix[rows, :periods_in_day] = get_shape(
+                str(season), commodity, granularity, int(periods_in_day)
+            )
+    return shape_matrix
@@ -0,0 +1,188 @@
+import functools
+import polars
+import numpy as np
+
+from datetime import date, datetime, timedelta
+from modelling.seasonality import get_hours_in_day, get_season
+
+SEASONS: tuple = ("spring", "summer", "autumn", "winter")
+CALENDAR_START_YEAR = 2000
+CALENDAR_END_YEAR = 2050
+
+
+class TradingCalendar:
+    """
+    Precomputed season, hours in day and DST flag for every date in a span of years.
+    Columns are held as numpy arrays indexed by days since the first date, so single
+    dates and whole ranges are looked up without any timezone arithmetic.
+    Dates outside the span fall back to get_season and get_hours_in_day.
+    """
+
+    def __init__(
+        self,
+        timezone_str: str = "Europe/London",
+        start_year: int = CALENDAR_START_YEAR,
+        end_year: int = CALENDAR_END_YEAR,
+    ) -> None:
+        """
+        :param timezone_str: the timezone delivery days are measured in
+        :param start_year: the first year to precompute
+        :param end_year: the last year to precompute
+        """
+        self.timezone_str = timezone_str
+        self.start_date = date(start_year, 1, 1)
+        self.end_date = date(end_year, 12, 31)
+
+        df = build_calendar_df(self.start_date, self.end_date, timezone_str)
+        self.seasons = df["season"].to_numpy().astype(str)
+        self.hours_in_day = df["hours_in_day"].to_numpy()
+        self.is_dst = df["is_dst"].to_numpy()
+        self.df = df
+
+    def get_index(self, for_date: datetime | date) -> int | None:
+        """
+        Return the row index of a date, or None if it is outside the calendar span.
+
+        :param for_date: the date to return the index of
+        :return: row index into the calendar columns
+        """
+        if isinstance(for_date, datetime):
+            for_date = for_date.date()
+        if not self.start_date <= for_date <= self.end_date:
+            return None
+        return (for_date - self.start_date).days
+
+    def get_season(self, for_date: datetime | date) -> str:
+        """
+        Return the season of a date.
+
+        :param for_date: the date to return the season for
+        :return: the season as a string ('spring', 'summer', 'autumn', 'winter')
+        """
+        index = self.get_index(for_date)
+        if index is None:
+            return get_season(for_date)
+        return str(self.seasons[index])
+
+    def get_hours_in_day(self, for_date: datetime | date) -> int:
+        """
+        Return the number of hours in the delivery day of a date.
+
+        :param for_date: the date to return the number of hours for
+        :return: an int representing the number of hours in the day
+        """
+        index = self.get_index(for_date)
+        if index is None:
+            return get_hours_in_day(for_date, self.timezone_str)
+        return int(self.hours_in_day[index])
+
+    def lookup(
+        self, for_dates: list[datetime | date]
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Return the season, hours in day and DST flag for every date in one lookup.
+
+        :param for_dates: the dates to look up
+        :return: tuple of (seasons, hours_in_day, is_dst) arrays, one entry per date
+        """
+        indexes = [self.get_index(for_date) for for_date in for_dates]
+        if None not in indexes:
+            indexes = np.array(indexes, dtype=np.int64)
+            return (
+                self.seasons[indexes],
+                self.hours_in_day[indexes],
+                self.is_dst[indexes],
+            )
+
+        fallback = get_trading_calendar(
+            self.timezone_str,
+            min(for_date.year for for_date in for_dates),
+            max(for_date.year for for_date in for_dates),
+        )
+        return fallback.lookup(for_dates)
+
+
+def build_calendar_df(
+    start_date: date, end_date: date, timezone_str: str
+) -> polars.DataFrame:
+    """
+    Build a calendar with one row per date between two dates (inclusive).
+    hours_in_day is the length of the local day from midnight to midnight.
+    is_dst flags dates where daylight saving time is in effect at local noon.
+
+    :param start_date: the first date of the calendar
+    :param end_date: the last date of the calendar
+    :param timezone_str: the timezone delivery days are measured in
+    :return: polars.DataFrame with date, season, hours_in_day and is_dst columns
+    """
+    month_day = polars.col("date").dt.month().cast(polars.Int32) * 100 + polars.col(
+        "date"
+    ).dt.day().cast(polars.Int32)
+    local_midnight = (
+        polars.col("date")
+        .cast(polars.Datetime("us"))
+        .dt.replace_time_zone(timezone_str, ambiguous="earliest")
+    )
+    next_local_midnight = (
+        (polars.col("date") + timedelta(days=1))
+        .cast(polars.Datetime("us"))
+        .dt.replace_time_zone(timezone_str, ambiguous="earliest")
+    )
+    local_noon = (
+        polars.col("date").cast(polars.Datetime("us")) + timedelta(hours=12)
+    ).dt.replace_time_zone(timezone_str, ambiguous="earliest")
+
+    df = polars.DataFrame(
+        {"date": polars.date_range(start_date, end_date, "1d", eager=True)}
+    ).with_columns(
+        season=polars.when(month_day.is_between(320, 620))
+        .then(polars.lit("spring"))
+        .when(month_day.is_between(621, 922))
+        .then(polars.lit("summer"))
+        .when(month_day.is_between(923, 1220))
+        .then(polars.lit("autumn"))
+        .otherwise(polars.lit("winter")),
+        hours_in_day=(next_local_midnight - local_midnight)
+        .dt.total_hours()
+        .cast(polars.Int64),
+        is_dst=local_noon.dt.dst_offset() != timedelta(0),
+    )
+    return df
+
+
+@functools.lru_cache(maxsize=None)
+def get_trading_calendar(
+    timezone_str: str = "Europe/London",
+    start_year: int = CALENDAR_START_YEAR,
+    end_year: int = CALENDAR_END_YEAR,
+) -> TradingCalendar:
+    """
+    Return the TradingCalendar for a timezone and span of years, building it on first use.
+
+    :param timezone_str: the timezone delivery days are measured in
+    :param start_year: the first year to precompute
+    :param end_year: the last year to precompute
+    :return: TradingCalendar
+    """
+    return TradingCalendar(timezone_str, start_year, end_year)
+
+
+def get_seasons_df(
+    for_dates: list[datetime], timezone_str: str = "Europe/London"
+) -> polars.DataFrame:
+    """
+    Return the season of every date, as a frame that can be joined to stored prices.
+
+    :param for_dates: midnight datetimes to return the seasons of
+    :param timezone_str: the timezone delivery days are measured in
+    :return: polars.DataFrame with date and season columns
+    """
+    seasons, _, _ = (
+        get_trading_calendar(timezone_str).lookup(for_dates)
+        if for_dates
+        else (np.array([], dtype=str), None, None)
+    )
+    return polars.DataFrame(
+        {"date": for_dates, "season": seasons.tolist()},
+        schema={"date": polars.Datetime("us"), "season": polars.String},
+    )
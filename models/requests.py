@@ -1,6 +1,12 @@
 from db.tables import CountryCodes, Granularity, Commodity
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
+from enum import Enum
+
+MAX_RANGE_DAYS = 366
+MAX_SCENARIO_PATHS = 10000
+MAX_SCENARIO_PATH_DAYS = 500000
+MAX_AGGREGATE_DAYS = 3660
 
 
 class GeneratePricesRequest(BaseModel):
@@ -12,3 +18,164 @@ class GeneratePricesRequest(BaseModel):
     country_code: CountryCodes
     granularity: Granularity
     commodity: Commodity
+
+
+class GeneratePricesRangeRequest(BaseModel):
+    """
+    Request model for the model_prices_range endpoint.
+    """
+
+    start_date: datetime
+    end_date: datetime
+    country_code: CountryCodes
+    granularity: Granularity
+    commodity: Commodity
+
+    @model_validator(mode="after")
+    def check_date_range(self) -> "GeneratePricesRangeRequest":
+        """
+        Validate that end_date is not before start_date and the range is bounded.
+
+        :return: the validated request
+        """
+        days = (self.end_date.date() - self.start_date.date()).days + 1
+        if days < 1:
+            raise ValueError("end_date must not be before start_date")
+        if days > MAX_RANGE_DAYS:
+            raise ValueError(f"date range must not exceed {MAX_RANGE_DAYS} days")
+        return self
+
+
+class GenerateCrossSectionRequest(BaseModel):
+    """
+    Request model for the model_prices_cross_section endpoint.
+    end_date defaults to start_date, for a single day.
+    """
+
+    start_date: datetime
+    end_date: datetime | None = None
+    granularity: Granularity
+
+    @model_validator(mode="after")
+    def check_date_range(self) -> "GenerateCrossSectionRequest":
+        """
+        Default end_date to start_date, and validate that end_date is not before
+        start_date and the range is bounded.
+
+        :return: the validated request
+        """
+        if self.end_date is None:
+            self.end_date = self.start_date
+        days = (self.end_date.date() - self.start_date.date()).days + 1
+        if days < 1:
+            raise ValueError("end_date must not be before start_date")
+        if days > MAX_RANGE_DAYS:
+            raise ValueError(f"date range must not exceed {MAX_RANGE_DAYS} days")
+        return self
+
+
+class GeneratePriceScenariosRequest(BaseModel):
+    """
+    Request model for the model_price_scenarios endpoint.
+    """
+
+    start_date: datetime
+    end_date: datetime
+    country_code: CountryCodes
+    granularity: Granularity
+    commodity: Commodity
+    paths: int = Field(default=1000, ge=1, le=MAX_SCENARIO_PATHS)
+    include_paths: bool = False
+
+    @model_validator(mode="after")
+    def check_date_range(self) -> "GeneratePriceScenariosRequest":
+        """
+        Validate that end_date is not before start_date and the simulation is bounded.
+
+        :return: the validated request
+        """
+        days = (self.end_date.date() - self.start_date.date()).days + 1
+        if days < 1:
+            raise ValueError("end_date must not be before start_date")
+        if days > MAX_RANGE_DAYS:
+            raise ValueError(f"date range must not exceed {MAX_RANGE_DAYS} days")
+        if days * self.paths > MAX_SCENARIO_PATH_DAYS:
+            raise ValueError(
+                f"paths multiplied by days must not exceed {MAX_SCENARIO_PATH_DAYS}"
+            )
+        return self
+
+
+class ExportFormat(str, Enum):
+    """
+    Enum class for the formats the export endpoint can stream.
+    """
+
+    NDJSON = "ndjson"
+    ARROW = "arrow"
+
+
+class ExportPricesRequest(BaseModel):
+    """
+    Query model for the export_prices endpoint.
+    Filters that are not set match every stored row.
+    """
+
+    start_date: datetime | None = None
+    end_date: datetime | None = None
+    country_codes: list[CountryCodes] | None = None
+    commodities: list[Commodity] | None = None
+    format: ExportFormat = ExportFormat.NDJSON
+
+    @model_validator(mode="after")
+    def check_date_range(self) -> "ExportPricesRequest":
+        """
+        Validate that end_date is not before start_date when both are set.
+
+        :return: the validated request
+        """
+        if (
+            self.start_date is not None
+            and self.end_date is not None
+            and self.end_date < self.start_date
+        ):
+            raise ValueError("end_date must not be before start_date")
+        return self
+
+
+class AggregateFrequency(str, Enum):
+    """
+    Enum class for the periods the aggregate endpoint can group days by.
+    """
+
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+
+
+class AggregatePricesRequest(BaseModel):
+    """
+    Query model for the aggregate_prices endpoint.
+    Filters that are not set match every stored row.
+    """
+
+    start_date: datetime
+    end_date: datetime
+    frequency: AggregateFrequency = AggregateFrequency.DAILY
+    country_codes: list[CountryCodes] | None = None
+    commodities: list[Commodity] | None = None
+    granularities: list[Granularity] | None = None
+
+    @model_validator(mode="after")
+    def check_date_range(self) -> "AggregatePricesRequest":
+        """
+        Validate that end_date is not before start_date and the range is bounded.
+
+        :return: the validated request
+        """
+        days = (self.end_date.date() - self.start_date.date()).days + 1
+        if days < 1:
+            raise ValueError("end_date must not be before start_date")
+        if days > MAX_AGGREGATE_DAYS:
+            raise ValueError(f"date range must not exceed {MAX_AGGREGATE_DAYS} days")
+        return self
@@ -1,4 +1,5 @@
 from db.tables import CountryCodes, Granularity, Commodity
+from models.requests import AggregateFrequency
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -13,3 +14,79 @@ class GeneratePricesResponse(BaseModel):
     country_code: CountryCodes
     granularity: Granularity
     prices: list[float]
+
+
+class GeneratePricesRangeResponse(BaseModel):
+    """
+    Response model for the model_prices_range endpoint.
+    """
+
+    commodity: Commodity
+    start_date: datetime
+    end_date: datetime
+    country_code: CountryCodes
+    granularity: Granularity
+    daily_prices: list[GeneratePricesResponse]
+
+
+class GenerateCrossSectionResponse(BaseModel):
+    """
+    Response model for the model_prices_cross_section endpoint.
+    """
+
+    start_date: datetime
+    end_date: datetime
+    granularity: Granularity
+    daily_prices: list[GeneratePricesResponse]
+
+
+class DailyPriceScenarios(BaseModel):
+    """
+    Simulated prices for one day of the model_price_scenarios endpoint.
+    """
+
+    date: datetime
+    p5: list[float]
+    p50: list[float]
+    p95: list[float]
+    paths: list[list[float]] | None = None
+
+
+class GeneratePriceScenariosResponse(BaseModel):
+    """
+    Response model for the model_price_scenarios endpoint.
+    """
+
+    commodity: Commodity
+    start_date: datetime
+    end_date: datetime
+    country_code: CountryCodes
+    granularity: Granularity
+    paths: int
+    daily_scenarios: list[DailyPriceScenarios]
+
+
+class PriceAggregate(BaseModel):
+    """
+    Average prices of one country, commodity and granularity over a day, week or month.
+    """
+
+    period_start: datetime
+    country_code: CountryCodes
+    commodity: Commodity
+    granularity: Granularity
+    days: int
+    base: float
+    peak: float
+    off_peak: float
+
+
+class AggregatePricesResponse(BaseModel):
+    """
+    Response model for the aggregate_prices endpoint.
+    """
+
+    start_date: datetime
+    end_date: datetime
+    frequency: AggregateFrequency
+    aggregates: list[PriceAggregate]
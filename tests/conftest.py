@@ -1,14 +1,19 @@
 import pytest
 import os
 import sys
+import tempfile
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("LOG_DIRECTORY", tempfile.mkdtemp(prefix="price-data-logs-"))
+os.environ.setdefault("DB_NAME", "test.db")
 
+from db.connection import close_connection_managers
 from db.utils import (
     create_duckdb_db,
     return_duckdb_conn,
     create_schemas,
     create_config_tables,
+    create_prices_tables,
 )
 
 
@@ -21,6 +26,7 @@ def setup_db():
     conn = return_duckdb_conn("test.db")
     create_schemas(conn)
     create_config_tables(conn)
+    create_prices_tables(conn)
     print("yest")
     yield conn
 
@@ -31,5 +37,6 @@ def teardown_session():
     Teardown function to delete the test.db file after tests are done.
     """
     yield
+    close_connection_managers()
     if os.path.exists("test.db"):
         os.remove("test.db")
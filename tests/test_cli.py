@@ -0,0 +1,86 @@
+import sys
+import os
+import datetime
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from typer.testing import CliRunner
+from db.utils import return_duckdb_conn, create_backfill_checkpoints_table
+from utils.settings import get_settings
+from cli import app, BackfillChunk, plan_backfill_chunks, write_backfill_batch
+
+
+def test_backfill_resumes_from_checkpoints():
+    """
+    Test the plan_backfill_chunks and write_backfill_batch functions.
+    Plan a backfill of four days in chunks of two and write the first chunk.
+    Assert that the written chunk is checkpointed and skipped when planning again.
+    Assert that days stored outside the backfill are left out of their chunk.
+    """
+    conn = return_duckdb_conn("test.db")
+    create_backfill_checkpoints_table(conn)
+    start_date = datetime.datetime(2015, 6, 1)
+    end_date = datetime.datetime(2015, 6, 4)
+
+    chunks = plan_backfill_chunks(
+        conn, start_date, end_date, ["NL"], ["natural_gas"], ["h"], 2, "wide"
+    )
+    assert [len(chunk.missing_dates) for chunk in chunks] == [2, 2]
+
+    prices = [np.arange(24, dtype=float)] * 2
+    assert write_backfill_batch(conn, [(chunks[0], prices)], "wide") == 2
+
+    stored_day = chunks[1].missing_dates[0]
+    write_backfill_batch(
+        conn,
+        [
+            (
+                BackfillChunk(
+                    "NL", "natural_gas", "h", stored_day, stored_day, [stored_day]
+                ),
+                [np.arange(24, dtype=float)],
+            )
+        ],
+        "wide",
+    )
+
+    chunks = plan_backfill_chunks(
+        conn, start_date, end_date, ["NL"], ["natural_gas"], ["h"], 2, "wide"
+    )
+    assert len(chunks) == 1
+    assert chunks[0].missing_dates == [datetime.datetime(2015, 6, 4)]
+
+
+def test_cli_commands(tmp_path):
+    """
+    Test the command line app through Typer.
+    Assert that the app and its commands build and print their help.
+    Assert that rebuild-daily-summary runs against a new database.
+    """
+    runner = CliRunner()
+    result = runner.invoke(app, ["--help"])
+    assert result.exit_code == 0
+    assert "backfill" in result.output
+    result = runner.invoke(app, ["backfill", "--help"])
+    assert result.exit_code == 0
+
+    db_name = str(tmp_path / "cli.db")
+    result = runner.invoke(app, ["rebuild-daily-summary", "--db-name", db_name])
+    assert result.exit_code == 0, result.output
+    assert "Daily summary rebuilt - 0 days summarised" in result.output
+    assert os.path.exists(db_name)
+
+
+def test_cli_db_name_default(tmp_path, monkeypatch):
+    """
+    Test that CLI commands default to the database named by DB_NAME.
+    Assert that rebuild-daily-summary without --db-name creates that database.
+    """
+    db_name = str(tmp_path / "settings.db")
+    monkeypatch.setenv("DB_NAME", db_name)
+    get_settings.cache_clear()
+    result = CliRunner().invoke(app, ["rebuild-daily-summary"])
+    get_settings.cache_clear()
+    assert result.exit_code == 0, result.output
+    assert os.path.exists(db_name)
@@ -0,0 +1,61 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db.utils import (
+    create_duckdb_db,
+    return_duckdb_conn,
+    create_schemas,
+    create_config_tables,
+)
+from modelling.config import (
+    PRICE_CONFIGS,
+    get_price_config,
+    invalidate_price_config,
+    price_config_key,
+)
+
+
+def test_get_price_config():
+    """
+    Test the get_price_config function.
+    Assert that power base prices are reduced by the country's energy mix.
+    Assert that other commodities use the country base price.
+    """
+    price_config = get_price_config("test.db")
+    assert price_config.get_base_price("GB", "power") == 52.0
+    assert price_config.get_base_price("GB", "crude") == 80.0
+    assert price_config.get_base_price("DE", "natural_gas") == 80.0
+
+
+def test_price_config_reload_hook():
+    """
+    Test the price config invalidation and reload hook.
+    Invalidate the cached config and force a rewrite of the config tables.
+    Assert that rewriting the config tables reloads the cached config.
+    """
+    invalidate_price_config("test.db")
+    assert price_config_key("test.db") not in PRICE_CONFIGS
+
+    create_config_tables(return_duckdb_conn("test.db"), force=True)
+    assert price_config_key("test.db") in PRICE_CONFIGS
+
+
+def test_price_config_reload_hook_in_directory(tmp_path):
+    """
+    Test the price config reload hook for a database in a directory.
+    Load the config of the database, then force a rewrite of its config tables.
+    Assert that the next get_price_config returns the reloaded config.
+    """
+    os.makedirs(tmp_path / "d")
+    db_name = str(tmp_path / "d" / "sub.db")
+    create_duckdb_db(db_name)
+    conn = return_duckdb_conn(db_name)
+    create_schemas(conn)
+    create_config_tables(conn)
+    price_config = get_price_config(db_name)
+
+    create_config_tables(conn, force=True)
+    assert get_price_config(db_name) is not price_config
+    assert get_price_config(db_name) is PRICE_CONFIGS[price_config_key(db_name)]
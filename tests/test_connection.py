@@ -0,0 +1,66 @@
+import sys
+import os
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db.connection import (
+    ConnectionManager,
+    SnapshotConnectionManager,
+    get_connection_manager,
+)
+from db.utils import return_duckdb_conn, write_database_snapshot
+
+
+def test_connection_manager_cursor():
+    """
+    Test the ConnectionManager cursor method.
+    Assert that a thread is handed the same cursor on every call.
+    Assert that another thread is handed a different cursor to the same database.
+    """
+    connection_manager = ConnectionManager("test.db")
+    cursor = connection_manager.cursor()
+    assert connection_manager.cursor() is cursor
+
+    thread_cursors = []
+    thread = threading.Thread(
+        target=lambda: thread_cursors.append(connection_manager.cursor())
+    )
+    thread.start()
+    thread.join()
+    assert thread_cursors[0] is not cursor
+    assert thread_cursors[0].execute("SELECT 1").fetchone() == (1,)
+    connection_manager.close()
+
+
+def test_get_connection_manager():
+    """
+    Test the get_connection_manager function.
+    Assert that the same manager is returned for the same database name.
+    """
+    assert get_connection_manager("test.db") is get_connection_manager("test.db")
+
+
+def test_snapshot_connection_manager_refresh(tmp_path):
+    """
+    Test the SnapshotConnectionManager cursor method.
+    Assert that a thread keeps its read-only connection while the snapshot is current.
+    Assert that it moves to a newer snapshot once one is written.
+    """
+    snapshot_directory = str(tmp_path)
+    write_database_snapshot(return_duckdb_conn("test.db"), snapshot_directory)
+    connection_manager = SnapshotConnectionManager(
+        "test.db", snapshot_directory, refresh_interval=0
+    )
+    cursor = connection_manager.cursor()
+    assert connection_manager.cursor() is cursor
+    assert cursor.execute("SELECT count(*) FROM config.country_codes").fetchone()[0]
+
+    write_database_snapshot(
+        return_duckdb_conn("test.db"), snapshot_directory, snapshots_kept=1
+    )
+    new_cursor = connection_manager.cursor()
+    assert new_cursor is not cursor
+    assert new_cursor.execute("SELECT 1").fetchone() == (1,)
+    assert len(list(tmp_path.glob("snapshot-*.db"))) == 1
+    connection_manager.close()
@@ -0,0 +1,46 @@
+import sys
+import os
+import json
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.logger import get_logger, sample_payload_log, LOGGER_SINKS
+from utils.settings import get_settings
+
+
+def test_get_logger_writes_json_lines(tmp_path, monkeypatch):
+    """
+    Test the get_logger function.
+    Assert that repeated calls for a logger name only add one file sink.
+    Assert that the sink writes one JSON object per record to LOG_DIRECTORY.
+    """
+    monkeypatch.setenv("LOG_DIRECTORY", str(tmp_path))
+    get_settings.cache_clear()
+    logger = get_logger("test-logger")
+    sink = LOGGER_SINKS["test-logger"]
+    get_logger("test-logger")
+    assert LOGGER_SINKS["test-logger"] == sink
+
+    logger.bind(request_id="abc").info("json record")
+    logger.complete()
+    logger.remove(LOGGER_SINKS.pop("test-logger"))
+    get_settings.cache_clear()
+
+    [log_path] = tmp_path.glob("test-logger-*.log")
+    record = json.loads(log_path.read_text().splitlines()[-1])
+    assert record["level"] == "INFO"
+    assert record["message"] == "json record"
+    assert record["module"] == "test_logger"
+    assert record["request_id"] == "abc"
+
+
+def test_sample_payload_log(monkeypatch):
+    """
+    Test the sample_payload_log function.
+    Assert that a sample rate of 1 logs every payload and 0 logs none.
+    """
+    for sample_rate, expected in (("1", True), ("0", False)):
+        monkeypatch.setenv("LOG_PAYLOAD_SAMPLE_RATE", sample_rate)
+        get_settings.cache_clear()
+        assert all(sample_payload_log() is expected for _ in range(100))
+    get_settings.cache_clear()
@@ -0,0 +1,276 @@
+import sys
+import os
+import json
+import polars
+import pytest
+import pyarrow.ipc
+import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import main
+
+from fastapi.testclient import TestClient
+from db.tables import CountryCodes, Commodity
+from db.utils import return_duckdb_conn, create_or_append_table_from_df
+from models.requests import GenerateCrossSectionRequest
+
+
+@pytest.fixture(scope="module")
+def client():
+    """
+    Fixture serving the API against the test database.
+    """
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def test_export_prices(client):
+    """
+    Test the export_prices endpoint.
+    Store three days of prices and export them as NDJSON and as an Arrow stream.
+    Assert that NDJSON has one JSON object per day with ISO 8601 dates.
+    Assert that the Arrow stream reads back to the stored rows.
+    """
+    for_dates = [datetime.datetime(2016, 5, day) for day in range(1, 4)]
+    prices = [[float(day), day + 0.5] for day in range(1, 4)]
+    create_or_append_table_from_df(
+        polars.DataFrame(
+            {
+                "date": for_dates,
+                "country_code": ["GB"] * 3,
+                "commodity": ["power"] * 3,
+                "granularity": ["hh"] * 3,
+                "prices": prices,
+            }
+        ),
+        "append",
+        "prices",
+        "daily_prices",
+        return_duckdb_conn("test.db"),
+    )
+    params = {
+        "start_date": "2016-05-01",
+        "end_date": "2016-05-03",
+        "country_codes": ["GB"],
+        "commodities": ["power"],
+    }
+
+    response = client.get("/prices/export", params=params)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = sorted(
+        (json.loads(line) for line in response.text.splitlines()),
+        key=lambda row: row["date"],
+    )
+    assert [row["date"] for row in rows] == [
+        "2016-05-01T00:00:00",
+        "2016-05-02T00:00:00",
+        "2016-05-03T00:00:00",
+    ]
+    assert [row["prices"] for row in rows] == prices
+    assert {row["granularity"] for row in rows} == {"hh"}
+
+    response = client.get("/prices/export", params={**params, "format": "arrow"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    table = pyarrow.ipc.open_stream(response.content).read_all()
+    exported_df = polars.from_arrow(table).sort("date")
+    assert exported_df.columns == [
+        "date",
+        "country_code",
+        "commodity",
+        "granularity",
+        "prices",
+    ]
+    assert exported_df["date"].to_list() == for_dates
+    assert exported_df["prices"].to_list() == prices
+
+
+def test_model_prices_response_cache(client, monkeypatch):
+    """
+    Test the model_prices endpoint with the response cache.
+    Store a day and request it twice as JSON, then with its ETag, then as Arrow.
+    Assert that the repeat request is served from the cache with the same ETag.
+    Assert that a matching If-None-Match is answered with 412 Precondition Failed,
+    and that no response carries Cache-Control, as the endpoint is a POST.
+    Assert that another Accept media type is looked up and cached separately.
+    Assert that freshly modelled prices are not cached.
+    """
+    create_or_append_table_from_df(
+        polars.DataFrame(
+            {
+                "date": [datetime.datetime(2016, 6, 1)],
+                "country_code": ["GB"],
+                "commodity": ["power"],
+                "granularity": ["h"],
+                "prices": [[float(hour) for hour in range(24)]],
+            }
+        ),
+        "append",
+        "prices",
+        "daily_prices",
+        return_duckdb_conn("test.db"),
+    )
+    lookups = []
+    get_or_model_daily_price = main.get_or_model_daily_price
+
+    def counting_get_or_model_daily_price(request):
+        lookups.append(request)
+        return get_or_model_daily_price(request)
+
+    monkeypatch.setattr(
+        main, "get_or_model_daily_price", counting_get_or_model_daily_price
+    )
+    main.model_prices_cache.clear()
+    body = {
+        "for_date": "2016-06-01T00:00:00",
+        "country_code": "GB",
+        "granularity": "h",
+        "commodity": "power",
+    }
+
+    response = client.post("/model-prices", json=body)
+    assert response.status_code == 200
+    assert response.json()["prices"] == [float(hour) for hour in range(24)]
+    etag = response.headers["etag"]
+    assert len(lookups) == 1
+
+    cached_response = client.post("/model-prices", json=body)
+    assert cached_response.status_code == 200
+    assert cached_response.content == response.content
+    assert cached_response.headers["etag"] == etag
+    assert cached_response.headers["content-type"] == "application/json"
+    assert "cache-control" not in cached_response.headers
+    assert len(lookups) == 1
+
+    precondition_failed = client.post(
+        "/model-prices", json=body, headers={"If-None-Match": etag}
+    )
+    assert precondition_failed.status_code == 412
+    assert precondition_failed.content == b""
+    assert precondition_failed.headers["etag"] == etag
+    assert len(lookups) == 1
+
+    arrow_response = client.post(
+        "/model-prices",
+        json=body,
+        headers={
+            "Accept": "application/vnd.apache.arrow.stream",
+            "If-None-Match": etag,
+        },
+    )
+    assert arrow_response.status_code == 200
+    assert (
+        arrow_response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    )
+    assert arrow_response.headers["etag"] != etag
+    assert len(lookups) == 2
+    assert len(main.model_prices_cache) == 2
+
+    modelled_body = {**body, "for_date": "1995-06-01T00:00:00"}
+    assert client.post("/model-prices", json=modelled_body).status_code == 200
+    assert len(lookups) == 3
+    assert len(main.model_prices_cache) == 2
+
+
+class RecordingWriter:
+    """
+    Stand-in for the daily prices writer that records the rows queued.
+    """
+
+    def __init__(self) -> None:
+        self.queued: list[polars.DataFrame] = []
+
+    def get_pending(
+        self,
+        for_date: datetime.datetime,
+        country_code: str,
+        granularity: str,
+        commodity: str,
+    ) -> list[float] | None:
+        """
+        Return None, as no row is pending.
+        """
+        return None
+
+    def put(self, df: polars.DataFrame) -> list[list[float]]:
+        """
+        Record the queued rows and return their prices.
+        """
+        self.queued.append(df)
+        return df["prices"].to_list()
+
+
+def test_get_or_model_cross_section(monkeypatch):
+    """
+    Test the get_or_model_cross_section function.
+    Store three combinations of a two-day cross-section and model the rest.
+    Assert that the response is ordered by date, country code and commodity.
+    Assert that stored combinations are returned as stored and counted as hits.
+    Assert that only the missing combinations are modelled, counted as misses
+    and queued to the writer.
+    """
+    for_dates = [datetime.datetime(2016, 8, 1), datetime.datetime(2016, 8, 2)]
+    stored = {
+        (for_dates[0], "GB", "power"): [1.0] * 24,
+        (for_dates[0], "NL", "crude"): [2.0] * 24,
+        (for_dates[1], "DE", "natural_gas"): [3.0] * 24,
+    }
+    create_or_append_table_from_df(
+        polars.DataFrame(
+            {
+                "date": [key[0] for key in stored],
+                "country_code": [key[1] for key in stored],
+                "commodity": [key[2] for key in stored],
+                "granularity": ["h"] * len(stored),
+                "prices": list(stored.values()),
+            }
+        ),
+        "append",
+        "prices",
+        "daily_prices",
+        return_duckdb_conn("test.db"),
+    )
+    writer = RecordingWriter()
+    monkeypatch.setattr(main, "daily_prices_writer", writer)
+    hits = main.DAILY_PRICE_LOOKUPS.value(result="hit")
+    misses = main.DAILY_PRICE_LOOKUPS.value(result="miss")
+
+    response = main.get_or_model_cross_section(
+        GenerateCrossSectionRequest(
+            start_date=for_dates[0], end_date=for_dates[1], granularity="h"
+        )
+    )
+
+    keys = [
+        (for_date, country_code.value, commodity.value)
+        for for_date in for_dates
+        for country_code in CountryCodes
+        for commodity in Commodity
+    ]
+    response_keys = [
+        (daily_prices.date, daily_prices.country_code, daily_prices.commodity)
+        for daily_prices in response.daily_prices
+    ]
+    assert response_keys == keys
+    for daily_prices in response.daily_prices:
+        key = (daily_prices.date, daily_prices.country_code, daily_prices.commodity)
+        if key in stored:
+            assert daily_prices.prices == stored[key]
+        else:
+            assert len(daily_prices.prices) in (23, 24, 25)
+            assert daily_prices.prices != [1.0] * 24
+    assert main.DAILY_PRICE_LOOKUPS.value(result="hit") - hits == len(stored)
+    assert main.DAILY_PRICE_LOOKUPS.value(result="miss") - misses == len(keys) - len(
+        stored
+    )
+
+    assert len(writer.queued) == 1
+    queued_df = writer.queued[0]
+    queued_keys = set(
+        zip(queued_df["date"], queued_df["country_code"], queued_df["commodity"])
+    )
+    assert queued_keys == set(keys) - set(stored)
+    assert queued_df.height == len(keys) - len(stored)
+    assert set(queued_df["granularity"]) == {"h"}
@@ -0,0 +1,37 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.metrics import Counter, Histogram, MetricsRegistry
+
+
+def test_metrics_registry_render():
+    """
+    Test the MetricsRegistry class.
+    Record a counter and a histogram with labels.
+    Assert that they render in the Prometheus text format with cumulative buckets.
+    """
+    registry = MetricsRegistry()
+    lookups = registry.register(Counter("lookups_total", "Lookups.", ("result",)))
+    stage_seconds = registry.register(
+        Histogram("stage_seconds", "Stage seconds.", ("stage",), buckets=(0.1, 1.0))
+    )
+    lookups.inc(result="hit")
+    lookups.inc(2, result="miss")
+    stage_seconds.observe(0.05, stage="lookup")
+    stage_seconds.observe(0.5, stage="lookup")
+    with stage_seconds.time(stage="model"):
+        pass
+
+    lines = registry.render().splitlines()
+    assert "# TYPE lookups_total counter" in lines
+    assert 'lookups_total{result="hit"} 1' in lines
+    assert 'lookups_total{result="miss"} 2' in lines
+    assert "# TYPE stage_seconds histogram" in lines
+    assert 'stage_seconds_bucket{stage="lookup",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="lookup",le="1"} 2' in lines
+    assert 'stage_seconds_bucket{stage="lookup",le="+Inf"} 2' in lines
+    assert 'stage_seconds_sum{stage="lookup"} 0.55' in lines
+    assert 'stage_seconds_count{stage="lookup"} 2' in lines
+    assert stage_seconds.count(stage="model") == 1
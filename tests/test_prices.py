@@ -4,7 +4,12 @@ import datetime
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from modelling.prices import model_daily_prices
+from modelling.prices import (
+    model_daily_prices,
+    model_prices_range,
+    model_price_scenarios,
+    model_cross_section_prices,
+)
 from modelling.seasonality import get_hours_in_day
 
 
@@ -31,7 +36,7 @@ def test_generate_prices():
     country_code = "GB"
     granularity = "h"
     commodity = "power"
-    db_name = "test"
+    db_name = "test.db"
 
     assert (
         model_daily_prices(date, country_code, granularity, commodity, db_name)
@@ -52,3 +57,93 @@ def test_generate_prices():
         len(model_daily_prices(date, country_code, granularity, commodity, db_name))
         == 48
     )
+
+
+def test_model_prices_range():
+    """
+    Test the model_prices_range function.
+    Assert that one price array is returned for every day in the range.
+    Assert that each array is sized to the hours in its day (2025-03-30 has 23 hours).
+    """
+    start_date = datetime.datetime(2025, 3, 28, 0, 0, 0)
+    end_date = datetime.datetime(2025, 3, 31, 0, 0, 0)
+
+    prices = model_prices_range(start_date, end_date, "GB", "h", "power", "test.db")
+    assert [len(day_prices) for day_prices in prices] == [24, 24, 23, 24]
+
+    prices = model_prices_range(start_date, end_date, "GB", "hh", "crude", "test.db")
+    assert [len(day_prices) for day_prices in prices] == [48, 48, 46, 48]
+
+
+def test_seeded_prices_are_reproducible():
+    """
+    Test seeded price generation.
+    Assert that a seeded day is modelled identically on every call, alone or in a range.
+    Assert that another country is modelled differently on the same day.
+    """
+    date = datetime.datetime(2025, 3, 30, 0, 0, 0)
+
+    prices = model_daily_prices(date, "GB", "hh", "power", "test.db", seeded=True)
+    assert (
+        prices == model_daily_prices(date, "GB", "hh", "power", "test.db", seeded=True)
+    ).all()
+
+    range_prices = model_prices_range(
+        date - datetime.timedelta(days=1),
+        date,
+        "GB",
+        "hh",
+        "power",
+        "test.db",
+        seeded=True,
+    )
+    assert (range_prices[1] == prices).all()
+
+    other_prices = model_daily_prices(date, "FR", "hh", "power", "test.db", seeded=True)
+    assert not (other_prices == prices).all()
+
+
+def test_model_price_scenarios():
+    """
+    Test the model_price_scenarios function.
+    Assert that every day holds one simulated path per scenario, sized to its periods.
+    Assert that the P5, P50 and P95 percentiles are ordered in every period.
+    """
+    for_dates = [
+        datetime.datetime(2025, 3, 29, 0, 0, 0),
+        datetime.datetime(2025, 3, 30, 0, 0, 0),
+    ]
+    scenarios, percentiles = model_price_scenarios(
+        for_dates, "GB", "hh", "power", "test.db", 200
+    )
+    assert [day_scenarios.shape for day_scenarios in scenarios] == [
+        (200, 48),
+        (200, 46),
+    ]
+    assert [day_percentiles.shape for day_percentiles in percentiles] == [
+        (3, 48),
+        (3, 46),
+    ]
+    for day_percentiles in percentiles:
+        assert (day_percentiles[0] <= day_percentiles[1]).all()
+        assert (day_percentiles[1] <= day_percentiles[2]).all()
+
+
+def test_model_cross_section_prices():
+    """
+    Test the model_cross_section_prices function.
+    Model every country and commodity for two days, the second a 23 hour day.
+    Assert that the tensor has one slice per country, commodity and day.
+    Assert that each seeded slice matches the prices modelled for that combination alone.
+    """
+    date = datetime.datetime(2025, 3, 30, 0, 0, 0)
+    country_codes, commodities, prices, periods_in_dates = model_cross_section_prices(
+        [date - datetime.timedelta(days=1), date], "h", "test.db", seeded=True
+    )
+    assert prices.shape == (len(country_codes), len(commodities), 2, 24)
+    assert periods_in_dates.tolist() == [24, 23]
+
+    gb_power = prices[country_codes.index("GB"), commodities.index("power"), 1, :23]
+    assert (
+        gb_power == model_daily_prices(date, "GB", "h", "power", "test.db", seeded=True)
+    ).all()
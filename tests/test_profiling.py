@@ -0,0 +1,148 @@
+import sys
+import os
+import httpx
+import pstats
+import asyncio
+import cProfile
+import datetime
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi import FastAPI
+from utils.profiling import (
+    ACTIVE_PROFILE,
+    ProfilingMiddleware,
+    RequestProfile,
+    disable_profiler,
+    enable_profiler,
+    profile_in_thread,
+)
+
+
+def work(n: int) -> int:
+    """
+    Return the sum of the first n integers.
+    """
+    return sum(range(n))
+
+
+def test_request_profile_merges_threads(tmp_path):
+    """
+    Test the RequestProfile class and profile_in_thread function.
+    Run work on two executor threads, one after the other, while a request profile
+    is active.
+    Assert that both runs are merged into one pstats file tagged with the request key.
+    Assert that functions are not wrapped when no profile is active.
+    """
+    assert profile_in_thread(work) is work
+
+    profile = RequestProfile("req/1", "/model-prices")
+    profile.key = (datetime.datetime(2024, 1, 1), "GB")
+    token = ACTIVE_PROFILE.set(profile)
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = [
+                executor.submit(profile_in_thread(work), n).result() for n in (10, 100)
+            ]
+    finally:
+        ACTIVE_PROFILE.reset(token)
+    assert results == [45, 4950]
+
+    path = profile.dump(str(tmp_path))
+    assert os.path.dirname(path) == str(tmp_path)
+    assert "2024_01_01_00_00_00_GB" in os.path.basename(path)
+    assert os.path.basename(path).endswith("-req_1.pstats")
+
+    stats = pstats.Stats(path)
+    work_stats = [
+        stat for function, stat in stats.stats.items() if function[2] == "work"
+    ]
+    assert work_stats[0][1] == 2
+
+
+def test_request_profile_skips_while_another_profiler_runs():
+    """
+    Test the RequestProfile run method while another thread has a profiler enabled.
+    Assert that from Python 3.12, where one profiler runs per process, the function
+    still runs and is counted as skipped, and that it is profiled before 3.12.
+    """
+    profile = RequestProfile("req-2", "/model-prices")
+    other_profiler = cProfile.Profile()
+    assert enable_profiler(other_profiler)
+    results = []
+    try:
+        thread = threading.Thread(target=lambda: results.append(profile.run(work, 10)))
+        thread.start()
+        thread.join()
+    finally:
+        disable_profiler(other_profiler)
+    assert results == [45]
+    assert profile.skipped == (1 if sys.version_info >= (3, 12) else 0)
+
+
+def loop_work() -> int:
+    """
+    Return a sum computed on the event loop.
+    """
+    return sum(range(1000))
+
+
+def other_loop_work() -> int:
+    """
+    Return a sum computed on the event loop by an unprofiled request.
+    """
+    return sum(range(1000))
+
+
+def test_profiling_middleware_profiles_one_request(tmp_path):
+    """
+    Test the ProfilingMiddleware end to end.
+    Serve a profiled request, which runs work on the loop and in an executor thread,
+    alongside an unprofiled request that runs other work on the loop.
+    Assert that both requests succeed and one pstats file is written.
+    Assert that it holds the profiled request's loop and executor work, and none of
+    the other request's work.
+    """
+    app = FastAPI()
+
+    @app.get("/profiled")
+    async def profiled() -> dict:
+        for _ in range(3):
+            loop_work()
+            await asyncio.sleep(0.01)
+        result = await asyncio.get_running_loop().run_in_executor(
+            None, profile_in_thread(work), 100
+        )
+        return {"result": result}
+
+    @app.get("/other")
+    async def other() -> dict:
+        for _ in range(3):
+            other_loop_work()
+            await asyncio.sleep(0.01)
+        return {"result": other_loop_work()}
+
+    profiled_app = ProfilingMiddleware(
+        app, directory=str(tmp_path), header_enabled=True
+    )
+
+    async def serve_requests() -> list[httpx.Response]:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=profiled_app), base_url="http://test"
+        ) as client:
+            return await asyncio.gather(
+                client.get("/profiled", headers={"X-Profile": "1"}),
+                client.get("/other"),
+            )
+
+    responses = asyncio.run(serve_requests())
+    assert [response.status_code for response in responses] == [200, 200]
+    assert responses[0].json() == {"result": 4950}
+
+    [path] = tmp_path.glob("profile-*.pstats")
+    functions = {function[2] for function in pstats.Stats(str(path)).stats}
+    assert {"profiled", "loop_work", "work"} <= functions
+    assert "other_loop_work" not in functions
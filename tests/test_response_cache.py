@@ -0,0 +1,69 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi import Response
+from utils.response_cache import ResponseCache, etag_matches
+
+
+def test_response_cache_evicts_least_recently_used():
+    """
+    Test the ResponseCache get and put methods.
+    Cache three responses in a cache of two after reading the first one again.
+    Assert that the least recently used response is evicted.
+    Assert that responses expire after the ttl.
+    """
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", Response(b"a", media_type="application/json"))
+    cache.put("b", Response(b"b", media_type="application/json"))
+    assert cache.get("a").body == b"a"
+    cache.put("c", Response(b"c", media_type="application/json"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert len(cache) == 2
+
+    expired_cache = ResponseCache(ttl=0)
+    expired_cache.put("a", Response(b"a"))
+    assert expired_cache.get("a") is None
+
+
+def test_response_cache_respond():
+    """
+    Test the ResponseCache respond method and the etag_matches function.
+    Assert that a cached response is replayed with its headers, ETag and Cache-Control.
+    Assert that a matching If-None-Match is answered with 304 Not Modified.
+    Assert that a POST is answered with 412 Precondition Failed instead, and that
+    POST responses carry no Cache-Control.
+    """
+    cache = ResponseCache(ttl=60)
+    entry = cache.put(
+        "a",
+        Response(
+            b"\x00\x01",
+            media_type="application/octet-stream",
+            headers={"X-Price-Periods": "2"},
+        ),
+    )
+
+    response = cache.respond(entry, None)
+    assert response.status_code == 200
+    assert response.body == b"\x00\x01"
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert response.headers["x-price-periods"] == "2"
+    assert response.headers["etag"] == entry.etag
+    assert response.headers["cache-control"] == "public, max-age=60"
+
+    not_modified = cache.respond(entry, f'"other", W/{entry.etag}')
+    assert not_modified.status_code == 304
+    assert not_modified.body == b""
+    precondition_failed = cache.respond(entry, entry.etag, "POST")
+    assert precondition_failed.status_code == 412
+    assert "cache-control" not in precondition_failed.headers
+    post_response = cache.respond(entry, '"other"', "POST")
+    assert post_response.status_code == 200
+    assert post_response.headers["etag"] == entry.etag
+    assert "cache-control" not in post_response.headers
+
+    assert not etag_matches('"other"', entry.etag)
+    assert etag_matches("*", entry.etag)
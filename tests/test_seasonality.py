@@ -18,3 +18,9 @@ def test_get_season():
 
     date = datetime(2022, 12, 21)
     assert get_season(date) == "winter"
+
+    date = datetime(2022, 1, 15)
+    assert get_season(date) == "winter"
+
+    date = datetime(2022, 6, 20, 18, 0)
+    assert get_season(date) == "spring"
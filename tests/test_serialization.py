@@ -0,0 +1,80 @@
+import sys
+import os
+import datetime
+import numpy as np
+import pyarrow
+import json
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from models.responses import GeneratePricesResponse, GeneratePricesRangeResponse
+from utils.serialization import (
+    JSON_MEDIA_TYPE,
+    ARROW_MEDIA_TYPE,
+    PACKED_MEDIA_TYPE,
+    PRICES_MEDIA_TYPES,
+    negotiate_media_type,
+    render_daily_prices,
+)
+
+DAILY_PRICES = [
+    GeneratePricesResponse(
+        commodity="power",
+        date=datetime.datetime(2024, 1, day),
+        country_code="GB",
+        granularity="h",
+        prices=[float(day), 2.5],
+    )
+    for day in (1, 2)
+]
+RANGE_RESPONSE = GeneratePricesRangeResponse(
+    commodity="power",
+    start_date=datetime.datetime(2024, 1, 1),
+    end_date=datetime.datetime(2024, 1, 2),
+    country_code="GB",
+    granularity="h",
+    daily_prices=DAILY_PRICES,
+)
+
+
+def test_negotiate_media_type():
+    """
+    Test the negotiate_media_type function.
+    Assert that JSON is the default, quality values order the accepted types and
+    wildcards or unsupported types fall back to JSON.
+    """
+    assert negotiate_media_type(None, PRICES_MEDIA_TYPES) == JSON_MEDIA_TYPE
+    assert (
+        negotiate_media_type(
+            "application/json;q=0.5, application/vnd.apache.arrow.stream",
+            PRICES_MEDIA_TYPES,
+        )
+        == ARROW_MEDIA_TYPE
+    )
+    assert negotiate_media_type("*/*", PRICES_MEDIA_TYPES) == JSON_MEDIA_TYPE
+    assert negotiate_media_type("text/html", PRICES_MEDIA_TYPES) == JSON_MEDIA_TYPE
+    assert (
+        negotiate_media_type("application/octet-stream;q=0", PRICES_MEDIA_TYPES)
+        == JSON_MEDIA_TYPE
+    )
+
+
+def test_render_daily_prices():
+    """
+    Test the render_daily_prices function.
+    Assert that JSON, Arrow and packed responses hold the same prices.
+    """
+    response = render_daily_prices(RANGE_RESPONSE, None)
+    content = json.loads(response.body)
+    assert content["daily_prices"][0]["date"] == "2024-01-01T00:00:00"
+    assert content["daily_prices"][1]["prices"] == [2.0, 2.5]
+
+    response = render_daily_prices(RANGE_RESPONSE, ARROW_MEDIA_TYPE)
+    table = pyarrow.ipc.open_stream(response.body).read_all()
+    assert table["prices"].to_pylist() == [[1.0, 2.5], [2.0, 2.5]]
+    assert table["country_code"].to_pylist() == ["GB", "GB"]
+
+    response = render_daily_prices(DAILY_PRICES[0], PACKED_MEDIA_TYPE)
+    assert response.media_type == PACKED_MEDIA_TYPE
+    assert response.headers["X-Price-Periods"] == "2"
+    assert np.frombuffer(response.body, dtype="<f8").tolist() == [1.0, 2.5]
@@ -0,0 +1,68 @@
+import sys
+import os
+import polars
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modelling.shapes import (
+    get_peak_mask,
+    get_peak_periods_df,
+    get_shape,
+    get_shape_matrix,
+)
+
+
+def test_get_peak_mask():
+    """
+    Test the get_peak_mask function.
+    Assert that hourly masks flag the peak hours of the season and commodity.
+    Assert that half-hourly masks flag both half-hours of every peak hour.
+    Assert that peak hours keep their clock time on 23 and 25 hour days.
+    """
+    peak_mask = get_peak_mask("spring", "power", "h", 24)
+    assert np.flatnonzero(peak_mask).tolist() == list(range(8, 18))
+
+    peak_mask = get_peak_mask("spring", "power", "hh", 48)
+    assert np.flatnonzero(peak_mask).tolist() == list(range(16, 36))
+
+    peak_mask = get_peak_mask("spring", "power", "h", 23)
+    assert np.flatnonzero(peak_mask).tolist() == list(range(7, 17))
+
+    peak_mask = get_peak_mask("autumn", "power", "h", 25)
+    assert np.flatnonzero(peak_mask).tolist() == list(range(9, 19))
+
+
+def test_get_shape_matrix():
+    """
+    Test the get_shape_matrix function.
+    Assert that each row holds the shape of its day, padded with zeros.
+    """
+    shape_matrix = get_shape_matrix(
+        np.array(["winter", "spring"]), "crude", "h", np.array([24, 23])
+    )
+    assert shape_matrix.shape == (2, 24)
+    assert (shape_matrix[0] == get_shape("winter", "crude", "h", 24)).all()
+    assert (shape_matrix[1, :23] == get_shape("spring", "crude", "h", 23)).all()
+    assert shape_matrix[1, 23] == 0
+
+
+def test_get_peak_periods_df():
+    """
+    Test the get_peak_periods_df function.
+    Assert that there is one row per season, commodity, granularity and day length.
+    Assert that the 1-based peak and off-peak periods split the day's peak mask.
+    """
+    df = get_peak_periods_df()
+    assert df.shape[0] == 4 * 3 * 2 * 3
+
+    row = df.row(
+        by_predicate=(polars.col("season") == "winter")
+        & (polars.col("commodity") == "power")
+        & (polars.col("granularity") == "hh")
+        & (polars.col("periods_in_day") == 50),
+        named=True,
+    )
+    peak_mask = get_peak_mask("winter", "power", "hh", 50)
+    assert row["peak_periods"] == (np.flatnonzero(peak_mask) + 1).tolist()
+    assert len(row["peak_periods"]) + len(row["off_peak_periods"]) == 50
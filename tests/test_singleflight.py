@@ -0,0 +1,34 @@
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.singleflight import SingleFlight
+
+
+def test_single_flight_coalesces_calls():
+    """
+    Test the SingleFlight class.
+    Start five concurrent calls for the same key and one for another key.
+    Assert that the shared key only runs once and every caller gets its result.
+    Assert that no keys remain in flight afterwards.
+    """
+    single_flight = SingleFlight()
+    calls = []
+
+    async def call(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key
+
+    async def run():
+        return await asyncio.gather(
+            *[single_flight.do("a", lambda: call("a")) for _ in range(5)],
+            single_flight.do("b", lambda: call("b")),
+        )
+
+    results = asyncio.run(run())
+    assert results == ["a", "a", "a", "a", "a", "b"]
+    assert calls == ["a", "b"]
+    assert single_flight.in_flight() == 0
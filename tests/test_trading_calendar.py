@@ -0,0 +1,37 @@
+import sys
+import os
+import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modelling.trading_calendar import get_trading_calendar
+
+
+def test_trading_calendar_lookup():
+    """
+    Test the TradingCalendar lookup method.
+    Assert that seasons, hours in day and DST flags are returned for every date,
+    including the 23 and 25 hour days of the Europe/London clock changes.
+    """
+    trading_calendar = get_trading_calendar("Europe/London")
+    seasons, hours_in_day, is_dst = trading_calendar.lookup(
+        [
+            datetime.datetime(2025, 1, 15),
+            datetime.datetime(2025, 3, 30),
+            datetime.datetime(2025, 7, 1),
+            datetime.datetime(2025, 10, 26),
+        ]
+    )
+    assert seasons.tolist() == ["winter", "spring", "summer", "autumn"]
+    assert hours_in_day.tolist() == [24, 23, 24, 25]
+    assert is_dst.tolist() == [False, True, True, False]
+
+
+def test_trading_calendar_outside_span():
+    """
+    Test the TradingCalendar fallback for dates outside the precomputed span.
+    Assert that the season and hours in day are still returned.
+    """
+    trading_calendar = get_trading_calendar("Europe/London", 2025, 2025)
+    assert trading_calendar.get_season(datetime.datetime(2030, 3, 31)) == "spring"
+    assert trading_calendar.get_hours_in_day(datetime.datetime(2030, 3, 31)) == 23
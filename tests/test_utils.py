@@ -1,6 +1,11 @@
 import sys
 import os
 import polars
+import duckdb
+import pyarrow
+import pytest
+import typer
+import datetime
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
@@ -12,7 +17,22 @@ from db.utils import (
     select_duckdb_table,
     check_table_exists,
     create_config_tables,
+    create_prices_tables,
+    delete_duplicate_daily_prices,
+    select_daily_price,
+    select_daily_prices_range,
+    migrate_daily_prices_to_long,
+    insert_daily_prices_long,
+    select_daily_prices_long,
+    stream_daily_prices,
+    archive_daily_prices,
+    select_archive_directory,
+    create_daily_prices_views,
+    select_daily_price_aggregates,
+    rebuild_daily_summary,
+    insert_daily_summary,
 )
+from modelling.shapes import get_peak_periods_df
 
 
 def test_create_duckdb_db():
@@ -106,3 +126,424 @@ def test_create_config_tables():
         "SELECT 1 FROM information_schema.tables WHERE table_name = 'country_codes'"
     ).fetchone()
     assert table_exists == (1,)
+
+
+def test_create_config_tables_skips_unchanged_config():
+    """
+    Test the create_config_tables function with a stored config checksum.
+    Assert that unchanged config tables are not rewritten.
+    Assert that a missing config table or a forced call rewrites the tables.
+    """
+    conn = return_duckdb_conn("test.db")
+    create_config_tables(conn)
+    assert create_config_tables(conn) is False
+    assert create_config_tables(conn, force=True) is True
+
+    conn.execute("DROP TABLE config.granularity")
+    assert create_config_tables(conn) is True
+    assert check_table_exists("config", "granularity", conn)
+
+
+def test_create_prices_tables_refuses_duplicates(tmp_path):
+    """
+    Test the create_prices_tables and delete_duplicate_daily_prices functions.
+    Store a day twice in a prices.daily_prices table without the key index.
+    Assert that creating the prices tables exits and deletes nothing.
+    Assert that the duplicate is deleted explicitly, after which the tables are created.
+    """
+    conn = duckdb.connect(str(tmp_path / "duplicates.db"))
+    create_schemas(conn)
+    df = polars.DataFrame(
+        {
+            "date": [datetime.datetime(2015, 1, 1)] * 2,
+            "country_code": ["DE", "DE"],
+            "commodity": ["power", "power"],
+            "granularity": ["h", "h"],
+            "prices": [[1.0], [2.0]],
+        }
+    )
+    create_or_append_table_from_df(df, "create", "prices", "daily_prices", conn)
+
+    with pytest.raises(typer.Exit):
+        create_prices_tables(conn)
+    assert select_duckdb_table(conn, "prices", "daily_prices").height == 2
+
+    assert delete_duplicate_daily_prices(conn) == 1
+    create_prices_tables(conn)
+    assert select_duckdb_table(conn, "prices", "daily_prices")["prices"].to_list() == [
+        [1.0]
+    ]
+    conn.close()
+
+
+def test_select_daily_price():
+    """
+    Test the select_daily_price and select_daily_prices_range functions.
+    Create the prices tables and append two daily price entries.
+    Assert that a point lookup returns only the matching entry.
+    Assert that a range lookup returns both entries.
+    """
+    conn = return_duckdb_conn("test.db")
+    create_prices_tables(conn)
+    df = polars.DataFrame(
+        {
+            "date": [datetime.datetime(2020, 1, 1), datetime.datetime(2020, 1, 2)],
+            "country_code": ["GB", "GB"],
+            "commodity": ["power", "power"],
+            "granularity": ["h", "h"],
+            "prices": [[1.0, 2.0], [3.0, 4.0]],
+        }
+    )
+    create_or_append_table_from_df(df, "append", "prices", "daily_prices", conn)
+
+    selected_df = select_daily_price(
+        conn, datetime.datetime(2020, 1, 2), "GB", "h", "power"
+    )
+    assert selected_df["prices"].to_list() == [[3.0, 4.0]]
+
+    selected_df = select_daily_prices_range(
+        conn,
+        datetime.datetime(2020, 1, 1),
+        datetime.datetime(2020, 1, 2),
+        "GB",
+        "h",
+        "power",
+    )
+    assert selected_df.shape[0] == 2
+
+
+def test_migrate_daily_prices_to_long():
+    """
+    Test the migrate_daily_prices_to_long and select_daily_prices_long functions.
+    Append a daily price entry and migrate prices.daily_prices to the long layout.
+    Assert that one row is written per period and a re-run writes nothing.
+    Assert that the prices list is reassembled in period order.
+    Assert that a batch mixing a stored and a new day only writes and counts the
+    new day.
+    """
+    conn = return_duckdb_conn("test.db")
+    create_prices_tables(conn)
+    df = polars.DataFrame(
+        {
+            "date": [datetime.datetime(2019, 6, 1)],
+            "country_code": ["NL"],
+            "commodity": ["natural_gas"],
+            "granularity": ["h"],
+            "prices": [[5.0, 3.0, 4.0]],
+        }
+    )
+    create_or_append_table_from_df(df, "append", "prices", "daily_prices", conn)
+
+    assert migrate_daily_prices_to_long(conn) >= 3
+    assert migrate_daily_prices_to_long(conn) == 0
+
+    selected_df = select_daily_prices_long(
+        conn,
+        datetime.datetime(2019, 6, 1),
+        datetime.datetime(2019, 6, 1),
+        "NL",
+        "h",
+        "natural_gas",
+    )
+    assert selected_df["prices"].to_list() == [[5.0, 3.0, 4.0]]
+
+    batch_df = polars.DataFrame(
+        {
+            "date": [datetime.datetime(2019, 6, 1), datetime.datetime(2019, 6, 2)],
+            "country_code": ["NL", "NL"],
+            "commodity": ["natural_gas", "natural_gas"],
+            "granularity": ["h", "h"],
+            "prices": [[9.0, 9.0, 9.0], [1.0, 2.0, 3.0]],
+        }
+    )
+    conn.register("long_batch", batch_df)
+    try:
+        assert insert_daily_prices_long(conn, "long_batch") == 1
+    finally:
+        conn.unregister("long_batch")
+    selected_df = select_daily_prices_long(
+        conn,
+        datetime.datetime(2019, 6, 1),
+        datetime.datetime(2019, 6, 2),
+        "NL",
+        "h",
+        "natural_gas",
+    )
+    assert selected_df.sort("date")["prices"].to_list() == [
+        [5.0, 3.0, 4.0],
+        [1.0, 2.0, 3.0],
+    ]
+
+
+def test_stream_daily_prices():
+    """
+    Test the stream_daily_prices function.
+    Append daily price entries for two countries.
+    Assert that the reader yields batches of at most batch_rows rows.
+    Assert that the country filter only returns matching entries without ids.
+    """
+    conn = return_duckdb_conn("test.db")
+    create_prices_tables(conn)
+    df = polars.DataFrame(
+        {
+            "date": [datetime.datetime(2018, 1, day) for day in range(1, 6)] * 2,
+            "country_code": ["GB"] * 5 + ["DE"] * 5,
+            "commodity": ["crude"] * 10,
+            "granularity": ["h"] * 10,
+            "prices": [[1.0, 2.0]] * 10,
+        }
+    )
+    create_or_append_table_from_df(df, "append", "prices", "daily_prices", conn)
+
+    reader = stream_daily_prices(
+        conn,
+        datetime.datetime(2018, 1, 1),
+        datetime.datetime(2018, 1, 5),
+        ["DE"],
+        ["crude"],
+        batch_rows=2,
+    )
+    batches = list(reader)
+    assert all(batch.num_rows <= 2 for batch in batches)
+
+    streamed_df = polars.from_arrow(pyarrow.Table.from_batches(batches, reader.schema))
+    assert streamed_df.columns == [
+        "date",
+        "country_code",
+        "commodity",
+        "granularity",
+        "prices",
+    ]
+    assert streamed_df.shape[0] == 5
+    assert streamed_df["country_code"].unique().to_list() == ["DE"]
+
+
+def test_stream_daily_prices_long():
+    """
+    Test the stream_daily_prices function with the long layout.
+    Append 70 days of daily price entries and migrate them to the long layout.
+    Assert that the days are streamed across several date windows, each with its
+    prices reassembled in period order.
+    Assert that an export matching nothing yields no rows.
+    """
+    conn = return_duckdb_conn("test.db")
+    create_prices_tables(conn)
+    for_dates = [
+        datetime.datetime(2017, 1, 1) + datetime.timedelta(days=day)
+        for day in range(70)
+    ]
+    df = polars.DataFrame(
+        {
+            "date": for_dates,
+            "country_code": ["FR"] * 70,
+            "commodity": ["natural_gas"] * 70,
+            "granularity": ["hh"] * 70,
+            "prices": [[float(day), day + 0.5, day + 0.25] for day in range(70)],
+        }
+    )
+    create_or_append_table_from_df(df, "append", "prices", "daily_prices", conn)
+    migrate_daily_prices_to_long(conn)
+
+    reader = stream_daily_prices(
+        conn,
+        datetime.datetime(2017, 1, 1),
+        datetime.datetime(2017, 12, 31),
+        ["FR"],
+        ["natural_gas"],
+        layout="long",
+        batch_rows=16,
+    )
+    streamed_df = polars.from_arrow(
+        pyarrow.Table.from_batches(list(reader), reader.schema)
+    ).sort("date")
+    assert streamed_df["date"].to_list() == for_dates
+    assert streamed_df["prices"].to_list() == df["prices"].to_list()
+
+    reader = stream_daily_prices(
+        conn,
+        datetime.datetime(1990, 1, 1),
+        datetime.datetime(1990, 1, 2),
+        layout="long",
+    )
+    assert sum(batch.num_rows for batch in reader) == 0
+
+
+def test_archive_daily_prices(tmp_path):
+    """
+    Test the archive_daily_prices function.
+    Append daily price entries in two years and archive the first year.
+    Assert that the archive is partitioned by commodity, country code and year.
+    Assert that archived entries leave the table but are still selected.
+    Assert that the archive directory is stored, so recreating the views keeps
+    reading it, and that a missing or different archive directory exits.
+    """
+    conn = return_duckdb_conn("test.db")
+    create_prices_tables(conn)
+    df = polars.DataFrame(
+        {
+            "date": [datetime.datetime(2010, 3, 1), datetime.datetime(2011, 3, 1)],
+            "country_code": ["FR", "FR"],
+            "commodity": ["power", "power"],
+            "granularity": ["hh", "hh"],
+            "prices": [[1.0, 2.0], [3.0, 4.0]],
+        }
+    )
+    create_or_append_table_from_df(df, "append", "prices", "daily_prices", conn)
+
+    archive_directory = str(tmp_path / "archive")
+    rows = archive_daily_prices(conn, datetime.datetime(2011, 1, 1), archive_directory)
+    assert rows >= 1
+    assert os.path.isdir(
+        os.path.join(
+            archive_directory, "commodity=power", "country_code=FR", "year=2010"
+        )
+    )
+    assert (
+        not select_duckdb_table(conn, "prices", "daily_prices")
+        .filter(polars.col("date") < datetime.datetime(2011, 1, 1))
+        .shape[0]
+    )
+
+    selected_df = select_daily_price(
+        conn, datetime.datetime(2010, 3, 1), "FR", "hh", "power"
+    )
+    assert selected_df["prices"].to_list() == [[1.0, 2.0]]
+
+    selected_df = select_daily_prices_range(
+        conn,
+        datetime.datetime(2010, 1, 1),
+        datetime.datetime(2011, 12, 31),
+        "FR",
+        "hh",
+        "power",
+    )
+    assert selected_df["prices"].to_list() == [[1.0, 2.0], [3.0, 4.0]]
+
+    assert select_archive_directory(conn) == os.path.abspath(archive_directory)
+    create_daily_prices_views(conn)
+    selected_df = select_daily_price(
+        conn, datetime.datetime(2010, 3, 1), "FR", "hh", "power"
+    )
+    assert selected_df["prices"].to_list() == [[1.0, 2.0]]
+
+    with pytest.raises(typer.Exit):
+        archive_daily_prices(
+            conn, datetime.datetime(2011, 1, 1), str(tmp_path / "other_archive")
+        )
+
+    moved_directory = str(tmp_path / "moved_archive")
+    os.rename(archive_directory, moved_directory)
+    try:
+        with pytest.raises(typer.Exit):
+            create_daily_prices_views(conn)
+    finally:
+        os.rename(moved_directory, archive_directory)
+
+
+def test_select_daily_price_aggregates():
+    """
+    Test the select_daily_price_aggregates function.
+    Append two summer days of hourly prices with a higher price in peak hours.
+    Summarise them from a relation holding other prices for the same days.
+    Assert that the summary is computed from the stored prices.
+    Assert that daily aggregates split the prices into base, peak and off-peak.
+    Assert that monthly aggregates average the periods of both days.
+    """
+    conn = return_duckdb_conn("test.db")
+    create_prices_tables(conn)
+    for_dates = [datetime.datetime(2016, 7, 1), datetime.datetime(2016, 7, 2)]
+    peak_hours = range(9, 19)
+    df = polars.DataFrame(
+        {
+            "date": for_dates,
+            "country_code": ["GB", "GB"],
+            "commodity": ["power", "power"],
+            "granularity": ["h", "h"],
+            "prices": [
+                [30.0 if hour in peak_hours else 10.0 for hour in range(24)],
+                [50.0 if hour in peak_hours else 20.0 for hour in range(24)],
+            ],
+        }
+    )
+    create_or_append_table_from_df(df, "append", "prices", "daily_prices", conn)
+    seasons = polars.DataFrame({"date": for_dates, "season": ["summer", "summer"]})
+    conn.register(
+        "resubmitted_daily_prices",
+        df.with_columns(polars.lit([0.0] * 24).alias("prices")),
+    )
+    try:
+        assert (
+            insert_daily_summary(
+                conn, "resubmitted_daily_prices", seasons, get_peak_periods_df()
+            )
+            == 2
+        )
+    finally:
+        conn.unregister("resubmitted_daily_prices")
+
+    daily_df = select_daily_price_aggregates(
+        conn,
+        for_dates[0],
+        for_dates[-1],
+        "day",
+        seasons,
+        get_peak_periods_df(),
+        ["GB"],
+        ["power"],
+    )
+    assert daily_df["days"].to_list() == [1, 1]
+    assert daily_df["peak"].to_list() == [30.0, 50.0]
+    assert daily_df["off_peak"].to_list() == [10.0, 20.0]
+    assert daily_df["base"][0] == (10 * 30.0 + 14 * 10.0) / 24
+
+    monthly_df = select_daily_price_aggregates(
+        conn,
+        for_dates[0],
+        for_dates[-1],
+        "month",
+        seasons,
+        get_peak_periods_df(),
+        ["GB"],
+        ["power"],
+    )
+    assert monthly_df["period_start"].to_list() == [datetime.datetime(2016, 7, 1)]
+    assert monthly_df["days"].to_list() == [2]
+    assert monthly_df["peak"].to_list() == [40.0]
+    assert monthly_df["off_peak"].to_list() == [15.0]
+
+
+def test_rebuild_daily_summary():
+    """
+    Test the rebuild_daily_summary function.
+    Append a daily price entry without a summary, then rebuild the summary.
+    Assert that the entry is summarised, with peak means left null for days
+    without a season.
+    """
+    conn = return_duckdb_conn("test.db")
+    create_prices_tables(conn)
+    df = polars.DataFrame(
+        {
+            "date": [datetime.datetime(2014, 2, 1)],
+            "country_code": ["DE"],
+            "commodity": ["crude"],
+            "granularity": ["h"],
+            "prices": [[1.0, 3.0]],
+        }
+    )
+    create_or_append_table_from_df(df, "append", "prices", "daily_prices", conn)
+
+    rows = rebuild_daily_summary(
+        conn, polars.DataFrame({"date": [], "season": []}), get_peak_periods_df()
+    )
+    assert (
+        rows
+        == conn.execute("SELECT count(*) FROM prices.daily_prices_all").fetchone()[0]
+    )
+    summary = conn.execute(
+        """
+        SELECT periods, min_price, max_price, mean_price, peak_mean
+        FROM prices.daily_summary
+        WHERE date = '2014-02-01' AND country_code = 'DE'
+        """
+    ).fetchone()
+    assert summary == (2, 1.0, 3.0, 2.0, None)
@@ -0,0 +1,163 @@
+import sys
+import os
+import datetime
+import polars
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db.utils import return_duckdb_conn
+from db.writer import DailyPricesWriter
+
+
+def test_daily_prices_writer():
+    """
+    Test the DailyPricesWriter class.
+    Queue two daily price rows, one of which repeats an existing key.
+    Assert that queued rows are readable before they are flushed.
+    Assert that flushing writes each key once with its own sequence id.
+    """
+    conn = return_duckdb_conn("test.db")
+    writer = DailyPricesWriter("test.db")
+    df = polars.DataFrame(
+        {
+            "date": [datetime.datetime(2021, 1, 1), datetime.datetime(2021, 1, 2)],
+            "country_code": ["FR", "FR"],
+            "commodity": ["crude", "crude"],
+            "granularity": ["h", "h"],
+            "prices": [[1.0, 2.0], [3.0, 4.0]],
+        }
+    )
+    writer.put(df)
+    assert writer.get_pending(datetime.datetime(2021, 1, 2), "FR", "h", "crude") == [
+        3.0,
+        4.0,
+    ]
+    assert writer.flush() == 2
+    assert writer.get_pending(datetime.datetime(2021, 1, 2), "FR", "h", "crude") is None
+
+    writer.put(df.head(1))
+    writer.stop()
+
+    rows = conn.execute(
+        "SELECT id FROM prices.daily_prices WHERE country_code = 'FR' "
+        "AND commodity = 'crude' ORDER BY date"
+    ).fetchall()
+    assert len(rows) == 2
+    assert rows[0][0] != rows[1][0]
+
+
+def test_daily_prices_writer_summarises_rows():
+    """
+    Test the DailyPricesWriter class with prices.daily_summary.
+    Queue and flush one winter day of hourly prices, higher in peak hours.
+    Assert that the day is summarised in the same flush.
+    """
+    conn = return_duckdb_conn("test.db")
+    writer = DailyPricesWriter("test.db")
+    peak_hours = range(7, 17)
+    writer.put(
+        polars.DataFrame(
+            {
+                "date": [datetime.datetime(2021, 1, 5)],
+                "country_code": ["NL"],
+                "commodity": ["power"],
+                "granularity": ["h"],
+                "prices": [[20.0 if hour in peak_hours else 5.0 for hour in range(24)]],
+            }
+        )
+    )
+    assert writer.flush() == 1
+
+    summary = conn.execute(
+        """
+        SELECT periods, min_price, max_price, peak_mean, off_peak_mean
+        FROM prices.daily_summary
+        WHERE date = '2021-01-05' AND country_code = 'NL' AND commodity = 'power'
+        """
+    ).fetchone()
+    assert summary == (24, 5.0, 20.0, 20.0, 5.0)
+
+
+def test_daily_prices_writer_keeps_rows_when_write_fails(monkeypatch):
+    """
+    Test the DailyPricesWriter flush method when the write fails.
+    Queue two rows and fail the write after another row for one key is queued.
+    Assert that the row queued during the flush is dropped for the flushing one.
+    Assert that the flush reports no rows and both keys stay pending.
+    Assert that the next flush writes them.
+    """
+    conn = return_duckdb_conn("test.db")
+    writer = DailyPricesWriter("test.db")
+    df = polars.DataFrame(
+        {
+            "date": [datetime.datetime(2021, 3, 1), datetime.datetime(2021, 3, 2)],
+            "country_code": ["GB", "GB"],
+            "commodity": ["crude", "crude"],
+            "granularity": ["h", "h"],
+            "prices": [[1.0, 2.0], [3.0, 4.0]],
+        }
+    )
+    writer.put(df)
+
+    def failing_write(rows: list[dict]) -> int:
+        assert writer.put(df.head(1).with_columns(prices=polars.lit([9.0, 9.0]))) == [
+            [1.0, 2.0]
+        ]
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(writer, "_write", failing_write)
+    assert writer.flush() == 0
+    assert writer.get_pending(datetime.datetime(2021, 3, 1), "GB", "h", "crude") == [
+        1.0,
+        2.0,
+    ]
+    assert writer.get_pending(datetime.datetime(2021, 3, 2), "GB", "h", "crude") == [
+        3.0,
+        4.0,
+    ]
+
+    monkeypatch.undo()
+    assert writer.flush() == 2
+    rows = conn.execute(
+        "SELECT prices FROM prices.daily_prices WHERE country_code = 'GB' "
+        "AND commodity = 'crude' AND date >= '2021-03-01' ORDER BY date"
+    ).fetchall()
+    assert rows == [([1.0, 2.0],), ([3.0, 4.0],)]
+
+
+def test_daily_prices_writer_keeps_first_queued_row():
+    """
+    Test the DailyPricesWriter put method with two rows for one key.
+    Assert that the second row is dropped and put returns the first row's prices.
+    Assert that the first row is the one written.
+    """
+    conn = return_duckdb_conn("test.db")
+    writer = DailyPricesWriter("test.db")
+    df = polars.DataFrame(
+        {
+            "date": [datetime.datetime(2021, 4, 1)],
+            "country_code": ["DE"],
+            "commodity": ["crude"],
+            "granularity": ["hh"],
+            "prices": [[1.0, 2.0]],
+        }
+    )
+    assert writer.put(df) == [[1.0, 2.0]]
+    overlapping_df = polars.concat(
+        [
+            df.with_columns(prices=polars.lit([7.0, 8.0])),
+            df.with_columns(date=polars.lit(datetime.datetime(2021, 4, 2))),
+        ]
+    )
+    assert writer.put(overlapping_df) == [[1.0, 2.0], [1.0, 2.0]]
+    assert writer.get_pending(datetime.datetime(2021, 4, 1), "DE", "hh", "crude") == [
+        1.0,
+        2.0,
+    ]
+
+    assert writer.flush() == 2
+    rows = conn.execute(
+        "SELECT prices FROM prices.daily_prices WHERE country_code = 'DE' "
+        "AND commodity = 'crude' AND granularity = 'hh' ORDER BY date"
+    ).fetchall()
+    assert rows == [([1.0, 2.0],), ([1.0, 2.0],)]
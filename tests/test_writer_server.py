@@ -0,0 +1,183 @@
+import sys
+import os
+import datetime
+import time
+import threading
+import polars
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db.connection import SnapshotConnectionManager
+import db.writer_server
+
+from db.writer import DailyPricesWriter
+from db.writer_server import DailyPricesWriterServer, RemoteDailyPricesWriter
+
+
+def daily_prices_df(
+    for_date: datetime.datetime, prices: list[float]
+) -> polars.DataFrame:
+    """
+    Return one DE crude half-hourly daily price row.
+    """
+    return polars.DataFrame(
+        {
+            "date": [for_date],
+            "country_code": ["DE"],
+            "commodity": ["crude"],
+            "granularity": ["hh"],
+            "prices": [prices],
+        }
+    )
+
+
+def test_writer_server_snapshots_remote_rows(tmp_path):
+    """
+    Test the DailyPricesWriterServer and RemoteDailyPricesWriter classes.
+    Send a daily price row to a running server over its socket and stop the server.
+    Assert that the row is written and readable from the latest snapshot.
+    """
+    socket_path = str(tmp_path / "writer.sock")
+    snapshot_directory = str(tmp_path / "snapshots")
+    server = DailyPricesWriterServer(
+        DailyPricesWriter("test.db"), socket_path, snapshot_directory
+    )
+    thread = threading.Thread(target=server.serve)
+    thread.start()
+    assert server.ready.wait(10)
+
+    remote_writer = RemoteDailyPricesWriter(socket_path)
+    remote_writer.start()
+    remote_writer.put(
+        polars.DataFrame(
+            {
+                "date": [datetime.datetime(2021, 2, 1)],
+                "country_code": ["DE"],
+                "commodity": ["crude"],
+                "granularity": ["hh"],
+                "prices": [[7.0, 8.0]],
+            }
+        )
+    )
+    assert (
+        remote_writer.get_pending(datetime.datetime(2021, 2, 1), "DE", "hh", "crude")
+        is None
+    )
+    remote_writer.stop()
+    server.stop()
+    thread.join()
+
+    connection_manager = SnapshotConnectionManager("test.db", snapshot_directory)
+    prices = (
+        connection_manager.cursor()
+        .execute(
+            """
+        SELECT prices FROM prices.daily_prices
+        WHERE date = '2021-02-01' AND country_code = 'DE' AND commodity = 'crude'
+        """
+        )
+        .fetchone()
+    )
+    assert prices == ([7.0, 8.0],)
+    connection_manager.close()
+
+
+def test_writer_server_survives_snapshot_errors(tmp_path, monkeypatch):
+    """
+    Test the DailyPricesWriterServer flush loop when a snapshot fails.
+    Fail the first snapshot written by the loop, then send another row.
+    Assert that the loop keeps flushing and retries the snapshot, so both rows end
+    up in the latest snapshot.
+    Assert that rows are refused once the flush thread has stopped.
+    """
+    write_database_snapshot = db.writer_server.write_database_snapshot
+    snapshot_calls = []
+
+    def failing_write_database_snapshot(*args, **kwargs) -> str:
+        snapshot_calls.append(args)
+        if len(snapshot_calls) == 2:
+            raise RuntimeError("snapshot failed")
+        return write_database_snapshot(*args, **kwargs)
+
+    monkeypatch.setattr(
+        db.writer_server, "write_database_snapshot", failing_write_database_snapshot
+    )
+    socket_path = str(tmp_path / "writer.sock")
+    snapshot_directory = str(tmp_path / "snapshots")
+    server = DailyPricesWriterServer(
+        DailyPricesWriter("test.db", flush_interval=0.02),
+        socket_path,
+        snapshot_directory,
+        snapshot_interval=0.02,
+    )
+    thread = threading.Thread(target=server.serve)
+    thread.start()
+    remote_writer = RemoteDailyPricesWriter(socket_path)
+    connection_manager = SnapshotConnectionManager(
+        "test.db", snapshot_directory, refresh_interval=0
+    )
+    try:
+        assert server.ready.wait(10)
+        remote_writer.put(daily_prices_df(datetime.datetime(2021, 2, 2), [1.0, 2.0]))
+        deadline = time.monotonic() + 10
+        while len(snapshot_calls) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(snapshot_calls) >= 2
+        remote_writer.put(daily_prices_df(datetime.datetime(2021, 2, 3), [3.0, 4.0]))
+
+        rows = 0
+        while rows < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+            rows = (
+                connection_manager.cursor()
+                .execute(
+                    """
+                    SELECT count(*) FROM prices.daily_prices
+                    WHERE date IN ('2021-02-02', '2021-02-03') AND country_code = 'DE'
+                    """
+                )
+                .fetchone()[0]
+            )
+        assert rows == 2
+
+        flush_thread = server._flush_thread
+        server._flush_thread = threading.Thread(target=lambda: None)
+        remote_writer.put(daily_prices_df(datetime.datetime(2021, 2, 4), [5.0, 6.0]))
+        assert (
+            server.writer.get_pending(
+                datetime.datetime(2021, 2, 4), "DE", "hh", "crude"
+            )
+            is None
+        )
+        server._flush_thread = flush_thread
+    finally:
+        connection_manager.close()
+        remote_writer.stop()
+        server.stop()
+        thread.join()
+
+
+def test_writer_server_snapshot_wait_grows_with_snapshot_time(tmp_path, monkeypatch):
+    """
+    Test the wait between snapshots of a DailyPricesWriterServer.
+    Make writing a snapshot take 0.05 seconds with a 0.01 second snapshot interval.
+    Assert that the next snapshot waits the snapshot time over the busy fraction.
+    """
+    write_database_snapshot = db.writer_server.write_database_snapshot
+
+    def slow_write_database_snapshot(*args, **kwargs) -> str:
+        time.sleep(0.05)
+        return write_database_snapshot(*args, **kwargs)
+
+    monkeypatch.setattr(
+        db.writer_server, "write_database_snapshot", slow_write_database_snapshot
+    )
+    server = DailyPricesWriterServer(
+        DailyPricesWriter("test.db"),
+        str(tmp_path / "writer.sock"),
+        str(tmp_path / "snapshots"),
+        snapshot_interval=0.01,
+    )
+    assert server.snapshot_wait == 0.01
+    server._write_snapshot()
+    assert server.snapshot_wait >= 0.05 / db.writer_server.SNAPSHOT_BUSY_FRACTION
@@ -1,21 +1,77 @@
+import os
+import sys
+import json
+import random
 import loguru
 import datetime
 
+from utils.settings import get_settings
+
+LOG_FORMAT = "{time:YYYY-MM-DDTHH:mm:ss.SSS} {level} {name}:{line} {message}"
+LOGGER_SINKS: dict[str, int] = {}
+
+
+def format_json_record(record: dict) -> str:
+    """
+    Format a log record as one compact JSON object per line.
+    The object holds the time, level, module, line and message of the record, and
+    any extra values bound to the logger.
+
+    :param record: the Loguru record to format
+    :return: Loguru format string that writes the serialized record
+    """
+    record["extra"]["serialized"] = json.dumps(
+        {
+            "time": record["time"].isoformat(timespec="milliseconds"),
+            "level": record["level"].name,
+            "module": record["name"],
+            "line": record["line"],
+            "message": record["message"],
+            **{
+                name: value
+                for name, value in record["extra"].items()
+                if name != "serialized"
+            },
+        },
+        default=str,
+    )
+    return "{extra[serialized]}\n"
+
 
 def get_logger(logger_name: str) -> loguru.logger:
     """
     Return a logger with the specified name.
+    The first call in a process replaces Loguru's default handler with an enqueued
+    stderr sink, and each logger name gets one enqueued file sink in LOG_DIRECTORY.
+    File records are written as JSON lines. Records are written by a background
+    thread, so logging never waits on I/O.
 
     :param logger_name: name of the logger
     :return: loguru.logger
     """
-    today = datetime.datetime.now().strftime("%Y-%m-%d")
     logger = loguru.logger
-    logger.add(
-        f"logs/{logger_name}-{today}.log",
-        rotation="1 hour",
-        retention="1 hour",
-        level="INFO",
-        mode="w",
-    )
+    if not LOGGER_SINKS:
+        logger.remove()
+        logger.add(sys.stderr, level="INFO", format=LOG_FORMAT, enqueue=True)
+    if logger_name not in LOGGER_SINKS:
+        today = datetime.datetime.now().strftime("%Y-%m-%d")
+        LOGGER_SINKS[logger_name] = logger.add(
+            os.path.join(get_settings().log_directory, f"{logger_name}-{today}.log"),
+            rotation="1 hour",
+            retention="1 hour",
+            level="INFO",
+            format=format_json_record,
+            enqueue=True,
+        )
     return logger
+
+
+def sample_payload_log() -> bool:
+    """
+    Return whether to log the full request and response payloads of a request.
+    A fraction LOG_PAYLOAD_SAMPLE_RATE of requests is sampled.
+
+    :return: True if the payloads should be logged
+    """
+    sample_rate = get_settings().log_payload_sample_rate
+    return sample_rate >= 1 or random.random() < sample_rate
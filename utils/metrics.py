@@ -0,0 +1,283 @@
+import math
+import time
+import threading
+
+from contextlib import contextmanager
+from typing import Iterator, TypeVar
+
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    """
+    Format labels as a Prometheus label set.
+
+    :param labels: label names and values
+    :return: the label set in braces, or an empty string if there are no labels
+    """
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels.items():
+        value = (
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    """
+    Format a sample value for the Prometheus text format.
+
+    :param value: the value to format
+    :return: the formatted value
+    """
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """
+    Monotonically increasing count, kept per combination of label values.
+    """
+
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()) -> None:
+        """
+        :param name: name of the metric
+        :param help_text: description of the metric
+        :param labelnames: names of the labels every sample is recorded with
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {} if labelnames else {(): 0}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Increase the count for a set of label values.
+
+        :param amount: amount to increase the count by
+        :param labels: the value of every label of the metric
+        :return: None
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        """
+        Return the count for a set of label values.
+
+        :param labels: the value of every label of the metric
+        :return: the count, 0 if nothing was recorded
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self) -> Iterator[str]:
+        """
+        Return the samples of the metric in the Prometheus text format.
+
+        :return: iterator of sample lines
+        """
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            labels = _format_labels(dict(zip(self.labelnames, key)))
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Histogram:
+    """
+    Distribution of observed values in cumulative buckets, kept per combination of
+    label values.
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple = (),
+        buckets: tuple = DEFAULT_BUCKETS,
+    ) -> None:
+        """
+        :param name: name of the metric
+        :param help_text: description of the metric
+        :param labelnames: names of the labels every sample is recorded with
+        :param buckets: upper bounds of the buckets, in increasing order
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Record an observed value for a set of label values.
+
+        :param value: the observed value
+        :param labels: the value of every label of the metric
+        :return: None
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[0][index] += 1
+                    break
+            counts[1] += value
+            counts[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """
+        Observe the number of seconds spent in a with block.
+
+        :param labels: the value of every label of the metric
+        :return: context manager
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        """
+        Return the number of observations for a set of label values.
+
+        :param labels: the value of every label of the metric
+        :return: the number of observations, 0 if nothing was recorded
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts = self._values.get(key)
+            return counts[2] if counts is not None else 0
+
+    def samples(self) -> Iterator[str]:
+        """
+        Return the samples of the metric in the Prometheus text format.
+
+        :return: iterator of sample lines
+        """
+        with self._lock:
+            values = sorted(
+                (key, (list(buckets), total, count))
+                for key, (buckets, total, count) in self._values.items()
+            )
+        for key, (buckets, total, count) in values:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, buckets):
+                cumulative += bucket_count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(labels)} {count}"
+
+
+M = TypeVar("M", "Counter", "Histogram")
+
+
+class MetricsRegistry:
+    """
+    In-process collection of metrics, rendered in the Prometheus text format.
+    Each process keeps its own registry.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Histogram] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: M) -> M:
+        """
+        Add a metric to the registry.
+
+        :param metric: the metric to add
+        :return: the metric
+        """
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """
+        Render every registered metric in the Prometheus text exposition format.
+
+        :return: the metrics as text
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+MODEL_PRICES_STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "model_prices_stage_seconds",
+        "Seconds spent in each stage of serving modelled prices.",
+        ("stage",),
+    )
+)
+DAILY_PRICE_LOOKUPS = REGISTRY.register(
+    Counter(
+        "daily_price_lookups_total",
+        "Requested days found in storage (hit) or modelled (miss).",
+        ("result",),
+    )
+)
+RESPONSE_CACHE_LOOKUPS = REGISTRY.register(
+    Counter(
+        "response_cache_lookups_total",
+        "Responses served from the response cache (hit) or encoded (miss).",
+        ("result",),
+    )
+)
+DAILY_PRICES_ROWS_WRITTEN = REGISTRY.register(
+    Counter(
+        "daily_prices_rows_written_total",
+        "Daily price rows flushed to the database by the writer.",
+    )
+)
+DUCKDB_CONNECTION_OPENS = REGISTRY.register(
+    Counter(
+        "duckdb_connection_opens_total",
+        "DuckDB database connections opened.",
+    )
+)
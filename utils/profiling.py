@@ -0,0 +1,325 @@
+import os
+import re
+import sys
+import uuid
+import types
+import random
+import pstats
+import cProfile
+import datetime
+import threading
+import loguru
+
+from contextvars import ContextVar
+from typing import Any, Callable, Coroutine, Hashable, TypeVar
+
+T = TypeVar("T")
+
+PROFILE_HEADER = b"x-profile"
+REQUEST_ID_HEADER = b"x-request-id"
+# From Python 3.12 cProfile is built on sys.monitoring, which allows one profiler
+# to be enabled per process, so profilers take turns behind this lock.
+_PROCESS_PROFILER_LOCK = threading.Lock() if sys.version_info >= (3, 12) else None
+
+
+def enable_profiler(profiler: cProfile.Profile) -> bool:
+    """
+    Enable a profiler in the calling thread, unless the process cannot run another.
+    Before Python 3.12 each thread has its own profiler, so this only fails when
+    another profiling tool is active in the thread.
+
+    :param profiler: the profiler to enable
+    :return: True if the profiler was enabled, and must be disabled with
+        disable_profiler
+    """
+    if _PROCESS_PROFILER_LOCK is not None and not _PROCESS_PROFILER_LOCK.acquire(
+        blocking=False
+    ):
+        return False
+    try:
+        profiler.enable()
+    except ValueError:
+        if _PROCESS_PROFILER_LOCK is not None:
+            _PROCESS_PROFILER_LOCK.release()
+        return False
+    return True
+
+
+def disable_profiler(profiler: cProfile.Profile) -> None:
+    """
+    Disable a profiler enabled by enable_profiler.
+
+    :param profiler: the profiler to disable
+    :return: None
+    """
+    profiler.disable()
+    if _PROCESS_PROFILER_LOCK is not None:
+        _PROCESS_PROFILER_LOCK.release()
+
+
+def _safe_file_name(value: str) -> str:
+    """
+    Replace every run of characters that are unsafe in a file name with _.
+
+    :param value: the value to make safe
+    :return: the safe value
+    """
+    return re.sub(r"[^A-Za-z0-9.]+", "_", value).strip("_.")
+
+
+class RequestProfile:
+    """
+    Profiles collected while serving one request.
+    Each thread that works on the request runs its own cProfile profiler, and the
+    profiles are merged into one pstats file once the request is done.
+    """
+
+    def __init__(self, request_id: str, path: str) -> None:
+        """
+        :param request_id: id of the profiled request
+        :param path: URL path of the profiled request
+        """
+        self.request_id = request_id
+        self.path = path
+        self.key: Hashable | None = None
+        self.skipped = 0
+        self._profilers: list[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def add(self, profiler: cProfile.Profile) -> None:
+        """
+        Add a finished profiler to the request profile.
+
+        :param profiler: the profiler to add
+        :return: None
+        """
+        with self._lock:
+            self._profilers.append(profiler)
+
+    def run(self, func: Callable[..., T], *args) -> T:
+        """
+        Call a function under a new profiler and add it to the request profile.
+        The function runs unprofiled, and is counted as skipped, if the profiler
+        cannot be enabled.
+
+        :param func: the function to call
+        :param args: positional arguments to call the function with
+        :return: the result of the function
+        """
+        profiler = cProfile.Profile()
+        if not enable_profiler(profiler):
+            self.skip()
+            return func(*args)
+        try:
+            return func(*args)
+        finally:
+            disable_profiler(profiler)
+            self.add(profiler)
+
+    async def run_steps(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """
+        Await a coroutine, profiling only the steps it runs on the event loop.
+        Other tasks that run on the loop while the coroutine is suspended are not
+        recorded. Steps that cannot be profiled are counted as skipped.
+
+        :param coroutine: the coroutine to await
+        :return: the result of the coroutine
+        """
+        profiler = cProfile.Profile()
+        try:
+            return await _profile_steps(coroutine, profiler, self)
+        finally:
+            if profiler.getstats():
+                self.add(profiler)
+
+    def skip(self) -> None:
+        """
+        Count a part of the request that ran unprofiled.
+
+        :return: None
+        """
+        with self._lock:
+            self.skipped += 1
+
+    def get_tag(self) -> str:
+        """
+        Return a file name safe tag for the request, built from its key if set.
+
+        :return: the tag
+        """
+        if self.key is None:
+            parts = [self.path]
+        elif isinstance(self.key, tuple):
+            parts = [str(getattr(part, "value", part)) for part in self.key]
+        else:
+            parts = [str(getattr(self.key, "value", self.key))]
+        return _safe_file_name("-".join(parts))
+
+    def dump(self, directory: str) -> str | None:
+        """
+        Merge every profiler of the request and write them as one pstats file.
+
+        :param directory: directory to write the profile to
+        :return: path of the written file, or None if nothing was profiled
+        """
+        with self._lock:
+            profilers = list(self._profilers)
+        if not profilers:
+            return None
+        stats = pstats.Stats(profilers[0])
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+
+        os.makedirs(directory, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime("%Y%m%dT%H%M%S")
+        path = os.path.join(
+            directory,
+            f"profile-{timestamp}-{self.get_tag()}-{_safe_file_name(self.request_id)}.pstats",
+        )
+        stats.dump_stats(path)
+        return path
+
+
+@types.coroutine
+def _profile_steps(
+    coroutine: Coroutine[Any, Any, T],
+    profiler: cProfile.Profile,
+    profile: RequestProfile,
+):
+    """
+    Drive a coroutine one step at a time, enabling the profiler around each step.
+    Values and exceptions sent in by the task are passed through to the coroutine.
+
+    :param coroutine: the coroutine to drive
+    :param profiler: the profiler to enable around each step
+    :param profile: the request profile that counts skipped steps
+    :return: the result of the coroutine
+    """
+    value, error = None, None
+    while True:
+        enabled = enable_profiler(profiler)
+        if not enabled:
+            profile.skip()
+        try:
+            if error is not None:
+                yielded = coroutine.throw(error)
+            else:
+                yielded = coroutine.send(value)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            if enabled:
+                disable_profiler(profiler)
+        try:
+            value, error = (yield yielded), None
+        except BaseException as raised:
+            value, error = None, raised
+
+
+ACTIVE_PROFILE: ContextVar[RequestProfile | None] = ContextVar(
+    "active_profile", default=None
+)
+
+
+def profile_in_thread(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Wrap a function handed to another thread so it is profiled with the request.
+    Executor threads do not share the request's profiler, so the wrapped function
+    runs under its own profiler that is merged into the request profile.
+
+    :param func: the function to wrap
+    :return: the wrapped function, or func unchanged if the request is not profiled
+    """
+    profile = ACTIVE_PROFILE.get()
+    if profile is None:
+        return func
+    return lambda *args: profile.run(func, *args)
+
+
+def tag_request_profile(key: Hashable) -> None:
+    """
+    Tag the profile of the current request with its request key, if it is profiled.
+
+    :param key: key identifying the request, such as its single-flight key
+    :return: None
+    """
+    profile = ACTIVE_PROFILE.get()
+    if profile is not None:
+        profile.key = key
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles a request when it carries an X-Profile header, if
+    enabled, or is picked by the sampling rate.
+    On the event loop only the steps of the request's own coroutine are profiled,
+    so concurrent requests are not recorded, and work sent to executors through
+    profile_in_thread is profiled in its own thread. From Python 3.12 one profiler
+    can be enabled per process, so parts of a request that run while another is
+    being profiled are skipped and counted in the log. The merged profile is
+    written to the directory as a pstats file.
+    """
+
+    def __init__(
+        self,
+        app,
+        directory: str = "logs",
+        sample_rate: float = 0.0,
+        header_enabled: bool = False,
+    ) -> None:
+        """
+        :param app: the ASGI app to wrap
+        :param directory: directory to write profiles to
+        :param sample_rate: fraction of requests to profile
+        :param header_enabled: whether the X-Profile header turns on profiling
+        """
+        self.app = app
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.header_enabled = header_enabled
+
+    def should_profile(self, scope: dict) -> bool:
+        """
+        Return whether to profile a request.
+
+        :param scope: the ASGI scope of the request
+        :return: True if the request should be profiled
+        """
+        if scope["type"] != "http":
+            return False
+        if self.header_enabled and any(
+            name == PROFILE_HEADER and value not in (b"", b"0", b"false")
+            for name, value in scope["headers"]
+        ):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send) -> None:
+        """
+        Serve a request, profiling it if it is selected.
+
+        :param scope: the ASGI scope of the request
+        :param receive: the ASGI receive channel
+        :param send: the ASGI send channel
+        :return: None
+        """
+        if not self.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        request_id = headers.get(REQUEST_ID_HEADER, b"").decode() or uuid.uuid4().hex
+        profile = RequestProfile(request_id, scope["path"])
+        token = ACTIVE_PROFILE.set(profile)
+        try:
+            await profile.run_steps(self.app(scope, receive, send))
+        finally:
+            ACTIVE_PROFILE.reset(token)
+            path = profile.dump(self.directory)
+            if path is not None:
+                skipped = (
+                    f", {profile.skipped} parts skipped while another profiler ran"
+                    if profile.skipped
+                    else ""
+                )
+                loguru.logger.info(f"request profile written to {path}{skipped}")
@@ -0,0 +1,167 @@
+import time
+import hashlib
+import threading
+
+from collections import OrderedDict
+from typing import Hashable, NamedTuple
+from fastapi import Response
+
+NOT_MODIFIED = 304
+PRECONDITION_FAILED = 412
+SAFE_METHODS = ("GET", "HEAD")
+CACHED_HEADERS = ("content-type", "x-price-periods")
+
+
+class CachedResponse(NamedTuple):
+    """
+    An encoded response body with the headers needed to replay it.
+    """
+
+    body: bytes
+    headers: dict[str, str]
+    etag: str
+    expires_at: float
+
+
+def make_etag(body: bytes) -> str:
+    """
+    Return a strong ETag for a response body.
+
+    :param body: the encoded response body
+    :return: the quoted ETag
+    """
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Return whether an If-None-Match header matches an ETag.
+    Uses the weak comparison RFC 9110 requires for If-None-Match, so W/ prefixes
+    are ignored, and * matches any ETag.
+
+    :param if_none_match: the If-None-Match header of the request, or None
+    :param etag: the ETag of the current response
+    :return: True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip().removeprefix("W/")
+        if candidate in ("*", etag):
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of encoded responses, each kept for at most ttl seconds.
+    Entries hold the bytes sent to the client, so a hit skips the lookup, the
+    response model and the encoding. A max_entries of 0 disables caching, while
+    responses still carry their ETag.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 3600.0) -> None:
+        """
+        :param max_entries: maximum number of responses to keep
+        :param ttl: seconds a response is kept and may be cached by clients
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.cache_control = f"public, max-age={int(ttl)}"
+        self._entries: OrderedDict[Hashable, CachedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> CachedResponse | None:
+        """
+        Return the cached response for a key, unless it is missing or expired.
+
+        :param key: key identifying the request, including its media type
+        :return: the cached response, or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def encode(self, response: Response) -> CachedResponse:
+        """
+        Return the cache entry of an encoded response without caching it.
+
+        :param response: the encoded response
+        :return: the response as a cache entry
+        """
+        body = bytes(response.body)
+        return CachedResponse(
+            body=body,
+            headers={
+                name: value
+                for name, value in response.headers.items()
+                if name in CACHED_HEADERS
+            },
+            etag=make_etag(body),
+            expires_at=time.monotonic() + self.ttl,
+        )
+
+    def put(self, key: Hashable, response: Response) -> CachedResponse:
+        """
+        Cache an encoded response, evicting the least recently used if full.
+
+        :param key: key identifying the request, including its media type
+        :param response: the encoded response
+        :return: the cached response
+        """
+        entry = self.encode(response)
+        if self.max_entries:
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def respond(
+        self, entry: CachedResponse, if_none_match: str | None, method: str = "GET"
+    ) -> Response:
+        """
+        Return a cached response with its ETag, varying on Accept.
+        When the client's copy is current, a GET or HEAD is answered with 304 Not
+        Modified, and any other method with 412 Precondition Failed, as RFC 9110
+        requires. Only GET and HEAD responses carry Cache-Control, since shared
+        caches do not store responses to other methods.
+
+        :param entry: the cached response
+        :param if_none_match: the If-None-Match header of the request, or None
+        :param method: the method of the request
+        :return: the response
+        """
+        headers = {"ETag": entry.etag, "Vary": "Accept"}
+        if method in SAFE_METHODS:
+            headers["Cache-Control"] = self.cache_control
+        if etag_matches(if_none_match, entry.etag):
+            status_code = (
+                NOT_MODIFIED if method in SAFE_METHODS else PRECONDITION_FAILED
+            )
+            return Response(status_code=status_code, headers=headers)
+        return Response(entry.body, headers={**entry.headers, **headers})
+
+    def clear(self) -> None:
+        """
+        Forget every cached response.
+
+        :return: None
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """
+        Return the number of cached responses, including expired ones not yet evicted.
+
+        :return: int
+        """
+        return len(self._entries)
@@ -0,0 +1,210 @@
+import io
+import numpy as np
+import pydantic_core
+
+from typing import TYPE_CHECKING
+from fastapi import Response
+from pydantic import BaseModel
+from models.responses import (
+    GeneratePricesResponse,
+    GeneratePricesRangeResponse,
+    GeneratePriceScenariosResponse,
+    GenerateCrossSectionResponse,
+)
+
+if TYPE_CHECKING:
+    import pyarrow
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PACKED_MEDIA_TYPE = "application/octet-stream"
+PRICES_MEDIA_TYPES = (JSON_MEDIA_TYPE, ARROW_MEDIA_TYPE, PACKED_MEDIA_TYPE)
+SCENARIOS_MEDIA_TYPES = (JSON_MEDIA_TYPE, ARROW_MEDIA_TYPE)
+PACKED_PERIODS_HEADER = "X-Price-Periods"
+
+
+def negotiate_media_type(accept: str | None, media_types: tuple[str, ...]) -> str:
+    """
+    Return the media type to respond with for an Accept header.
+    Accepted types are tried in order of their quality value; wildcards match the
+    first supported type, which is also returned when nothing else matches.
+
+    :param accept: the Accept header of the request, or None
+    :param media_types: the supported media types, the default first
+    :return: the negotiated media type
+    """
+    if not accept:
+        return media_types[0]
+
+    accepted = []
+    for position, entry in enumerate(accept.split(",")):
+        media_type, *params = [part.strip() for part in entry.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.append((-quality, position, media_type.lower()))
+
+    for _, _, media_type in sorted(accepted):
+        if media_type in media_types:
+            return media_type
+        if media_type in ("*/*", "application/*"):
+            return media_types[0]
+    return media_types[0]
+
+
+def encode_arrow_stream(table: "pyarrow.Table") -> bytes:
+    """
+    Encode an Arrow table as an Arrow IPC stream.
+
+    :param table: the table to encode
+    :return: the encoded stream
+    """
+    import pyarrow.ipc
+
+    sink = io.BytesIO()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def daily_prices_to_arrow(
+    daily_prices: list[GeneratePricesResponse],
+) -> "pyarrow.Table":
+    """
+    Build an Arrow table with one row per day of prices.
+
+    :param daily_prices: the daily prices to convert
+    :return: pyarrow.Table with date, country_code, commodity, granularity and
+        prices columns
+    """
+    import pyarrow
+
+    return pyarrow.table(
+        {
+            "date": pyarrow.array(
+                [day.date for day in daily_prices], pyarrow.timestamp("us")
+            ),
+            "country_code": [day.country_code.value for day in daily_prices],
+            "commodity": [day.commodity.value for day in daily_prices],
+            "granularity": [day.granularity.value for day in daily_prices],
+            "prices": pyarrow.array(
+                [day.prices for day in daily_prices],
+                pyarrow.list_(pyarrow.float64()),
+            ),
+        }
+    )
+
+
+def price_scenarios_to_arrow(
+    response: GeneratePriceScenariosResponse,
+) -> "pyarrow.Table":
+    """
+    Build an Arrow table with one row per day of price scenarios.
+    The paths column is only included when the response holds the paths.
+
+    :param response: the price scenarios to convert
+    :return: pyarrow.Table with date, p5, p50, p95 and optionally paths columns
+    """
+    import pyarrow
+
+    days = response.daily_scenarios
+    prices_type = pyarrow.list_(pyarrow.float64())
+    columns = {
+        "date": pyarrow.array([day.date for day in days], pyarrow.timestamp("us")),
+        "p5": pyarrow.array([day.p5 for day in days], prices_type),
+        "p50": pyarrow.array([day.p50 for day in days], prices_type),
+        "p95": pyarrow.array([day.p95 for day in days], prices_type),
+    }
+    if days and days[0].paths is not None:
+        columns["paths"] = pyarrow.array(
+            [day.paths for day in days], pyarrow.list_(prices_type)
+        )
+    return pyarrow.table(columns)
+
+
+def pack_daily_prices(daily_prices: list[GeneratePricesResponse]) -> tuple[bytes, str]:
+    """
+    Pack the prices of every day into one little-endian float64 buffer.
+
+    :param daily_prices: the daily prices to pack
+    :return: the packed prices, and the comma-separated number of periods per day
+    """
+    packed = np.concatenate(
+        [np.asarray(day.prices, dtype="<f8") for day in daily_prices]
+    ).tobytes()
+    periods = ",".join(str(len(day.prices)) for day in daily_prices)
+    return packed, periods
+
+
+def json_response(response: BaseModel) -> Response:
+    """
+    Encode a response model straight to JSON bytes with pydantic-core.
+    Returning a Response stops FastAPI from validating and encoding the model again.
+
+    :param response: the response model to encode
+    :return: JSON response
+    """
+    return Response(pydantic_core.to_json(response), media_type=JSON_MEDIA_TYPE)
+
+
+def render_daily_prices(
+    response: GeneratePricesResponse
+    | GeneratePricesRangeResponse
+    | GenerateCrossSectionResponse,
+    accept: str | None,
+) -> Response:
+    """
+    Encode daily prices in the media type negotiated from the Accept header.
+    JSON returns the response model; Arrow returns one row per day; packed returns
+    the prices as float64 values, with the periods per day in X-Price-Periods.
+
+    :param response: the daily prices, for one day, a date range or a cross-section
+    :param accept: the Accept header of the request, or None
+    :return: the encoded response
+    """
+    media_type = negotiate_media_type(accept, PRICES_MEDIA_TYPES)
+    if media_type == JSON_MEDIA_TYPE:
+        return json_response(response)
+
+    daily_prices = (
+        response.daily_prices
+        if isinstance(
+            response, (GeneratePricesRangeResponse, GenerateCrossSectionResponse)
+        )
+        else [response]
+    )
+    if media_type == ARROW_MEDIA_TYPE:
+        return Response(
+            encode_arrow_stream(daily_prices_to_arrow(daily_prices)),
+            media_type=ARROW_MEDIA_TYPE,
+        )
+    packed, periods = pack_daily_prices(daily_prices)
+    return Response(
+        packed,
+        media_type=PACKED_MEDIA_TYPE,
+        headers={PACKED_PERIODS_HEADER: periods},
+    )
+
+
+def render_price_scenarios(
+    response: GeneratePriceScenariosResponse, accept: str | None
+) -> Response:
+    """
+    Encode price scenarios in the media type negotiated from the Accept header.
+
+    :param response: the price scenarios
+    :param accept: the Accept header of the request, or None
+    :return: the encoded response
+    """
+    if negotiate_media_type(accept, SCENARIOS_MEDIA_TYPES) == ARROW_MEDIA_TYPE:
+        return Response(
+            encode_arrow_stream(price_scenarios_to_arrow(response)),
+            media_type=ARROW_MEDIA_TYPE,
+        )
+    return json_response(response)
@@ -0,0 +1,167 @@
+import os
+import functools
+
+from dataclasses import dataclass
+
+PRICES_STORAGE_LAYOUTS = ("wide", "long")
+PRICE_GENERATIONS = ("random", "seeded")
+
+
+def _env_choice(name: str, default: str, choices: tuple) -> str:
+    """
+    Return an environment variable that must be one of a set of choices.
+
+    :param name: name of the environment variable
+    :param default: value to use when the variable is not set
+    :param choices: allowed values
+    :return: the value of the environment variable
+    """
+    value = os.environ.get(name, default)
+    if value not in choices:
+        raise ValueError(f"{name} must be one of {choices}")
+    return value
+
+
+def _env_fraction(name: str, default: float) -> float:
+    """
+    Return an environment variable parsed as a fraction between 0 and 1.
+
+    :param name: name of the environment variable
+    :param default: value to use when the variable is not set
+    :return: the value of the environment variable
+    """
+    value = float(os.environ.get(name, default))
+    if not 0 <= value <= 1:
+        raise ValueError(f"{name} must be between 0 and 1")
+    return value
+
+
+def _env_positive_float(name: str, default: float) -> float:
+    """
+    Return an environment variable parsed as a positive number.
+
+    :param name: name of the environment variable
+    :param default: value to use when the variable is not set
+    :return: the value of the environment variable
+    """
+    value = float(os.environ.get(name, default))
+    if value <= 0:
+        raise ValueError(f"{name} must be greater than 0")
+    return value
+
+
+def _env_non_negative_int(name: str, default: int) -> int:
+    """
+    Return an environment variable parsed as an integer of at least 0.
+
+    :param name: name of the environment variable
+    :param default: value to use when the variable is not set
+    :return: the value of the environment variable
+    """
+    value = int(os.environ.get(name, default))
+    if value < 0:
+        raise ValueError(f"{name} must be at least 0")
+    return value
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """
+    Return an environment variable parsed as a boolean.
+
+    :param name: name of the environment variable
+    :param default: value to use when the variable is not set
+    :return: True for 1, true or yes (in any case), otherwise False
+    """
+    return os.environ.get(name, str(default)).lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Runtime settings for the Price Data API, read from environment variables.
+    """
+
+    prices_storage_layout: str = "wide"
+    price_generation: str = "random"
+    persist_modelled_prices: bool = True
+    prices_archive_directory: str = "price_archive"
+    log_directory: str = "logs"
+    log_payload_sample_rate: float = 1.0
+    profile_sample_rate: float = 0.0
+    profile_header_enabled: bool = False
+    db_name: str = "price_data.db"
+    writer_socket: str = ""
+    snapshot_directory: str = "price_data_snapshots"
+    snapshot_interval: float = 5.0
+    response_cache_size: int = 10000
+    response_cache_ttl: float = 3600.0
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """
+        Build the settings from environment variables, falling back to the defaults.
+
+        :return: Settings
+        """
+        settings = cls(
+            prices_storage_layout=_env_choice(
+                "PRICES_STORAGE_LAYOUT",
+                cls.prices_storage_layout,
+                PRICES_STORAGE_LAYOUTS,
+            ),
+            price_generation=_env_choice(
+                "PRICE_GENERATION", cls.price_generation, PRICE_GENERATIONS
+            ),
+            persist_modelled_prices=_env_bool(
+                "PERSIST_MODELLED_PRICES", cls.persist_modelled_prices
+            ),
+            prices_archive_directory=os.environ.get(
+                "PRICES_ARCHIVE_DIRECTORY", cls.prices_archive_directory
+            ),
+            log_directory=os.environ.get("LOG_DIRECTORY", cls.log_directory),
+            log_payload_sample_rate=_env_fraction(
+                "LOG_PAYLOAD_SAMPLE_RATE", cls.log_payload_sample_rate
+            ),
+            profile_sample_rate=_env_fraction(
+                "PROFILE_SAMPLE_RATE", cls.profile_sample_rate
+            ),
+            profile_header_enabled=_env_bool(
+                "PROFILE_HEADER_ENABLED", cls.profile_header_enabled
+            ),
+            db_name=os.environ.get("DB_NAME", cls.db_name),
+            writer_socket=os.environ.get("WRITER_SOCKET", cls.writer_socket),
+            snapshot_directory=os.environ.get(
+                "DB_SNAPSHOT_DIRECTORY", cls.snapshot_directory
+            ),
+            snapshot_interval=_env_positive_float(
+                "DB_SNAPSHOT_INTERVAL", cls.snapshot_interval
+            ),
+            response_cache_size=_env_non_negative_int(
+                "RESPONSE_CACHE_SIZE", cls.response_cache_size
+            ),
+            response_cache_ttl=_env_positive_float(
+                "RESPONSE_CACHE_TTL", cls.response_cache_ttl
+            ),
+        )
+        if (
+            not settings.persist_modelled_prices
+            and settings.price_generation != "seeded"
+        ):
+            raise ValueError(
+                "PERSIST_MODELLED_PRICES can only be disabled with PRICE_GENERATION=seeded"
+            )
+        if settings.writer_socket and settings.price_generation != "seeded":
+            raise ValueError(
+                "WRITER_SOCKET can only be set with PRICE_GENERATION=seeded"
+            )
+        return settings
+
+
+@functools.lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """
+    Return the process-wide settings, read from the environment on first use.
+
+    :return: Settings
+    """
+    return Settings.from_env()
@@ -0,0 +1,55 @@
+import asyncio
+
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent async calls that share a key into a single execution.
+    The first caller for a key starts the call; callers arriving while it is in
+    flight await the same result, or the same exception.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Return the result of call, sharing it with every concurrent caller of key.
+        The call runs as a shielded task, so it completes and releases its key even
+        if the caller that started it is cancelled.
+
+        :param key: key identifying identical calls
+        :param call: callable returning the awaitable to run
+        :return: the result of the call
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done_task: self._forget(key, done_task))
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        """
+        Return the number of keys with a call in flight.
+
+        :return: int
+        """
+        return len(self._in_flight)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        """
+        Release a key once its call is done, unless a newer call has replaced it.
+        The exception is retrieved so it is not reported when every caller was cancelled.
+
+        :param key: key of the finished call
+        :param task: the finished task
+        :return: None
+        """
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()